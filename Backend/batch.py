@@ -0,0 +1,111 @@
+import json
+import os
+from typing import Literal, Optional
+
+from fastapi import HTTPException, Request
+from pydantic import BaseModel, ValidationError
+from starlette.datastructures import UploadFile
+
+from idempotency import fingerprint, idempotency_keys
+from ingest import upload_sha256
+
+# --- Batch submissions ---
+# Offline clients replay their queue in one request instead of one per item.
+# The body is either JSON, {"items": [...]}, or multipart/form-data with the
+# same array as a JSON string in the "items" field. In multipart, an item's
+# file is a separate part, named by the item's "media" / "image" key. Items
+# can instead point at media the server already stores by its SHA-256.
+#
+# Valid items are inserted together in one transaction. Each item gets its own
+# result, so one bad item does not fail the rest. An item may carry an
+# "idempotency_key"; an item whose key was already used gets its first result
+# again instead of being inserted twice (see idempotency.py).
+
+MAX_BATCH_ITEMS = int(os.getenv("MAX_BATCH_ITEMS", "50"))
+MAX_BATCH_UPLOAD_BYTES = int(os.getenv("MAX_BATCH_UPLOAD_BYTES", str(100 * 1024 * 1024)))
+
+
+class BatchItemResult(BaseModel):
+    index: int
+    status: Literal["created", "merged", "error"]
+    id: Optional[int] = None
+    detail: Optional[str] = None
+    duplicate_of: Optional[int] = None  # Index of the earlier item of the batch this one repeats
+
+
+class BatchResponse(BaseModel):
+    results: list[BatchItemResult]
+
+
+async def read_batch(request: Request):
+    """Returns (raw items, {part name: UploadFile}); raises 400/413 for a malformed or oversized batch."""
+    files = {}
+    try:
+        if request.headers.get("content-type", "").startswith("multipart/form-data"):
+            form = await request.form(max_files=MAX_BATCH_ITEMS, max_fields=MAX_BATCH_ITEMS + 1)
+            items = json.loads(form.get("items") or "null")
+            files = {name: value for name, value in form.multi_items() if isinstance(value, UploadFile)}
+        else:
+            items = (await request.json()).get("items")
+    except (ValueError, AttributeError):
+        raise HTTPException(status_code=400, detail="Expected a JSON array in \"items\"")
+
+    if not isinstance(items, list) or not items:
+        raise HTTPException(status_code=400, detail="Expected a JSON array in \"items\"")
+    if len(items) > MAX_BATCH_ITEMS:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_BATCH_ITEMS} items per batch")
+    return items, files
+
+
+def parse_item(model, raw):
+    """Validate one item; returns (item, None) or (None, error message)."""
+    try:
+        return model.model_validate(raw), None
+    except ValidationError as e:
+        error = e.errors()[0]
+        location = ".".join(str(part) for part in error["loc"])
+        return None, f"{location}: {error['msg']}" if location else error["msg"]
+
+
+async def item_file_sha256(files: dict, part: Optional[str], sha256: Optional[str]) -> Optional[str]:
+    """SHA-256 of an item's file: the multipart part it names, or else the stored file it points at."""
+    return await upload_sha256(files.get(part)) if part else sha256
+
+
+class ItemKeys:
+    """The idempotency keys claimed by the items of one batch."""
+
+    def __init__(self, scope: str):
+        self.scope = scope
+        self._claimed = {}  # item index -> key
+
+    async def claim(self, index: int, item, *parts) -> tuple:
+        """
+        Returns (stored result of an earlier submission or None, error message or None).
+        `parts` are what identifies the item besides its description and location.
+        """
+        if not item.idempotency_key:
+            return None, None
+        try:
+            stored = await idempotency_keys.claim(
+                self.scope, item.idempotency_key, fingerprint(item.description, item.location, *parts)
+            )
+        except HTTPException as e:
+            return None, f"idempotency_key: {e.detail}"
+        if stored is not None:
+            return BatchItemResult(index=index, **stored), None
+        self._claimed[index] = item.idempotency_key
+        return None, None
+
+    async def finish(self, results: list):
+        """Store each claimed item's result, or release its key if the item failed."""
+        for index, key in self._claimed.items():
+            result = results[index]
+            if result.status == "error":
+                await idempotency_keys.release(self.scope, key)
+            else:
+                await idempotency_keys.complete(self.scope, key, {"status": result.status, "id": result.id})
+
+    async def release_all(self):
+        for key in self._claimed.values():
+            await idempotency_keys.release(self.scope, key)
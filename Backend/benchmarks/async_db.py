@@ -0,0 +1,104 @@
+"""
+Before/after benchmark for the async database path.
+
+Runs the same /issues page query from many concurrent coroutines, once through the
+sync Session (what the handlers used to do) and once through AsyncSession, and
+reports throughput plus how long the event loop was stalled.
+
+    cd Backend
+    python -m benchmarks.async_db --requests 500 --concurrency 50
+
+Uses DATABASE_URL like the app; point it at Postgres to include network latency.
+"""
+import argparse
+import asyncio
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, func
+
+from migrations import migrate
+from models import Issue, engine, SessionLocal, AsyncSessionLocal, async_engine
+
+PAGE_SIZE = 50
+
+
+def seed(rows: int):
+    migrate(engine)
+    with SessionLocal() as db:
+        existing = db.scalar(select(func.count(Issue.id)))
+        if existing >= rows:
+            return
+        now = datetime.utcnow()
+        db.execute(Issue.__table__.insert(), [
+            {
+                "description": f"Benchmark issue {i}",
+                "location": f"Block {i % 40}",
+                "status": "pending",
+                "upvotes": 0,
+                "created_at": now - timedelta(minutes=i),
+                "updated_at": now - timedelta(minutes=i),
+            }
+            for i in range(existing, rows)
+        ])
+        db.commit()
+
+
+def page_query():
+    return select(Issue).order_by(Issue.created_at.desc(), Issue.id.desc()).limit(PAGE_SIZE)
+
+
+async def sync_handler():
+    # The old pattern: a blocking Session call inside an async def
+    with SessionLocal() as db:
+        db.execute(page_query()).scalars().all()
+
+
+async def async_handler():
+    async with AsyncSessionLocal() as db:
+        (await db.execute(page_query())).scalars().all()
+
+
+async def run(handler, requests: int, concurrency: int):
+    stall = {"max": 0.0}
+    stop = asyncio.Event()
+
+    async def heartbeat():
+        # Measures how late the loop wakes us up; a blocked loop shows up as lag
+        while not stop.is_set():
+            before = time.perf_counter()
+            await asyncio.sleep(0.001)
+            stall["max"] = max(stall["max"], time.perf_counter() - before - 0.001)
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            await handler()
+
+    monitor = asyncio.create_task(heartbeat())
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await monitor
+    return requests / elapsed, stall["max"] * 1000
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+
+    seed(args.rows)
+    print(f"{args.requests} requests, concurrency {args.concurrency}, {args.rows} rows")
+    for name, handler in (("sync Session (before)", sync_handler), ("AsyncSession (after)", async_handler)):
+        throughput, max_stall_ms = await run(handler, args.requests, args.concurrency)
+        print(f"  {name:24s} {throughput:8.1f} req/s   max event-loop stall {max_stall_ms:7.1f} ms")
+    await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
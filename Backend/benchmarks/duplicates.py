@@ -0,0 +1,105 @@
+"""
+Benchmark for near-duplicate lookup: the MinHash/LSH index in duplicates.py
+versus an exact Jaccard scan over the open issues at the same location, on
+synthetic issues.
+
+    cd Backend
+    python -m benchmarks.duplicates --issues 50000 --locations 200
+"""
+import argparse
+import random
+import statistics
+import time
+
+from duplicates import DuplicateIndex, normalize_location, shingles
+
+SUBJECTS = [
+    "projector", "ceiling fan", "water cooler", "wifi router", "tube light", "door lock",
+    "window pane", "whiteboard", "air conditioner", "wash basin", "switch board", "bench",
+]
+PROBLEMS = [
+    "is broken", "not working since morning", "makes a loud noise", "is leaking water",
+    "keeps flickering", "is missing", "has a crack", "sparks when switched on",
+]
+EXTRAS = ["", "in the back row", "near the entrance", "again", "for two days", "urgently needs repair"]
+
+
+def make_issue(rng):
+    return f"{rng.choice(SUBJECTS)} {rng.choice(PROBLEMS)} {rng.choice(EXTRAS)}".strip()
+
+
+def perturb(rng, text):
+    # A second student describing the same thing slightly differently
+    words = text.split()
+    if len(words) > 3 and rng.random() < 0.5:
+        del words[rng.randrange(len(words))]
+    return "The " + " ".join(words) + rng.choice(["", " please fix", "!"])
+
+
+def exact_scan(by_location, location, description, threshold):
+    grams = shingles(description)
+    matches = []
+    for issue_id, other in by_location.get(normalize_location(location), {}).items():
+        shared = len(grams & other)
+        similarity = shared / (len(grams) + len(other) - shared)
+        if similarity >= threshold:
+            matches.append((issue_id, similarity))
+    matches.sort(key=lambda match: (-match[1], match[0]))
+    return matches[:3]
+
+
+def report(name, timings):
+    timings = sorted(timings)
+    p = lambda q: timings[int(q * (len(timings) - 1))] * 1e6
+    print(f"  {name:<12} p50 {p(0.5):8.1f}us   p99 {p(0.99):8.1f}us   mean {statistics.mean(timings) * 1e6:8.1f}us")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--issues", type=int, default=50000)
+    parser.add_argument("--locations", type=int, default=200)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    locations = [f"Block {chr(65 + i % 26)}, Room {100 + i}" for i in range(args.locations)]
+    issues = [(issue_id, rng.choice(locations), make_issue(rng)) for issue_id in range(1, args.issues + 1)]
+
+    index = DuplicateIndex()
+    start = time.perf_counter()
+    by_location = {}
+    for issue_id, location, description in issues:
+        index.add(issue_id, location, description)
+        by_location.setdefault(normalize_location(location), {})[issue_id] = shingles(description)
+    build = time.perf_counter() - start
+    print(f"{args.issues} open issues over {args.locations} locations, index built in {build:.2f}s "
+          f"({build / args.issues * 1e6:.0f}us per issue)")
+
+    queries = []
+    for _ in range(args.queries):
+        _, location, description = rng.choice(issues)
+        queries.append((location.upper() + " ", perturb(rng, description)))
+
+    lsh_timings, scan_timings = [], []
+    found = agreed = 0
+    for location, description in queries:
+        start = time.perf_counter()
+        lsh = index.find(location, description)
+        lsh_timings.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        exact = exact_scan(by_location, location, description, index.threshold)
+        scan_timings.append(time.perf_counter() - start)
+
+        found += bool(exact)
+        agreed += bool(exact) and bool(lsh) and lsh[0][1] == exact[0][1]
+
+    print(f"{args.queries} lookups of reworded existing issues")
+    report("index", lsh_timings)
+    report("exact scan", scan_timings)
+    print(f"  The index found the best match for {agreed}/{found} queries that have one")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Benchmark for the priority escalation pass.
+
+Times a full pass of escalation.py over every issue, once per --batch-sizes
+entry, reporting the total time and the slowest batch (how long a batch holds
+the write lock). Each pass runs in a transaction that is rolled back, so every
+size sees the same rows and the database is left unchanged:
+
+    cd Backend
+    DATABASE_URL=sqlite:///./bench.db python -m benchmarks.generate --issues 1000000
+    DATABASE_URL=sqlite:///./bench.db python -m benchmarks.escalation --batch-sizes 1000,10000,100000
+
+The job itself commits after each batch, which adds one commit per batch.
+"""
+import argparse
+import time
+from datetime import datetime
+
+from sqlalchemy import func, select
+
+from escalation import escalation_update
+from migrations import migrate
+from models import Issue, engine
+
+
+def run_pass(batch_size: int) -> dict:
+    now = datetime.utcnow()
+    batch_times, escalated = [], 0
+    with engine.connect() as conn:
+        first_id, last_id = conn.execute(select(func.min(Issue.id), func.max(Issue.id))).one()
+        if first_id is None:
+            raise SystemExit("No issues; run benchmarks.generate first")
+        start = time.perf_counter()
+        for low in range(first_id, last_id + 1, batch_size):
+            batch_start = time.perf_counter()
+            escalated += conn.execute(escalation_update(engine.dialect.name, low, low + batch_size - 1, now)).rowcount
+            batch_times.append(time.perf_counter() - batch_start)
+        elapsed = time.perf_counter() - start
+        conn.rollback()
+    return {
+        "rows": last_id - first_id + 1,
+        "escalated": escalated,
+        "seconds": elapsed,
+        "batches": len(batch_times),
+        "max_batch_ms": max(batch_times) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-sizes", default="1000,10000,100000")
+    args = parser.parse_args()
+
+    migrate(engine)
+    print(f"Escalation pass over {engine.url.render_as_string()}")
+    for batch_size in (int(size) for size in args.batch_sizes.split(",")):
+        result = run_pass(batch_size)
+        print(f"  batch {batch_size:>7}: {result['seconds']:6.2f}s for {result['rows']:,} ids "
+              f"({result['rows'] / result['seconds']:,.0f} rows/s), {result['escalated']:,} escalated, "
+              f"{result['batches']} batches, slowest {result['max_batch_ms']:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+"""
+Synthetic data generator for load tests.
+
+Bulk-loads realistic issues and safety reports: descriptions built from the
+categorization taxonomy's vocabulary (so categories and priorities come out the
+way the app would assign them), a few hundred campus locations with a long tail,
+statuses that age from pending to resolved, heavy-tailed upvote counts, and
+creation times spread over --days in id order, as they would be in production.
+
+    cd Backend
+    python -m benchmarks.generate --issues 1000000 --reports 100000
+    DATABASE_URL=postgresql://localhost/campusfix_bench python -m benchmarks.generate --issues 5000000
+
+Rows are appended; point DATABASE_URL at a scratch database. The same --seed
+always produces the same rows.
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, select, text
+
+from categorization import categorizer
+from migrations import migrate
+from models import Issue, SafetyReport, engine
+
+BUILDINGS = [
+    "Library", "Main Block", "Science Block", "Engineering Block", "Admin Building",
+    "Hostel A", "Hostel B", "Hostel C", "Girls Hostel", "Sports Complex", "Cafeteria",
+    "Auditorium", "Lecture Hall Complex", "Medical Centre", "Workshop", "Parking Lot",
+]
+SPOTS = ["Room {n}", "Lab {n}", "Floor {n}", "Washroom, Floor {n}", "Corridor {n}", "Wing {n}"]
+
+ISSUE_PROBLEMS = [
+    "Ceiling fan not working", "Tube light flickering", "Power socket sparks when used",
+    "No power in the room", "AC is leaking water", "Switch board is broken",
+    "Water leak under the sink", "Tap keeps running", "Toilet flush is broken",
+    "Drain is blocked", "Water cooler not cooling", "Shower has no water",
+    "Projector shows no signal", "Wifi keeps disconnecting", "Printer is jammed",
+    "Computer does not boot", "Speaker crackles during lectures",
+    "Crack in the ceiling", "Loose tile on the stairs", "Railing is wobbly",
+    "Plaster falling from the wall", "Pothole near the entrance",
+    "Broken chair", "Desk is wobbly", "Door lock is stuck", "Window does not close",
+    "Garbage not collected", "Room needs cleaning", "Bad smell in the corridor",
+    "Exposed wire hanging from the ceiling", "Burning smell near the panel",
+    "Water flooding the corridor",
+]
+DETAILS = [
+    "", "", "", " since yesterday", " for a week now", " again", " - please fix soon",
+    " and it is getting worse", ", reported before", " during the evening",
+]
+
+SAFETY_PROBLEMS = [
+    "Street light out on the path", "Someone following students", "Broken gate lock",
+    "Harassment near the bus stop", "Unlit stretch behind the building", "Stray dogs chasing people",
+    "Suspicious person loitering", "Drunk group near the hostel", "CCTV camera not working",
+    "Emergency phone not working",
+]
+
+FIRST_NAMES = ["Aarav", "Diya", "Ishaan", "Meera", "Rohan", "Sara", "Kabir", "Anaya", "Vivaan", "Zoya"]
+LAST_NAMES = ["Sharma", "Patel", "Iyer", "Khan", "Das", "Reddy", "Singh", "Mehta", "Nair", "Gupta"]
+
+
+def _locations(rng: random.Random, count: int) -> list:
+    locations = set()
+    while len(locations) < count:
+        spot = rng.choice(SPOTS).format(n=rng.randint(1, 30))
+        locations.add(f"{rng.choice(BUILDINGS)} - {spot}")
+    return sorted(locations)
+
+
+def _timestamps(rng: random.Random, count: int, days: int):
+    """`count` ascending timestamps over the last `days` days."""
+    start = datetime.utcnow() - timedelta(days=days)
+    step = days * 86400 / max(count, 1)
+    for i in range(count):
+        yield start + timedelta(seconds=i * step + rng.random() * step)
+
+
+def _issue_rows(rng: random.Random, count: int, days: int, locations: list, users: int):
+    for created_at in _timestamps(rng, count, days):
+        description = rng.choice(ISSUE_PROBLEMS) + rng.choice(DETAILS)
+        category, priority = categorizer.classify(description)
+        age_days = (datetime.utcnow() - created_at).days
+        # Older issues are more likely to have been dealt with
+        roll = rng.random() * (1 + age_days / 30)
+        status = "pending" if roll < 0.6 else "in_progress" if roll < 1.0 else "resolved"
+        user = rng.randrange(users)
+        has_image = rng.random() < 0.25
+        sha256 = f"{rng.getrandbits(256):064x}" if has_image else None
+        yield {
+            "description": description,
+            # Pareto: most locations see few issues, a handful see many
+            "location": locations[min(int(rng.paretovariate(1.2)) - 1, len(locations) - 1)],
+            "status": status,
+            "category": category,
+            "priority": priority,
+            "upvotes": min(int(rng.paretovariate(1.5)) - 1, 500),
+            "user_id": f"synthetic-{user}",
+            "reporter_name": f"{FIRST_NAMES[user % 10]} {LAST_NAMES[user // 10 % 10]}",
+            "reporter_email": f"user{user}@campus.example",
+            "image_url": f"https://storage.example/issue-images/{sha256}.jpg" if has_image else None,
+            "thumbnail_url": f"https://storage.example/issue-images/{sha256}_thumb.webp" if has_image else None,
+            "medium_url": f"https://storage.example/issue-images/{sha256}_medium.webp" if has_image else None,
+            "image_status": "uploaded" if has_image else None,
+            "image_sha256": sha256,
+            "created_at": created_at,
+            "updated_at": created_at if status == "pending" else created_at + timedelta(hours=rng.randint(1, 240)),
+        }
+
+
+def _report_rows(rng: random.Random, count: int, days: int, locations: list):
+    for created_at in _timestamps(rng, count, days):
+        has_media = rng.random() < 0.2
+        sha256 = f"{rng.getrandbits(256):064x}" if has_media else None
+        status = rng.choices(["received", "investigating", "resolved"], weights=[5, 2, 3])[0]
+        yield {
+            "description": rng.choice(SAFETY_PROBLEMS) + rng.choice(DETAILS),
+            "location": rng.choice(locations),
+            "media_url": f"https://storage.example/safety-reports/{sha256}.jpg" if has_media else None,
+            "thumbnail_url": f"https://storage.example/safety-reports/{sha256}_thumb.webp" if has_media else None,
+            "medium_url": f"https://storage.example/safety-reports/{sha256}_medium.webp" if has_media else None,
+            "media_sha256": sha256,
+            "is_nsfw": 1 if has_media and rng.random() < 0.02 else 0,
+            "status": status,
+            "is_critical": 1,
+            "created_at": created_at,
+            "updated_at": created_at if status == "received" else created_at + timedelta(hours=rng.randint(1, 72)),
+        }
+
+
+def load(table, rows, total: int, batch_size: int):
+    start = time.perf_counter()
+    batch, done = [], 0
+    for row in rows:
+        batch.append(row)
+        if len(batch) == batch_size:
+            with engine.begin() as conn:
+                conn.execute(table.insert(), batch)
+            done += len(batch)
+            batch = []
+            print(f"\r  {table.name}: {done}/{total} ({done / (time.perf_counter() - start):,.0f} rows/s)", end="", flush=True)
+    if batch:
+        with engine.begin() as conn:
+            conn.execute(table.insert(), batch)
+        done += len(batch)
+    print(f"\r  {table.name}: {done}/{total} in {time.perf_counter() - start:.1f}s" + " " * 20)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--issues", type=int, default=100_000)
+    parser.add_argument("--reports", type=int, default=10_000)
+    parser.add_argument("--users", type=int, default=5_000)
+    parser.add_argument("--locations", type=int, default=400)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    migrate(engine)
+    if engine.dialect.name == "sqlite":
+        # Fewer fsyncs per committed batch (the setting persists in the file)
+        with engine.connect() as conn:
+            conn.exec_driver_sql("PRAGMA journal_mode=WAL")
+
+    rng = random.Random(args.seed)
+    locations = _locations(rng, args.locations)
+    print(f"Loading {args.issues} issues and {args.reports} safety reports into {engine.url.render_as_string()}")
+    load(Issue.__table__, _issue_rows(rng, args.issues, args.days, locations, args.users), args.issues, args.batch_size)
+    load(SafetyReport.__table__, _report_rows(rng, args.reports, args.days, locations), args.reports, args.batch_size)
+
+    with engine.begin() as conn:
+        # Fresh planner statistics, so benchmarks see the plans production would
+        conn.execute(text("ANALYZE"))
+        issues = conn.scalar(select(func.count(Issue.id)))
+        reports = conn.scalar(select(func.count(SafetyReport.id)))
+    print(f"Done: {issues} issues, {reports} safety reports in total")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+"""
+HTTP load test against a running server.
+
+Drives each scenario with --requests requests from --concurrency concurrent
+clients and reports latency percentiles (p50/p95/p99) and throughput per
+endpoint. Results are written as JSON so runs can be compared:
+
+    cd Backend
+    python -m benchmarks.generate --issues 1000000
+    uvicorn main:app --port 8000 --workers 4          # in another shell
+    python -m benchmarks.load --url http://127.0.0.1:8000 --output before.json
+    ... change something, restart the server ...
+    python -m benchmarks.load --output after.json --compare before.json
+
+Scenarios: issues, search, analytics, community, upvote, create, upload
+(default: all). Signed-in scenarios use session cookies minted with
+SECRET_KEY, so the server must run with the same SECRET_KEY as this script.
+--compare exits with status 1 if any p95 got more than --tolerance percent worse.
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import random
+import subprocess
+import time
+from base64 import b64encode
+from datetime import datetime, timezone
+
+import httpx
+from itsdangerous import TimestampSigner
+from PIL import Image
+
+SECRET_KEY = os.getenv("SECRET_KEY", "super-secret-key")
+SEARCH_TERMS = ["fan", "leak", "projector", "wifi", "ceiling", "light", "chair", "hostel", "library"]
+
+
+def session_cookie(user: dict) -> str:
+    """A session cookie as Starlette's SessionMiddleware would sign it."""
+    data = b64encode(json.dumps({"user": user}).encode())
+    return TimestampSigner(SECRET_KEY).sign(data).decode()
+
+
+def user_cookies(n: int) -> dict:
+    return {"session": session_cookie({"sub": f"loadtest-{n}", "email": f"loadtest{n}@campus.example", "name": f"Load Test {n}"})}
+
+
+def jpeg(rng: random.Random) -> bytes:
+    # Noise, so every upload has a new hash and takes the full (non-deduplicated) path
+    image = Image.frombytes("RGB", (320, 240), rng.randbytes(320 * 240 * 3))
+    buffer = io.BytesIO()
+    image.save(buffer, "JPEG", quality=80)
+    return buffer.getvalue()
+
+
+class Scenarios:
+    def __init__(self, client: httpx.AsyncClient, seed: int):
+        self.client = client
+        self.rng = random.Random(seed)
+        self.cookies = user_cookies(0)
+        self.max_issue_id = 1
+        self.next_user = 1
+
+    async def setup(self):
+        page = (await self.client.get("/issues", params={"limit": 1, "fields": "id"}, cookies=self.cookies)).json()
+        if page.get("items"):
+            self.max_issue_id = page["items"][0]["id"]
+
+    async def issues(self):
+        return await self.client.get("/issues", params={"limit": 50}, cookies=self.cookies)
+
+    async def search(self):
+        return await self.client.get("/issues/search", params={"q": self.rng.choice(SEARCH_TERMS)}, cookies=self.cookies)
+
+    async def analytics(self):
+        return await self.client.get("/analytics", cookies=self.cookies)
+
+    async def community(self):
+        return await self.client.get("/safety/community")
+
+    async def upvote(self):
+        # A new voter each time, so every request records a vote
+        self.next_user += 1
+        issue_id = self.rng.randint(1, self.max_issue_id)
+        return await self.client.post(f"/issues/{issue_id}/upvote", cookies=user_cookies(self.next_user))
+
+    async def create(self):
+        data = {
+            "description": f"Load test issue {self.rng.getrandbits(48):x}",
+            "location": f"Load Test Block {self.rng.randint(1, 50)}",
+            "on_duplicate": "create",
+        }
+        return await self.client.post("/issues", data=data, cookies=self.cookies)
+
+    async def upload(self):
+        data = {"description": "Load test report", "location": f"Load Test Gate {self.rng.randint(1, 10)}"}
+        files = {"media": ("photo.jpg", jpeg(self.rng), "image/jpeg")}
+        return await self.client.post("/safety/reports", data=data, files=files)
+
+
+ALL_SCENARIOS = ("issues", "search", "analytics", "community", "upvote", "create", "upload")
+
+
+def percentile(sorted_values: list, p: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(p / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+async def run_scenario(request, requests: int, concurrency: int) -> dict:
+    latencies, statuses, errors = [], {}, 0
+    queue = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for _ in queue:
+            start = time.perf_counter()
+            try:
+                response = await request()
+                status = str(response.status_code)
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            latencies.append((time.perf_counter() - start) * 1000)
+            statuses[status] = statuses.get(status, 0) + 1
+            if not status.startswith("2"):
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "requests": requests,
+        "errors": errors,
+        "statuses": statuses,
+        "throughput_rps": round(requests / elapsed, 1),
+        "latency_ms": {
+            "mean": round(sum(latencies) / len(latencies), 2),
+            "p50": round(percentile(latencies, 50), 2),
+            "p95": round(percentile(latencies, 95), 2),
+            "p99": round(percentile(latencies, 99), 2),
+            "max": round(latencies[-1], 2),
+        },
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return ""
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> bool:
+    """Print p95 changes against `baseline`; returns False if any got worse by more than `tolerance` percent."""
+    ok = True
+    print(f"\nvs {baseline.get('commit') or 'baseline'} ({baseline.get('started_at')}):")
+    for name, result in results["scenarios"].items():
+        before = baseline.get("scenarios", {}).get(name)
+        if not before:
+            continue
+        old, new = before["latency_ms"]["p95"], result["latency_ms"]["p95"]
+        change = (new - old) / old * 100 if old else 0.0
+        flag = ""
+        if change > tolerance:
+            flag, ok = "  REGRESSION", False
+        print(f"  {name:10s} p95 {old:8.1f} -> {new:8.1f} ms ({change:+6.1f}%){flag}")
+    return ok
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--scenarios", default=",".join(ALL_SCENARIOS))
+    parser.add_argument("--requests", type=int, default=500, help="per scenario")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=20, help="unrecorded requests per scenario")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--compare", help="results JSON of an earlier run")
+    parser.add_argument("--tolerance", type=float, default=10.0, help="allowed p95 regression, percent")
+    args = parser.parse_args()
+
+    names = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = [name for name in names if name not in ALL_SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenario(s): {', '.join(unknown)}")
+
+    results = {
+        "started_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "url": args.url,
+        "concurrency": args.concurrency,
+        "scenarios": {},
+    }
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=60) as client:
+        scenarios = Scenarios(client, args.seed)
+        await scenarios.setup()
+        print(f"{args.url}: {args.requests} requests per scenario, concurrency {args.concurrency}")
+        for name in names:
+            request = getattr(scenarios, name)
+            if args.warmup:
+                await run_scenario(request, args.warmup, min(args.concurrency, args.warmup))
+            result = await run_scenario(request, args.requests, args.concurrency)
+            results["scenarios"][name] = result
+            latency = result["latency_ms"]
+            print(f"  {name:10s} {result['throughput_rps']:8.1f} req/s   p50 {latency['p50']:8.1f}   "
+                  f"p95 {latency['p95']:8.1f}   p99 {latency['p99']:8.1f} ms   errors {result['errors']}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+    if args.compare:
+        with open(args.compare) as f:
+            if not compare(results, json.load(f), args.tolerance):
+                return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(asyncio.run(main()))
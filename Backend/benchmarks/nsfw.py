@@ -0,0 +1,68 @@
+"""
+Benchmark for the NSFW check: full-resolution inline parse (the old path) versus
+the downscaled process-pool path in moderation.py, over a folder of images.
+
+    cd Backend
+    python -m benchmarks.nsfw static/uploads --skip-full-res
+
+Needs the `nude` module (nudepy) and Pillow.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+import moderation
+
+
+def full_res(path: str) -> bool:
+    # What create_safety_report used to do, inline on the event loop
+    return bool(moderation.Nude(path).parse().result)
+
+
+async def pooled(paths):
+    moderation.start_moderation_pool()
+    try:
+        # Warm the pool so worker start-up is not counted
+        await moderation.classify(paths[0])
+        start = time.perf_counter()
+        results = await asyncio.gather(*(moderation.classify(p) for p in paths))
+        return time.perf_counter() - start, results
+    finally:
+        moderation.stop_moderation_pool()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("folder", nargs="?", default="static/uploads")
+    parser.add_argument("--skip-full-res", action="store_true", help="full-resolution parsing can take minutes")
+    args = parser.parse_args()
+
+    if not moderation.classifier_available():
+        sys.exit("The nude module (nudepy) is not installed")
+
+    paths = sorted(
+        os.path.join(args.folder, name) for name in os.listdir(args.folder)
+        if name.lower().endswith((".jpg", ".jpeg", ".png", ".webp"))
+    )
+    print(f"{len(paths)} images from {args.folder}")
+
+    if not args.skip_full_res:
+        timings = []
+        for path in paths:
+            start = time.perf_counter()
+            full_res(path)
+            timings.append(time.perf_counter() - start)
+        print(f"  full-res inline   total {sum(timings):8.2f}s   median {statistics.median(timings):6.2f}s"
+              f"   max loop block {max(timings):6.2f}s")
+
+    elapsed, results = asyncio.run(pooled(paths))
+    timeouts = sum(1 for r in results if r is None)
+    print(f"  pooled {moderation.NSFW_THUMBNAIL_SIZE}px       total {elapsed:8.2f}s"
+          f"   ({moderation.NSFW_WORKERS} workers, {timeouts} timed out / failed; loop never blocked)")
+
+
+if __name__ == "__main__":
+    main()
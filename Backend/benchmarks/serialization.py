@@ -0,0 +1,71 @@
+"""
+Before/after benchmark for list serialization.
+
+Loads N issues and encodes them to JSON bytes two ways:
+  before: ORM entities -> IssueResponse validation -> jsonable_encoder -> json.dumps
+          (what FastAPI did for response_model=IssuePage)
+  after:  projected row tuples -> dicts -> orjson (projection.py)
+and reports the fetch and encode time of each, best of --repeat runs.
+
+    cd Backend
+    python -m benchmarks.serialization --rows 10000
+
+Uses DATABASE_URL like the app.
+"""
+import argparse
+import asyncio
+import json
+import time
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import select
+
+from benchmarks.async_db import seed
+from main import IssueResponse, ISSUE_FIELDS
+from models import AsyncSessionLocal, Issue, async_engine
+from projection import project, to_dicts
+
+
+async def before(rows: int):
+    async with AsyncSessionLocal() as db:
+        start = time.perf_counter()
+        issues = (await db.execute(select(Issue).order_by(Issue.id).limit(rows))).scalars().all()
+        fetched = time.perf_counter()
+        items = [IssueResponse.model_validate(issue) for issue in issues]
+        body = json.dumps(jsonable_encoder({"items": items}), ensure_ascii=False).encode()
+        return fetched - start, time.perf_counter() - fetched, len(body)
+
+
+async def after(rows: int, fields: tuple = ISSUE_FIELDS):
+    async with AsyncSessionLocal() as db:
+        start = time.perf_counter()
+        result = (await db.execute(project(Issue, fields).order_by(Issue.id).limit(rows))).all()
+        fetched = time.perf_counter()
+        body = orjson.dumps({"items": to_dicts(result, fields)})
+        return fetched - start, time.perf_counter() - fetched, len(body)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    seed(args.rows)
+    print(f"{args.rows} issues, best of {args.repeat}")
+    for name, run in (
+        ("ORM + Pydantic (before)", lambda: before(args.rows)),
+        ("projection + orjson (after)", lambda: after(args.rows)),
+        ("  ?fields=id,status,upvotes", lambda: after(args.rows, ("id", "status", "upvotes"))),
+    ):
+        results = [await run() for _ in range(args.repeat)]
+        fetch = min(r[0] for r in results) * 1000
+        encode = min(r[1] for r in results) * 1000
+        print(f"  {name:30s} fetch {fetch:8.1f} ms   encode {encode:8.1f} ms   total {fetch + encode:8.1f} ms"
+              f"   {results[0][2] / 1024:8.0f} KiB")
+    await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
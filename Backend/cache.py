@@ -0,0 +1,45 @@
+import asyncio
+import time
+from typing import Awaitable, Callable, Optional
+
+# --- In-process response cache ---
+# Holds one value for up to `ttl` seconds. The value is rebuilt by at most one
+# task at a time: requests arriving during a rebuild wait for it instead of
+# each querying the database (single flight). invalidate() drops the value
+# immediately, and a rebuild that was already running when it was called is
+# not cached, because it may have read the old data.
+
+
+class SingleFlightCache:
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._value = None
+        self._expires_at = 0.0
+        self._generation = 0
+        self._building: Optional[asyncio.Task] = None
+
+    def invalidate(self):
+        self._generation += 1
+        self._value = None
+        # Later callers start a fresh build; whoever awaits the old one still gets its result
+        self._building = None
+
+    async def get(self, build: Callable[[], Awaitable]):
+        if self._value is not None and time.monotonic() < self._expires_at:
+            return self._value
+
+        if self._building is None:
+            self._building = asyncio.create_task(self._build(build, self._generation))
+        # Shielded: a client disconnecting must not cancel the build the others are waiting on
+        return await asyncio.shield(self._building)
+
+    async def _build(self, build, generation: int):
+        try:
+            value = await build()
+            if generation == self._generation:
+                self._value = value
+                self._expires_at = time.monotonic() + self.ttl
+            return value
+        finally:
+            if generation == self._generation:
+                self._building = None
@@ -0,0 +1,82 @@
+import json
+import os
+import re
+
+# --- Issue auto-categorization ---
+# The taxonomy lives in categories.json (override with CATEGORIES_CONFIG) and is
+# compiled once into a single word-boundary regex, so a description is scanned
+# in one pass however many keywords there are. A keyword also matches its
+# plural ("wire" matches "wires" but not "wireless" or "wired"); any other form
+# counts only if its category lists it under "forms", as "cracked" is for
+# "crack". Guessing at suffixes turned "rates" into "rat" and "fired" into "fire".
+
+CATEGORIES_CONFIG = os.getenv(
+    "CATEGORIES_CONFIG", os.path.join(os.path.dirname(os.path.abspath(__file__)), "categories.json")
+)
+
+PRIORITY_RANK = {"low": 0, "medium": 1, "high": 2}
+
+
+def _normalize(keyword: str) -> str:
+    return " ".join(keyword.lower().split())
+
+
+def plural(keyword: str) -> str:
+    """Regular English plural of the keyword's last word ("gas leak" -> "gas leaks")."""
+    if keyword.endswith(("s", "x", "z", "ch", "sh")):
+        return keyword + "es"
+    return keyword + "s"
+
+
+class Categorizer:
+    def __init__(self, config: dict):
+        self.default_category = config["default"]["category"]
+        self.default_priority = config["default"]["priority"]
+        # Config order is precedence order when two categories match equally often
+        self.precedence = {}
+        self.priorities = {}
+        self.keyword_category = {}
+        self.base_keyword = {}  # every matched form -> the keyword it is a form of
+        for index, category in enumerate(config["categories"]):
+            self.precedence[category["name"]] = index
+            self.priorities[category["name"]] = category["priority"]
+            forms = {_normalize(k): v for k, v in category.get("forms", {}).items()}
+            for keyword in map(_normalize, category["keywords"]):
+                # setdefault: a keyword or form listed outright wins over a generated plural
+                self.base_keyword.setdefault(plural(keyword), keyword)
+                self.base_keyword[keyword] = keyword
+                for form in forms.get(keyword, ()):
+                    self.base_keyword[_normalize(form)] = keyword
+                self.keyword_category[keyword] = category["name"]
+
+        # Longest first, so "gas leak" wins over "gas" at the same position
+        matched = sorted(self.base_keyword, key=len, reverse=True)
+        alternation = "|".join(r"\s+".join(map(re.escape, k.split())) for k in matched)
+        self.pattern = re.compile(rf"\b({alternation})\b")
+
+    def keywords(self, text: str) -> list:
+        """Taxonomy keywords mentioned in `text`, in order, each in its listed form ("leaking" -> "leak")."""
+        return [self.base_keyword[_normalize(match.group(1))] for match in self.pattern.finditer(text.lower())]
+
+    def classify(self, text: str):
+        """Return (category, priority) for a free-text description."""
+        hits = {}
+        for keyword in self.keywords(text):
+            category = self.keyword_category[keyword]
+            hits[category] = hits.get(category, 0) + 1
+
+        if not hits:
+            return self.default_category, self.default_priority
+
+        category = max(hits, key=lambda name: (hits[name], -self.precedence[name]))
+        # A hazard mentioned anywhere raises the priority even if another category wins
+        priority = max((self.priorities[name] for name in hits), key=PRIORITY_RANK.__getitem__)
+        return category, priority
+
+
+def load_categorizer(path: str = CATEGORIES_CONFIG) -> Categorizer:
+    with open(path, encoding="utf-8") as f:
+        return Categorizer(json.load(f))
+
+
+categorizer = load_categorizer()
@@ -0,0 +1,59 @@
+import os
+import tempfile
+
+# Before anything imports models: the engines are built from DATABASE_URL at import time
+_db_dir = tempfile.mkdtemp(prefix="campusfix-test-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_dir}/test.db"
+
+import httpx
+import pytest
+from sqlalchemy import delete
+
+import locations
+import main
+import safety
+from duplicates import duplicate_index
+from models import Base, engine
+
+# --- Shared test fixtures ---
+# Tests run against a temporary SQLite database, migrated once when main is
+# imported, and talk to the app through an httpx AsyncClient. Every table is
+# emptied after each test, along with the per-process caches that mirror it.
+# Sign a user in with the `login` fixture.
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+async def client():
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://test") as client:
+        yield client
+
+
+@pytest.fixture
+def login(monkeypatch):
+    """login(sub, admin=False) signs `sub` in for the following requests; login(None) signs out."""
+    current = {"user": None}
+
+    def sign_in(sub="student-1", admin=False):
+        current["user"] = sub and {"sub": sub, "email": f"{sub}@campus.example", "name": sub, "admin": admin}
+        return current["user"]
+
+    for module in (main, safety):
+        monkeypatch.setattr(module, "get_current_user", lambda request: current["user"])
+        monkeypatch.setattr(module, "is_admin", lambda user: bool(user and user.get("admin")))
+    return sign_in
+
+
+@pytest.fixture(autouse=True)
+def _empty_database():
+    yield
+    with engine.begin() as conn:
+        for table in reversed(Base.metadata.sorted_tables):
+            conn.execute(delete(table))
+    duplicate_index.__init__()
+    locations.location_matcher.__init__()
+    safety.community_cache.invalidate()
@@ -3,22 +3,26 @@ from dotenv import load_dotenv
 from supabase import create_client, Client
 from starlette.requests import Request
 
+from logs import get_logger
+
 # Load environment variables
 load_dotenv()
 
+logger = get_logger(__name__)
+
 # --- Supabase Setup ---
 supabase_url = os.getenv("SUPABASE_URL")
 supabase_key = os.getenv("SUPABASE_KEY")
 
 supabase = None
 if not supabase_url or not supabase_key:
-    print("WARNING: Supabase credentials not found. Image uploads will fail.")
+    logger.warning("Supabase credentials not found. Image uploads will fail.")
 else:
     try:
         supabase: Client = create_client(supabase_url, supabase_key)
-        print("SUCCESS: Supabase client initialized!")
+        logger.info("Supabase client initialized")
     except Exception as e:
-        print(f"ERROR: Failed to initialize Supabase client: {e}")
+        logger.error("Failed to initialize Supabase client", extra={"error": str(e)})
 
 # --- Auth Helpers ---
 
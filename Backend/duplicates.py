@@ -0,0 +1,203 @@
+import asyncio
+import os
+import random
+import re
+from datetime import datetime
+
+from sqlalchemy import and_, or_, select
+
+from categorization import categorizer
+from models import Issue
+from sync import capped_watermark
+
+# --- Near-duplicate detection for new issues ---
+# Open issues are held in memory as MinHash sketches over character trigrams
+# of their description, bucketed with LSH per normalized location. A lookup
+# hashes the new description once and only compares against issues that share
+# a bucket, so its cost depends on how many near-duplicates exist, not on how
+# many issues are open. Candidates are confirmed with the exact Jaccard
+# similarity of their trigram sets. Locations with only a few open issues are
+# simply scanned, and are never hashed at all.
+#
+# Reports share a lot of boilerplate ("... not working", "... is broken"), so
+# those words are dropped before shingling, and two reports that name
+# different things from the categorizer's taxonomy ("tap" vs "ceiling", "fan"
+# vs "light") are never duplicates: one's keywords must include the other's.
+#
+# Each worker process keeps its own index and catches up before every lookup
+# by reading rows written since its (updated_at, id) watermark, which also
+# drops issues that have since been resolved. Like a delta sync client, it
+# re-reads the last SYNC_OVERLAP_SECONDS each time (see sync.py), so rows
+# that commit after later-stamped ones are not skipped.
+
+DUPLICATE_THRESHOLD = float(os.getenv("DUPLICATE_THRESHOLD", "0.5"))
+DUPLICATE_MAX_RESULTS = 3
+
+# Below this many open issues at a location, comparing against all of them is
+# cheaper than hashing the query, and exact
+EXACT_SCAN_LIMIT = 50
+
+# 20 bands of 3: ~93% of pairs at similarity 0.5 share a bucket, ~99% at 0.6
+NUM_BANDS = 20
+ROWS_PER_BAND = 3
+
+# str hashes are already well mixed (SipHash), so XOR with a random mask acts as
+# a random permutation. Each band keys on the 3 smallest permuted hashes (a
+# bottom-k sketch), which matches between two sets with about the same
+# probability as 3 independent min-hashes at a third of the hashing cost.
+_rng = random.Random(20240917)
+_MASKS = [_rng.getrandbits(63) for _ in range(NUM_BANDS)]
+
+_WORD = re.compile(r"[a-z0-9]+")
+_STOPWORDS = {
+    "a", "an", "and", "are", "at", "for", "from", "has", "have", "in", "is", "it", "near",
+    "of", "on", "please", "the", "there", "this", "to", "very", "was", "with",
+    # Boilerplate that says nothing about what is wrong
+    "broken", "doesn", "fix", "isn", "issue", "not", "problem", "t", "work", "working", "works",
+}
+
+
+def normalize_location(location: str) -> str:
+    """'Block A, Room 101 ' and 'block a room 101' index to the same place."""
+    return " ".join(_WORD.findall(location.lower()))
+
+
+def shingles(text: str) -> frozenset:
+    words = " ".join(w for w in _WORD.findall(text.lower()) if w not in _STOPWORDS)
+    if len(words) < 3:
+        return frozenset([words]) if words else frozenset()
+    return frozenset(words[i:i + 3] for i in range(len(words) - 2))
+
+
+def _keywords(text: str) -> frozenset:
+    return frozenset(categorizer.keywords(text))
+
+
+def _band_keys(location: str, grams: frozenset) -> list:
+    hashes = [hash(gram) for gram in grams]
+    return [
+        (location, band, tuple(sorted(map(mask.__xor__, hashes))[:ROWS_PER_BAND]))
+        for band, mask in enumerate(_MASKS)
+    ]
+
+
+class DuplicateIndex:
+    def __init__(self, threshold: float = DUPLICATE_THRESHOLD):
+        self.threshold = threshold
+        self._entries = {}    # issue id -> (location, trigrams, taxonomy keywords)
+        self._locations = {}  # location -> set of issue ids
+        self._buckets = {}    # band key -> set of issue ids
+        self._band_keys = {}  # issue id -> its band keys, only at busy locations
+        self._watermark = None
+        self._lock = asyncio.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def add(self, issue_id: int, location: str, description: str):
+        self.remove(issue_id)
+        grams = shingles(description)
+        if not grams:
+            return
+        location = normalize_location(location)
+        ids = self._locations.setdefault(location, set())
+        ids.add(issue_id)
+        self._entries[issue_id] = (location, grams, _keywords(description))
+
+        # Quiet locations are scanned, so LSH hashing is only paid where it is used
+        if len(ids) == EXACT_SCAN_LIMIT + 1:
+            for other_id in ids:
+                if other_id not in self._band_keys:
+                    self._hash(other_id)
+        elif len(ids) > EXACT_SCAN_LIMIT:
+            self._hash(issue_id)
+
+    def _hash(self, issue_id: int):
+        location, grams, _ = self._entries[issue_id]
+        keys = _band_keys(location, grams)
+        for key in keys:
+            self._buckets.setdefault(key, set()).add(issue_id)
+        self._band_keys[issue_id] = keys
+
+    def remove(self, issue_id: int):
+        entry = self._entries.pop(issue_id, None)
+        if entry is None:
+            return
+        keys = self._band_keys.pop(issue_id, ())
+        for bucket_map, key in [(self._locations, entry[0]), *((self._buckets, key) for key in keys)]:
+            bucket = bucket_map[key]
+            bucket.discard(issue_id)
+            if not bucket:
+                del bucket_map[key]
+
+    def find(self, location: str, description: str, limit: int = DUPLICATE_MAX_RESULTS) -> list:
+        """Open issues at `location` similar to `description`, as [(issue_id, similarity)], best first."""
+        grams = shingles(description)
+        if not grams:
+            return []
+        keywords = _keywords(description)
+        location = normalize_location(location)
+        candidates = self._locations.get(location, set())
+        if len(candidates) > EXACT_SCAN_LIMIT:
+            candidates = set()
+            for key in _band_keys(location, grams):
+                candidates |= self._buckets.get(key, set())
+
+        matches = []
+        for issue_id in candidates:
+            _, other, other_keywords = self._entries[issue_id]
+            if not (keywords <= other_keywords or other_keywords <= keywords):
+                continue
+            shared = len(grams & other)
+            similarity = shared / (len(grams) + len(other) - shared)
+            if similarity >= self.threshold:
+                matches.append((issue_id, similarity))
+        matches.sort(key=lambda match: (-match[1], match[0]))
+        return matches[:limit]
+
+    async def refresh(self, db):
+        """Apply every issue written since the last refresh (or load all open issues the first time)."""
+        async with self._lock:
+            if self._watermark is None:
+                await self._load(db)
+                return
+            while True:
+                updated_at, row_id = self._watermark
+                rows = (await db.execute(
+                    select(Issue.id, Issue.location, Issue.description, Issue.status, Issue.updated_at)
+                    .where(or_(
+                        Issue.updated_at > updated_at,
+                        and_(Issue.updated_at == updated_at, Issue.id > row_id),
+                    ))
+                    .order_by(Issue.updated_at, Issue.id)
+                    .limit(1000)
+                )).all()
+                for row in rows:
+                    if row.status != "resolved":
+                        self.add(row.id, row.location, row.description)
+                    else:
+                        self.remove(row.id)
+                if rows:
+                    self._watermark = (rows[-1].updated_at, rows[-1].id)
+                if len(rows) < 1000:
+                    self._watermark = capped_watermark(*self._watermark)
+                    return
+
+    async def _load(self, db):
+        # Take the watermark first: rows written during the load are simply seen again next time
+        head = (await db.execute(
+            select(Issue.updated_at, Issue.id)
+            .where(Issue.updated_at.isnot(None))
+            .order_by(Issue.updated_at.desc(), Issue.id.desc())
+            .limit(1)
+        )).first()
+        rows = await db.execute(
+            select(Issue.id, Issue.location, Issue.description)
+            .where(Issue.status != "resolved")
+        )
+        for row in rows:
+            self.add(row.id, row.location, row.description)
+        self._watermark = capped_watermark(head.updated_at, head.id) if head else (datetime.min, 0)
+
+
+duplicate_index = DuplicateIndex()
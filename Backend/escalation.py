@@ -0,0 +1,81 @@
+import os
+import time
+from datetime import datetime
+
+from sqlalchemy import DateTime, and_, case, func, literal, or_, select, update
+
+from logs import get_logger
+from models import Issue, async_engine
+
+# --- Priority auto-escalation ---
+# Issues that stay open and keep collecting upvotes move up in priority. Each
+# open issue gets a score:
+#     upvotes * UPVOTE_WEIGHT + days open * AGE_WEIGHT + SAFETY_WEIGHT if it is a safety hazard
+# and is raised to "medium" at MEDIUM_SCORE and to "high" at HIGH_SCORE.
+# Priorities only ever go up: the priority the categorizer gave an issue is
+# a floor, and an admin can still lower one by hand. The pass is a single
+# UPDATE per range of ESCALATION_BATCH_SIZE ids, each in its own short
+# transaction, so it never holds the write lock for long. The FastAPI
+# lifespan runs it every ESCALATION_INTERVAL_SECONDS on one worker (jobs.py).
+
+ESCALATION_INTERVAL_SECONDS = float(os.getenv("ESCALATION_INTERVAL_SECONDS", "300"))
+ESCALATION_LEASE_SECONDS = float(os.getenv("ESCALATION_LEASE_SECONDS", "900"))
+ESCALATION_BATCH_SIZE = int(os.getenv("ESCALATION_BATCH_SIZE", "10000"))
+
+UPVOTE_WEIGHT = float(os.getenv("ESCALATION_UPVOTE_WEIGHT", "1"))
+AGE_WEIGHT = float(os.getenv("ESCALATION_AGE_WEIGHT", "0.1"))  # Per day open
+SAFETY_WEIGHT = float(os.getenv("ESCALATION_SAFETY_WEIGHT", "10"))
+MEDIUM_SCORE = float(os.getenv("ESCALATION_MEDIUM_SCORE", "5"))
+HIGH_SCORE = float(os.getenv("ESCALATION_HIGH_SCORE", "15"))
+
+logger = get_logger(__name__)
+
+
+def _days_open(dialect: str, now: datetime):
+    now = literal(now, DateTime)
+    if dialect == "postgresql":
+        return func.extract("epoch", now - Issue.created_at) / 86400
+    return func.julianday(now) - func.julianday(Issue.created_at)
+
+
+def _score(dialect: str, now: datetime):
+    return (
+        func.coalesce(Issue.upvotes, 0) * UPVOTE_WEIGHT
+        + _days_open(dialect, now) * AGE_WEIGHT
+        + case((Issue.category == "safety_hazard", SAFETY_WEIGHT), else_=0)
+    )
+
+
+def escalation_update(dialect: str, first_id: int, last_id: int, now: datetime):
+    """The UPDATE that escalates open issues with ids in [first_id, last_id], scored as of `now`."""
+    score = _score(dialect, now)
+    # updated_at is left to the column's onupdate, which stamps each batch as it runs: stamping
+    # every batch with `now` would date later batches before rows that sync clients already have
+    return update(Issue)\
+        .where(
+            Issue.id.between(first_id, last_id),
+            Issue.status.is_distinct_from("resolved"),
+            or_(
+                and_(Issue.priority.is_distinct_from("high"), score >= HIGH_SCORE),
+                and_(or_(Issue.priority.is_(None), Issue.priority == "low"), score >= MEDIUM_SCORE),
+            ),
+        )\
+        .values(priority=case((score >= HIGH_SCORE, "high"), else_="medium"))
+
+
+async def escalate(engine=async_engine, batch_size: int = ESCALATION_BATCH_SIZE) -> int:
+    """One pass over every issue; returns how many were escalated."""
+    start = time.perf_counter()
+    now = datetime.utcnow()
+    async with engine.connect() as conn:
+        first_id, last_id = (await conn.execute(select(func.min(Issue.id), func.max(Issue.id)))).one()
+    escalated = 0
+    if first_id is not None:
+        for low in range(first_id, last_id + 1, batch_size):
+            async with engine.begin() as conn:
+                result = await conn.execute(escalation_update(engine.dialect.name, low, low + batch_size - 1, now))
+                escalated += result.rowcount
+    logger.info("Priorities escalated", extra={
+        "escalated": escalated, "duration_ms": round((time.perf_counter() - start) * 1000),
+    })
+    return escalated
@@ -0,0 +1,166 @@
+import asyncio
+import json
+import os
+from typing import Callable, Optional
+
+from logs import get_logger
+
+# --- Push events (Server-Sent Events) ---
+# Endpoints publish small change notices ("issue 42 is now resolved") and every
+# open /events stream receives them, so clients no longer have to poll the
+# lists. Events carry ids and the changed fields only; clients fetch the rows
+# themselves through /issues/changes or the feed they are showing.
+#
+# The broker fans events out to this process's subscribers. With more than one
+# instance, set EVENT_BROKER=postgres and events are relayed between them with
+# LISTEN/NOTIFY on the shared database.
+#
+# Each subscriber has a bounded queue. A client that falls behind by more than
+# EVENT_QUEUE_SIZE events has its backlog dropped and receives a single
+# "resync" event telling it to refetch, so one slow reader never holds memory
+# or slows down publishing for the others.
+
+EVENT_BROKER = os.getenv("EVENT_BROKER", "local")
+EVENT_QUEUE_SIZE = int(os.getenv("EVENT_QUEUE_SIZE", "100"))
+EVENT_HEARTBEAT_SECONDS = float(os.getenv("EVENT_HEARTBEAT_SECONDS", "15"))
+EVENT_CHANNEL = "campusfix_events"
+
+RESYNC = {"type": "resync", "data": {}}
+
+logger = get_logger(__name__)
+
+
+class Subscription:
+    def __init__(self, prefixes: tuple):
+        self.prefixes = prefixes
+        self.queue = asyncio.Queue(maxsize=EVENT_QUEUE_SIZE)
+
+    def wants(self, event: dict) -> bool:
+        return event["type"].startswith(self.prefixes)
+
+    def offer(self, event: dict):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Too far behind: drop the backlog and tell the client to refetch instead
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESYNC)
+
+
+class EventBroker:
+    """In-process fan-out. Subclasses relay published events between instances."""
+
+    def __init__(self):
+        self._subscribers = set()
+        self._listeners = []
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+    def subscribe(self, prefixes: tuple) -> Subscription:
+        subscription = Subscription(prefixes)
+        self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        self._subscribers.discard(subscription)
+
+    def add_listener(self, prefix: str, callback: Callable[[dict], None]):
+        """Call `callback` in this process for every event whose type starts with `prefix`, wherever it was published."""
+        self._listeners.append((prefix, callback))
+
+    async def publish(self, event: dict):
+        self._deliver(event)
+
+    def _deliver(self, event: dict):
+        for prefix, callback in self._listeners:
+            if event["type"].startswith(prefix):
+                callback(event)
+        for subscription in self._subscribers:
+            if subscription.wants(event):
+                subscription.offer(event)
+
+
+class PostgresBroker(EventBroker):
+    """Relays events through NOTIFY; every instance (this one included) LISTENs and delivers locally."""
+
+    def __init__(self, dsn: str):
+        super().__init__()
+        self.dsn = dsn
+        self._listener = None
+        self._publisher = None
+        self._publish_lock = asyncio.Lock()
+
+    async def start(self):
+        import asyncpg
+
+        self._listener = await asyncpg.connect(self.dsn)
+        self._publisher = await asyncpg.connect(self.dsn)
+        await self._listener.add_listener(EVENT_CHANNEL, self._on_notify)
+
+    async def stop(self):
+        for conn in (self._listener, self._publisher):
+            if conn is not None:
+                await conn.close()
+
+    def _on_notify(self, connection, pid, channel, payload):
+        self._deliver(json.loads(payload))
+
+    async def publish(self, event: dict):
+        # One connection runs one query at a time
+        async with self._publish_lock:
+            await self._publisher.execute("SELECT pg_notify($1, $2)", EVENT_CHANNEL, json.dumps(event, default=str))
+
+
+def _postgres_dsn(url: str) -> str:
+    # asyncpg takes a plain libpq URL
+    for prefix in ("postgresql+asyncpg://", "postgresql+psycopg2://", "postgres://"):
+        if url.startswith(prefix):
+            return url.replace(prefix, "postgresql://", 1)
+    return url
+
+
+def _make_broker() -> EventBroker:
+    if EVENT_BROKER == "postgres":
+        from models import SQLALCHEMY_DATABASE_URL
+        return PostgresBroker(_postgres_dsn(SQLALCHEMY_DATABASE_URL))
+    return EventBroker()
+
+
+broker = _make_broker()
+
+
+async def publish(event_type: str, **data):
+    """Publish an event; a broker failure is logged, never raised into the request."""
+    try:
+        await broker.publish({"type": event_type, "data": data})
+    except Exception as e:
+        logger.warning("Could not publish event", extra={"event_type": event_type, "error": str(e)})
+
+
+def format_sse(event: Optional[dict]) -> str:
+    if event is None:
+        # Comment line: keeps proxies from closing an idle stream
+        return ": ping\n\n"
+    return f"event: {event['type']}\ndata: {json.dumps(event['data'], default=str)}\n\n"
+
+
+async def stream(prefixes: tuple):
+    """Yield events whose type starts with one of `prefixes`, as SSE text, until the client goes away."""
+    # Subscribed here rather than by the caller, so the finally below always unsubscribes
+    subscription = broker.subscribe(prefixes)
+    try:
+        # Reconnect after 5s if the connection drops
+        yield "retry: 5000\n\n"
+        while True:
+            try:
+                event = await asyncio.wait_for(subscription.queue.get(), timeout=EVENT_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                event = None
+            yield format_sse(event)
+    finally:
+        broker.unsubscribe(subscription)
@@ -0,0 +1,130 @@
+import hashlib
+import json
+import os
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Optional
+
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import and_, delete, or_, select, update
+from sqlalchemy.exc import IntegrityError
+
+from models import IdempotencyKey, AsyncSessionLocal
+
+# --- Idempotent submissions ---
+# Clients send an Idempotency-Key header (any unique string, e.g. a UUID) with
+# a submission and send the same key again when they retry it. The first
+# request claims the key by inserting a row, and its response is stored in
+# that row once it succeeds. A retry gets the stored response back without
+# the upload, NSFW check or insert running again. A retry that arrives while
+# the first request is still running gets a 409; a key reused for a different
+# report (description, location, photo or on_duplicate) gets a 422. A request
+# that fails releases its key, so it can be retried. A worker that dies before
+# either leaves a claim with no response; after IDEMPOTENCY_CLAIM_TIMEOUT_SECONDS
+# it counts as abandoned and the next retry claims the key again. Keys expire
+# after IDEMPOTENCY_TTL_SECONDS and are swept with the auth store.
+
+IDEMPOTENCY_TTL_SECONDS = float(os.getenv("IDEMPOTENCY_TTL_SECONDS", str(24 * 3600)))
+# Well above how long a submission takes: uploads and checks run after the response
+IDEMPOTENCY_CLAIM_TIMEOUT_SECONDS = float(os.getenv("IDEMPOTENCY_CLAIM_TIMEOUT_SECONDS", "300"))
+MAX_KEY_LENGTH = 255
+REPLAYED_HEADER = "Idempotent-Replayed"
+
+
+def fingerprint(*parts) -> str:
+    return hashlib.sha256(json.dumps(parts, default=str).encode()).hexdigest()
+
+
+class IdempotencyStore:
+    namespace = "idempotency"
+
+    def __init__(self, ttl: float = IDEMPOTENCY_TTL_SECONDS, claim_timeout: float = IDEMPOTENCY_CLAIM_TIMEOUT_SECONDS):
+        self.ttl = ttl
+        self.claim_timeout = claim_timeout
+
+    async def claim(self, scope: str, key: str, request_fingerprint: str) -> Optional[dict]:
+        """
+        Claim `key` for a new request and return None, or return the stored
+        response of the earlier request that used it.
+        """
+        if len(key) > MAX_KEY_LENGTH:
+            raise HTTPException(status_code=400, detail=f"Idempotency-Key is longer than {MAX_KEY_LENGTH} characters")
+        record_key = f"{scope}:{key}"
+
+        now = datetime.utcnow()
+        async with AsyncSessionLocal() as db:
+            # An expired key, or one whose request was abandoned, counts as unused
+            await db.execute(delete(IdempotencyKey).where(
+                IdempotencyKey.key == record_key,
+                or_(
+                    IdempotencyKey.expires_at < now,
+                    and_(
+                        IdempotencyKey.response.is_(None),
+                        IdempotencyKey.claimed_at < now - timedelta(seconds=self.claim_timeout),
+                    ),
+                ),
+            ))
+            db.add(IdempotencyKey(
+                key=record_key,
+                fingerprint=request_fingerprint,
+                claimed_at=now,
+                expires_at=now + timedelta(seconds=self.ttl),
+            ))
+            try:
+                await db.commit()
+                return None
+            except IntegrityError:
+                # The primary key is taken: this is a retry
+                await db.rollback()
+
+            existing = (await db.execute(
+                select(IdempotencyKey.fingerprint, IdempotencyKey.response).where(IdempotencyKey.key == record_key)
+            )).first()
+
+        if existing is None or existing.response is None:
+            # Still running (or released a moment ago); the client retries later
+            raise HTTPException(status_code=409, detail="A request with this Idempotency-Key is still in progress")
+        if existing.fingerprint != request_fingerprint:
+            raise HTTPException(status_code=422, detail="Idempotency-Key was already used for a different request")
+        return json.loads(existing.response)
+
+    async def complete(self, scope: str, key: str, response: dict):
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                update(IdempotencyKey)
+                .where(IdempotencyKey.key == f"{scope}:{key}")
+                .values(response=json.dumps(response))
+            )
+            await db.commit()
+
+    async def release(self, scope: str, key: str):
+        async with AsyncSessionLocal() as db:
+            await db.execute(delete(IdempotencyKey).where(IdempotencyKey.key == f"{scope}:{key}"))
+            await db.commit()
+
+    async def sweep(self) -> int:
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(delete(IdempotencyKey).where(IdempotencyKey.expires_at < datetime.utcnow()))
+            await db.commit()
+        return result.rowcount
+
+
+idempotency_keys = IdempotencyStore()
+
+
+async def run_once(scope: str, key: Optional[str], request_fingerprint: str, create: Callable[[], Awaitable]):
+    """Run `create()` unless `key` was already used in `scope`; then replay what it returned."""
+    if not key:
+        return await create()
+    stored = await idempotency_keys.claim(scope, key, request_fingerprint)
+    if stored is not None:
+        return JSONResponse(stored, headers={REPLAYED_HEADER: "true"})
+
+    try:
+        result = await create()
+    except BaseException:
+        await idempotency_keys.release(scope, key)
+        raise
+    await idempotency_keys.complete(scope, key, jsonable_encoder(result))
+    return result
@@ -0,0 +1,102 @@
+import hashlib
+import os
+import tempfile
+from typing import Optional
+
+from fastapi import HTTPException, UploadFile
+from starlette.responses import JSONResponse
+
+# --- Size-capped upload ingestion ---
+# Uploads are never read into memory whole: the request body is counted as it
+# streams in (and refused up front when Content-Length is already too big), and
+# files are copied to disk in fixed-size chunks for the upload workers to
+# stream from.
+
+MAX_IMAGE_UPLOAD_BYTES = int(os.getenv("MAX_IMAGE_UPLOAD_BYTES", str(10 * 1024 * 1024)))
+MAX_MEDIA_UPLOAD_BYTES = int(os.getenv("MAX_MEDIA_UPLOAD_BYTES", str(50 * 1024 * 1024)))
+UPLOAD_TMP_DIR = os.getenv("UPLOAD_TMP_DIR") or None  # None = system temp dir
+CHUNK_SIZE = 64 * 1024
+
+# Allowance for the multipart framing and text fields around the file
+FORM_OVERHEAD_BYTES = 64 * 1024
+
+
+def _too_large(limit: int) -> HTTPException:
+    return HTTPException(status_code=413, detail=f"Upload exceeds the {limit // (1024 * 1024)} MB limit")
+
+
+class BodySizeLimitMiddleware:
+    """
+    ASGI middleware capping request bodies per (method, path).
+    FastAPI parses form bodies before any dependency runs, so the cap has to
+    be enforced here, on the raw stream.
+    """
+
+    def __init__(self, app, limits: dict):
+        self.app = app
+        self.limits = limits
+
+    async def __call__(self, scope, receive, send):
+        limit = None
+        if scope["type"] == "http":
+            limit = self.limits.get((scope["method"], scope["path"]))
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+
+        max_body = limit + FORM_OVERHEAD_BYTES
+        content_length = dict(scope["headers"]).get(b"content-length")
+        if content_length and content_length.isdigit() and int(content_length) > max_body:
+            # Refuse before reading a single byte of the body
+            error = _too_large(limit)
+            response = JSONResponse({"detail": error.detail}, status_code=error.status_code)
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > max_body:
+                    # Chunked bodies without Content-Length stop here
+                    raise _too_large(limit)
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+
+async def spool_upload(upload: UploadFile, max_bytes: int):
+    """
+    Copy `upload` to a temp file in CHUNK_SIZE pieces.
+    Returns (path, sha256 hex digest); the caller owns the file and must delete it.
+    """
+    suffix = os.path.splitext(upload.filename or "")[1]
+    fd, path = tempfile.mkstemp(prefix="campusfix_", suffix=suffix, dir=UPLOAD_TMP_DIR)
+    size = 0
+    digest = hashlib.sha256()
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while chunk := await upload.read(CHUNK_SIZE):
+                size += len(chunk)
+                if size > max_bytes:
+                    raise _too_large(max_bytes)
+                out.write(chunk)
+                digest.update(chunk)
+    except BaseException:
+        os.remove(path)
+        raise
+    return path, digest.hexdigest()
+
+
+async def upload_sha256(upload: Optional[UploadFile]) -> Optional[str]:
+    """SHA-256 of `upload`'s content (None for no file), read in chunks; the file is rewound after."""
+    if upload is None:
+        return None
+    digest = hashlib.sha256()
+    while chunk := await upload.read(CHUNK_SIZE):
+        digest.update(chunk)
+    await upload.seek(0)
+    return digest.hexdigest()
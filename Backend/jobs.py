@@ -0,0 +1,68 @@
+import asyncio
+import os
+import socket
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable
+
+from sqlalchemy import delete, update
+from sqlalchemy.exc import IntegrityError
+
+from logs import get_logger
+from models import JobLease, AsyncSessionLocal
+
+# --- Periodic background jobs ---
+# Every worker runs the same loop, and a lease row in job_leases decides which
+# of them does the work. A worker takes the lease by inserting the row (or
+# replacing an expired one), runs the job and then keeps the row until
+# `interval` seconds after the run started, so the job runs about once per
+# interval however many workers there are. If a worker dies mid-run its lease
+# simply expires after `lease_seconds`.
+
+logger = get_logger(__name__)
+
+# Identifies this process in job_leases, for debugging
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+async def acquire_lease(name: str, lease_seconds: float) -> bool:
+    """Take the lease on `name` for `lease_seconds` unless another worker holds it."""
+    now = datetime.utcnow()
+    async with AsyncSessionLocal() as db:
+        # An expired lease counts as free
+        await db.execute(delete(JobLease).where(JobLease.name == name, JobLease.expires_at < now))
+        db.add(JobLease(name=name, holder=WORKER_ID, expires_at=now + timedelta(seconds=lease_seconds)))
+        try:
+            await db.commit()
+            return True
+        except IntegrityError:
+            return False
+
+
+async def hold_lease(name: str, until: datetime):
+    """Keep (or give up early) a lease this worker holds."""
+    async with AsyncSessionLocal() as db:
+        await db.execute(
+            update(JobLease)
+            .where(JobLease.name == name, JobLease.holder == WORKER_ID)
+            .values(expires_at=until)
+        )
+        await db.commit()
+
+
+async def run_periodically(name: str, interval: float, job: Callable[[], Awaitable], lease_seconds: float):
+    """Run `job` about every `interval` seconds on one worker at a time; `lease_seconds` must exceed its run time."""
+    while True:
+        try:
+            if await acquire_lease(name, lease_seconds):
+                started = datetime.utcnow()
+                start = time.perf_counter()
+                try:
+                    await job()
+                finally:
+                    await hold_lease(name, started + timedelta(seconds=interval))
+                logger.debug("Job finished", extra={"job": name, "duration_ms": round((time.perf_counter() - start) * 1000)})
+        except Exception as e:
+            logger.warning("Job failed", extra={"job": name, "error": str(e)})
+        await asyncio.sleep(interval)
@@ -0,0 +1,280 @@
+import argparse
+import asyncio
+import difflib
+import os
+import re
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import func, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+
+import rollups
+from logs import get_logger
+from migrations import migrate
+from models import AsyncSessionLocal, Issue, Location, LocationAlias, SafetyReport, async_engine, engine
+
+# --- Canonical locations ---
+# Reports name their location in free text, so "Lecture Hall 3", "LH3" and
+# "lecture hall 3 " have to be recognised as one place. Each place is a row in
+# `locations`, and every normalized spelling seen for it is a row in
+# `location_aliases`, so a spelling that has been seen before resolves with one
+# primary key lookup. A new spelling is fuzzy-matched against the known places:
+#   - the same words run together ("lecturehall 3"),
+#   - an abbreviation of the initials ("LH3", "LH 3"),
+#   - or typos ("Libary", "Main Blok"): the same number of words, each at least
+#     LOCATION_MATCH_THRESHOLD similar to its counterpart (difflib's ratio), so
+#     "Admin Block - Room 2" never matches "Admin Block - Floor 2".
+# Numbers and single letters ("Room 101", "Hostel A") identify a place, so they
+# must match exactly: "Room 101" is never merged into "Room 102". A match is
+# stored as a new alias; anything else becomes a new place, named as written.
+#
+# `python -m locations` links existing rows, most common spelling first (so that
+# spelling becomes the place's name).
+
+LOCATION_MATCH_THRESHOLD = float(os.getenv("LOCATION_MATCH_THRESHOLD", "0.85"))
+LOCATION_NAME_MAX_LENGTH = 200
+
+_TOKEN = re.compile(r"[^\W\d_]+|\d+")  # Runs of letters (any script) or of digits
+
+logger = get_logger(__name__)
+
+
+def location_key(name: str) -> str:
+    """'Lecture-Hall 3 ' -> 'lecture hall 3'; 'LH3' -> 'lh 3'."""
+    return " ".join(_TOKEN.findall(name.lower()))
+
+
+def display_name(name: str) -> str:
+    return " ".join(name.split())[:LOCATION_NAME_MAX_LENGTH]
+
+
+class _Profile:
+    """What fuzzy matching compares, computed once per place."""
+
+    __slots__ = ("compact", "initials", "identifiers", "words")
+
+    def __init__(self, key: str):
+        tokens = key.split()
+        self.words = tuple(t for t in tokens if t.isalpha() and len(t) > 1)
+        self.identifiers = tuple(t for t in tokens if t.isdigit() or len(t) == 1)
+        self.compact = "".join(tokens)
+        # "lecture hall 3" -> "lh3"
+        self.initials = "".join(w[0] for w in self.words) + "".join(self.identifiers)
+
+    def similarity(self, other: "_Profile", threshold: float = 0.0) -> float:
+        """1.0 for the same place written differently; 0.0 if the identifiers differ or the score is below `threshold`."""
+        if self.identifiers != other.identifiers:
+            return 0.0
+        if self.compact == other.compact or self.compact == other.initials or self.initials == other.compact:
+            return 1.0
+        if len(self.words) != len(other.words):
+            return 0.0
+        score = 1.0
+        for word, other_word in zip(self.words, other.words):
+            if word != other_word:
+                matcher = difflib.SequenceMatcher(None, word, other_word, autojunk=False)
+                if matcher.real_quick_ratio() < threshold or matcher.quick_ratio() < threshold:
+                    return 0.0
+                score = min(score, matcher.ratio())
+        return score if score >= threshold else 0.0
+
+
+class LocationMatcher:
+    """The known places of one worker, caught up from the (append-only) locations table on a miss."""
+
+    def __init__(self, threshold: float = LOCATION_MATCH_THRESHOLD):
+        self.threshold = threshold
+        self._places = {}  # id -> (name, _Profile)
+        self._last_id = 0
+
+    def add(self, location_id: int, name: str, key: str):
+        self._places[location_id] = (name, _Profile(key))
+        self._last_id = max(self._last_id, location_id)
+
+    def discard(self, location_id: int):
+        self._places.pop(location_id, None)
+
+    async def refresh(self, db):
+        rows = (await db.execute(
+            select(Location.id, Location.name, Location.key).where(Location.id > self._last_id).order_by(Location.id)
+        )).all()
+        for row in rows:
+            self.add(row.id, row.name, row.key)
+
+    def best_match(self, key: str) -> Optional[tuple]:
+        """(id, name) of the most similar known place, if it is similar enough."""
+        profile = _Profile(key)
+        best, best_score = None, self.threshold
+        for location_id, (name, other) in self._places.items():
+            score = profile.similarity(other, best_score)
+            if score >= best_score:
+                best, best_score = (location_id, name), score
+                if score == 1.0:
+                    break
+        return best
+
+
+location_matcher = LocationMatcher()
+
+
+def alias_query(key: str):
+    return select(Location.id, Location.name).join(LocationAlias, LocationAlias.location_id == Location.id).where(
+        LocationAlias.alias == key)
+
+
+def _insert(dialect_name: str):
+    return postgresql.insert if dialect_name == "postgresql" else sqlite.insert
+
+
+async def resolve_location(db, location: str, matcher: LocationMatcher = location_matcher) -> tuple:
+    """
+    (location_id, canonical name) for a free-text location, adding an alias or a
+    new place when needed. Runs in the caller's transaction; returns (None, location)
+    for text with nothing to match on.
+    """
+    key = location_key(location)
+    if not key:
+        return None, location
+    known = (await db.execute(alias_query(key))).first()
+    if known:
+        return tuple(known)
+
+    insert = _insert(db.bind.dialect.name)
+    await matcher.refresh(db)
+    match = matcher.best_match(key)
+    while match and await db.scalar(select(Location.id).where(Location.id == match[0])) is None:
+        # Seen in a transaction that was rolled back
+        matcher.discard(match[0])
+        match = matcher.best_match(key)
+    if match is None:
+        # Another worker may be adding the same place right now: whoever commits first wins the key
+        await db.execute(
+            insert(Location).values(name=display_name(location), key=key, created_at=datetime.utcnow())
+            .on_conflict_do_nothing(index_elements=["key"])
+        )
+        match = tuple((await db.execute(select(Location.id, Location.name).where(Location.key == key))).one())
+        matcher.add(match[0], match[1], key)
+        logger.info("New location", extra={"location_id": match[0], "location": match[1]})
+    await db.execute(
+        insert(LocationAlias).values(alias=key, location_id=match[0]).on_conflict_do_nothing(index_elements=["alias"])
+    )
+    return match
+
+
+# --- Hotspots ---
+
+HOTSPOT_SAFETY_WEIGHT = float(os.getenv("HOTSPOT_SAFETY_WEIGHT", "1"))
+
+
+def open_issues_query():
+    """Unresolved issues per place; counted from ix_issues_location_id_status alone."""
+    return (
+        select(Issue.location_id, func.count())
+        .where(Issue.location_id.isnot(None), Issue.status.is_distinct_from("resolved"))
+        .group_by(Issue.location_id)
+    )
+
+
+def safety_incidents_query(since: datetime):
+    """Safety reports per place since `since`; counted from ix_safety_reports_location_id_created_at alone."""
+    return (
+        select(SafetyReport.location_id, func.count())
+        .where(SafetyReport.location_id.isnot(None), SafetyReport.created_at >= since)
+        .group_by(SafetyReport.location_id)
+    )
+
+
+async def hotspots(db, days: int, limit: int) -> list:
+    """Places ranked by open issues plus HOTSPOT_SAFETY_WEIGHT x safety reports in the last `days` days."""
+    open_issues = dict((await db.execute(open_issues_query())).all())
+    incidents = dict((await db.execute(safety_incidents_query(datetime.utcnow() - timedelta(days=days)))).all())
+
+    scores = {
+        location_id: open_issues.get(location_id, 0) + HOTSPOT_SAFETY_WEIGHT * incidents.get(location_id, 0)
+        for location_id in open_issues.keys() | incidents.keys()
+    }
+    top = sorted(scores, key=lambda location_id: (-scores[location_id], location_id))[:limit]
+    names = dict((await db.execute(select(Location.id, Location.name).where(Location.id.in_(top)))).all()) if top else {}
+    return [
+        {
+            "location_id": location_id,
+            "name": names.get(location_id),
+            "open_issues": open_issues.get(location_id, 0),
+            "safety_incidents": incidents.get(location_id, 0),
+            "score": scores[location_id],
+        }
+        for location_id in top
+    ]
+
+
+# --- Backfill ---
+
+async def backfill(batch_size: int = 200) -> dict:
+    """
+    Link every row without a location_id, resolving each distinct spelling once.
+    The analytics_daily location counters move from the spelling to the place's name.
+    """
+    stats = {"spellings": 0, "issues": 0, "safety_reports": 0}
+    async with AsyncSessionLocal() as db:
+        spellings = {}
+        for model in (Issue, SafetyReport):
+            for location, count in (await db.execute(
+                select(model.location, func.count()).where(model.location_id.is_(None)).group_by(model.location)
+            )).all():
+                spellings[location] = spellings.get(location, 0) + count
+        # The most common spelling of a place is resolved first and becomes its name
+        ordered = sorted(spellings, key=lambda location: (-spellings[location], location))
+
+        for start in range(0, len(ordered), batch_size):
+            removed, added = [], []
+            for location in ordered[start:start + batch_size]:
+                location_id, place = await resolve_location(db, location)
+                if location_id is None:
+                    continue
+                # One indexed UPDATE per spelling (ix_issues_location / ix_safety_reports_location)
+                for model, name in ((Issue, "issues"), (SafetyReport, "safety_reports")):
+                    link = (
+                        update(model)
+                        .where(model.location == location, model.location_id.is_(None))
+                        # Keep updated_at: linking is bookkeeping, not a change clients need to sync
+                        .values(location_id=location_id, updated_at=model.updated_at)
+                        .execution_options(synchronize_session=False)
+                    )
+                    if location == place:
+                        # Counters are already under the place's name; nothing moves
+                        stats[name] += (await db.execute(link)).rowcount
+                        continue
+                    linked = (await db.execute(link.returning(model.created_at))).scalars().all()
+                    for created_at in linked:
+                        old, new = rollups.moved(name, "location", created_at, location, place)
+                        removed += old
+                        added += new
+                    stats[name] += len(linked)
+                stats["spellings"] += 1
+            await rollups.record(db, added, removed)
+            await db.commit()
+    return stats
+
+
+def main():
+    argparse.ArgumentParser(description="Link issues and safety reports to canonical locations.").parse_args()
+    migrate(engine)
+    start = time.perf_counter()
+
+    async def run():
+        try:
+            return await backfill()
+        finally:
+            await async_engine.dispose()
+
+    stats = asyncio.run(run())
+    with engine.connect() as conn:
+        places = conn.scalar(select(func.count()).select_from(Location))
+    print(f"Linked {stats['issues']} issues and {stats['safety_reports']} safety reports "
+          f"({stats['spellings']} spellings, {places} places) in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+import atexit
+import contextvars
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+
+import orjson
+
+# --- Structured logging ---
+# Application loggers live under "campusfix" (use get_logger(__name__)). Each
+# record becomes one JSON object per line, with anything passed in `extra=`
+# as fields of its own and the id of the request that logged it;
+# LOG_FORMAT=text gives readable lines for local development. Records are
+# formatted where they are logged but written by a background thread, so a
+# log call on the event loop never waits on stdout. DEBUG records are
+# sampled: only LOG_DEBUG_SAMPLE_RATE of them are kept.
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json")  # json | text
+LOG_DEBUG_SAMPLE_RATE = float(os.getenv("LOG_DEBUG_SAMPLE_RATE", "0.1"))
+
+# Set per request by the metrics middleware
+request_id = contextvars.ContextVar("request_id", default=None)
+
+# Attributes every LogRecord has; anything else came from `extra=`
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "taskName"}
+
+
+def _extra(record: logging.LogRecord) -> dict:
+    return {key: value for key, value in vars(record).items() if key not in _RECORD_ATTRIBUTES}
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+            **_extra(record),
+        }
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return orjson.dumps(entry, default=str).decode()
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)-7s %(name)s: %(message)s")
+
+    def format(self, record):
+        line = super().format(record)
+        fields = " ".join(f"{key}={value}" for key, value in _extra(record).items())
+        return f"{line} [{fields}]" if fields else line
+
+
+class _ContextFilter(logging.Filter):
+    """Drops most DEBUG records and tags the rest with the current request id."""
+
+    def __init__(self, debug_sample_rate: float):
+        super().__init__()
+        self.debug_sample_rate = debug_sample_rate
+
+    def filter(self, record):
+        if record.levelno <= logging.DEBUG and random.random() >= self.debug_sample_rate:
+            return False
+        current = request_id.get()
+        if current and not hasattr(record, "request_id"):
+            record.request_id = current
+        return True
+
+
+_listener = None
+
+
+def configure_logging():
+    """Set up the "campusfix" logger; safe to call more than once."""
+    global _listener
+    if _listener:
+        return
+    records = queue.SimpleQueue()
+    handler = logging.handlers.QueueHandler(records)
+    handler.setFormatter(TextFormatter() if LOG_FORMAT == "text" else JsonFormatter())
+    handler.addFilter(_ContextFilter(LOG_DEBUG_SAMPLE_RATE))
+
+    logger = logging.getLogger("campusfix")
+    logger.setLevel(LOG_LEVEL)
+    logger.addHandler(handler)
+    logger.propagate = False
+
+    # The queue carries finished lines; the listener thread only writes them out
+    output = logging.StreamHandler(sys.stdout)
+    output.setFormatter(logging.Formatter("%(message)s"))
+    _listener = logging.handlers.QueueListener(records, output)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+
+def get_logger(name: str) -> logging.Logger:
+    return logging.getLogger(f"campusfix.{name}")
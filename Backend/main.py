@@ -1,9 +1,11 @@
-from fastapi import FastAPI, File, UploadFile, Depends, HTTPException, Form
+from fastapi import FastAPI, File, UploadFile, Depends, HTTPException, Form, Header, Query
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import RedirectResponse
-from sqlalchemy.orm import Session
-from typing import Optional
+from fastapi.responses import ORJSONResponse, RedirectResponse, Response, StreamingResponse
+from sqlalchemy import and_, func, insert, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Literal, Optional
+import asyncio
 import os
 from datetime import datetime
 from authlib.integrations.starlette_client import OAuth
@@ -12,20 +14,73 @@ from starlette.requests import Request
 from dotenv import load_dotenv
 from supabase import create_client, Client
 import secrets
-import time
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 # Load environment variables
 load_dotenv()
 
+from logs import configure_logging, get_logger
+configure_logging()
+logger = get_logger("main")
+
 from dependencies import supabase
-from models import Issue, get_db, Base, engine
+from contextlib import asynccontextmanager
+from models import Issue, IssueStatusHistory, get_async_db, engine, async_engine, AsyncSessionLocal
+from votes import add_upvote, cast_upvote
+from categorization import categorizer
+from duplicates import DuplicateIndex, duplicate_index
+from events import broker, publish, stream
+from token_store import oauth_states, mobile_tokens, sweep_forever
+from idempotency import idempotency_keys, fingerprint, run_once
+from uploads import (
+    UPLOAD_SWEEP_INTERVAL_SECONDS, UploadJob, UploadResult, enqueue_upload,
+    fail_stale_uploads, start_upload_workers, stop_upload_workers,
+)
+from moderation import start_moderation_pool, stop_moderation_pool
+from ingest import BodySizeLimitMiddleware, spool_upload, upload_sha256, MAX_IMAGE_UPLOAD_BYTES, MAX_MEDIA_UPLOAD_BYTES
+from pagination import paginate, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from sync import sync_state, changes_since, make_etag, is_not_modified
+from search import search
+from projection import parse_fields, project, to_dicts
+from metrics import MetricsMiddleware, instrument_engine, render_metrics
+from migrations import migrate
+from jobs import run_periodically
+from escalation import escalate, ESCALATION_INTERVAL_SECONDS, ESCALATION_LEASE_SECONDS
+from locations import resolve_location, hotspots
+from batch import BatchResponse, BatchItemResult, ItemKeys, item_file_sha256, read_batch, parse_item, MAX_BATCH_UPLOAD_BYTES
+import rollups
 import safety
 
-# Create tables
-Base.metadata.create_all(bind=engine)
-
-app = FastAPI(title="CampusFix API")
+# Bring the schema up to date (see migrations/)
+migrate(engine)
+instrument_engine(engine)
+instrument_engine(async_engine.sync_engine)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    start_upload_workers()
+    start_moderation_pool()
+    await broker.start()
+    sweeper = asyncio.create_task(sweep_forever(idempotency_keys))
+    escalator = asyncio.create_task(run_periodically(
+        "priority_escalation", ESCALATION_INTERVAL_SECONDS, escalate, ESCALATION_LEASE_SECONDS,
+    ))
+    # Runs straight away too: uploads still queued when the last process stopped are gone
+    upload_sweeper = asyncio.create_task(run_periodically(
+        "stale_uploads", UPLOAD_SWEEP_INTERVAL_SECONDS, fail_stale_uploads, UPLOAD_SWEEP_INTERVAL_SECONDS,
+    ))
+    async with AsyncSessionLocal() as db:
+        await duplicate_index.refresh(db)
+    yield
+    sweeper.cancel()
+    escalator.cancel()
+    upload_sweeper.cancel()
+    await stop_upload_workers()
+    stop_moderation_pool()
+    await broker.stop()
+
+
+app = FastAPI(title="CampusFix API", lifespan=lifespan)
 
 app.include_router(safety.router)
 
@@ -36,6 +91,16 @@ app.add_middleware(
     https_only=False # Set to True in production with proper SSL
 )
 
+app.add_middleware(
+    BodySizeLimitMiddleware,
+    limits={
+        ("POST", "/issues"): MAX_IMAGE_UPLOAD_BYTES,
+        ("POST", "/safety/reports"): MAX_MEDIA_UPLOAD_BYTES,
+        ("POST", "/issues/batch"): MAX_BATCH_UPLOAD_BYTES,
+        ("POST", "/safety/reports/batch"): MAX_BATCH_UPLOAD_BYTES,
+    },
+)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -44,6 +109,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Outermost, so its timings include every other middleware
+app.add_middleware(MetricsMiddleware)
+
 # OAuth Setup
 oauth = OAuth()
 
@@ -78,21 +146,69 @@ class IssueResponse(BaseModel):
     id: int
     description: str
     location: str
+    location_id: Optional[int] = None  # The canonical place `location` was matched to
     image_url: Optional[str]
+    image_status: Optional[str] = None
+    thumbnail_url: Optional[str] = None
+    medium_url: Optional[str] = None
     status: str
     upvotes: int
     created_at: datetime
+    updated_at: Optional[datetime] = None
     user_id: Optional[str]
     reporter_name: Optional[str]
     reporter_email: Optional[str]
     priority: str = "medium"
     category: str = "general"
+    merged: bool = False  # POST /issues only: the report was added as an upvote on this existing issue
 
     model_config = {"from_attributes": True}
 
 
+# Fields list endpoints return (and accept in ?fields=)
+ISSUE_FIELDS = tuple(name for name in IssueResponse.model_fields if name != "merged")
+
+
+class IssuePage(BaseModel):
+    items: list[IssueResponse]
+    next_cursor: Optional[str] = None
+    sync_token: Optional[str] = None  # Only on the first page; start /issues/changes from here
+
+
+class IssueChanges(BaseModel):
+    items: list[IssueResponse]
+    next_since: Optional[str] = None
+    has_more: bool = False
+
+
+IssueStatus = Literal["pending", "in_progress", "resolved"]
+
+
 class StatusUpdate(BaseModel):
-    status: str
+    status: IssueStatus
+
+
+MAX_STATUS_UPDATE_IDS = int(os.getenv("MAX_STATUS_UPDATE_IDS", "1000"))
+
+
+class IssueFilter(BaseModel):
+    status: Optional[str] = None
+    category: Optional[str] = None
+    priority: Optional[str] = None
+    location: Optional[str] = None
+    created_before: Optional[datetime] = None
+
+
+class BulkStatusUpdate(BaseModel):
+    status: IssueStatus
+    # Exactly one of these
+    ids: Optional[list[int]] = Field(None, min_length=1, max_length=MAX_STATUS_UPDATE_IDS)
+    filter: Optional[IssueFilter] = None
+
+
+class BulkStatusResult(BaseModel):
+    updated: int
+    ids: list[int]  # Issues whose status changed; those already in `status` are left alone
 
 
 # Helper to get current user
@@ -110,11 +226,6 @@ def is_admin(user: dict) -> bool:
     return user_email in admin_emails
 
 
-# Temporary token store for mobile OAuth (in production, use Redis or database)
-mobile_auth_tokens = {}
-# Store platform info keyed by state/nonce
-platform_store = {}
-
 # Auth endpoints
 @app.get("/auth/login/google")
 async def login_google(request: Request, platform: str = "web"):
@@ -125,7 +236,7 @@ async def login_google(request: Request, platform: str = "web"):
     
     # Generate a unique state and store platform info
     state = secrets.token_urlsafe(16)
-    platform_store[state] = {'platform': platform, 'created_at': time.time()}
+    await oauth_states.put(state, {'platform': platform})
     
     # Pass state to OAuth
     return await oauth.google.authorize_redirect(request, redirect_uri, state=state)
@@ -135,15 +246,14 @@ async def login_google(request: Request, platform: str = "web"):
 async def auth_google(request: Request):
     # Get state from the callback
     state = request.query_params.get('state', '')
-    platform_info = platform_store.pop(state, {})
+    platform_info = await oauth_states.pop(state) or {}
     platform = platform_info.get('platform', 'web')
     
-    print(f"DEBUG: Google callback - state={state}, platform={platform}")
-    
     token = await oauth.google.authorize_access_token(request)
     user = token.get('userinfo')
     
-    print(f"DEBUG: Google user={user}")
+    # Never the user payload itself: it is personal data
+    logger.info("Google login", extra={"platform": platform, "user_id": user.get('sub') if user else None})
     
     if user:
         request.session['user'] = dict(user)
@@ -151,11 +261,7 @@ async def auth_google(request: Request):
     # For mobile, redirect to deep link with temporary token
     if platform == 'mobile' and user:
         temp_token = secrets.token_urlsafe(32)
-        mobile_auth_tokens[temp_token] = {
-            'user': dict(user),
-            'created_at': time.time()
-        }
-        print(f"DEBUG: Redirecting to campusfix://auth/callback?token={temp_token}")
+        await mobile_tokens.put(temp_token, {'user': dict(user)})
         return RedirectResponse(url=f'campusfix://auth/callback?token={temp_token}')
     
     frontend_url = os.getenv("FRONTEND_URL", "http://localhost:5005")
@@ -171,7 +277,7 @@ async def login_github(request: Request, platform: str = "web"):
     
     # Generate a unique state and store platform info
     state = secrets.token_urlsafe(16)
-    platform_store[state] = {'platform': platform, 'created_at': time.time()}
+    await oauth_states.put(state, {'platform': platform})
     
     # Pass state to OAuth
     return await oauth.github.authorize_redirect(request, redirect_uri, state=state)
@@ -181,16 +287,14 @@ async def login_github(request: Request, platform: str = "web"):
 async def auth_github(request: Request):
     # Get state from the callback
     state = request.query_params.get('state', '')
-    platform_info = platform_store.pop(state, {})
+    platform_info = await oauth_states.pop(state) or {}
     platform = platform_info.get('platform', 'web')
     
-    print(f"DEBUG: GitHub callback - state={state}, platform={platform}")
-    
     token = await oauth.github.authorize_access_token(request)
     resp = await oauth.github.get('user', token=token)
     user = resp.json()
     
-    print(f"DEBUG: GitHub user={user}")
+    logger.info("GitHub login", extra={"platform": platform, "user_id": str(user['id']) if user else None})
     
     user_data = None
     if user:
@@ -205,11 +309,7 @@ async def auth_github(request: Request):
     # For mobile, redirect to deep link with temporary token
     if platform == 'mobile' and user_data:
         temp_token = secrets.token_urlsafe(32)
-        mobile_auth_tokens[temp_token] = {
-            'user': user_data,
-            'created_at': time.time()
-        }
-        print(f"DEBUG: Redirecting to campusfix://auth/callback?token={temp_token}")
+        await mobile_tokens.put(temp_token, {'user': user_data})
         return RedirectResponse(url=f'campusfix://auth/callback?token={temp_token}')
     
     frontend_url = os.getenv("FRONTEND_URL", "http://localhost:5005")
@@ -222,15 +322,11 @@ async def exchange_token(request: Request):
     body = await request.json()
     temp_token = body.get('token')
     
-    if not temp_token or temp_token not in mobile_auth_tokens:
+    # One-time use; expires 5 minutes after the OAuth callback
+    token_data = await mobile_tokens.pop(temp_token) if temp_token else None
+    if not token_data:
         raise HTTPException(status_code=401, detail="Invalid or expired token")
     
-    token_data = mobile_auth_tokens.pop(temp_token)
-    
-    # Check if token is expired (5 minutes)
-    if time.time() - token_data['created_at'] > 300:
-        raise HTTPException(status_code=401, detail="Token expired")
-    
     # Set session
     request.session['user'] = token_data['user']
     
@@ -255,6 +351,118 @@ async def logout(request: Request):
     return {"message": "Logged out"}
 
 
+def _issue_image_callback(issue_id: int):
+    async def on_done(result: Optional[UploadResult]):
+        values = {"image_status": "failed"}
+        if result:
+            values = {
+                "image_url": result.url,
+                "thumbnail_url": result.thumbnail_url,
+                "medium_url": result.medium_url,
+                "image_status": "uploaded",
+            }
+        async with AsyncSessionLocal() as db:
+            await db.execute(update(Issue).where(Issue.id == issue_id).values(**values))
+            await db.commit()
+        if result:
+            logger.debug("Issue image uploaded", extra={"issue_id": issue_id})
+        else:
+            logger.warning("Issue image upload failed", extra={"issue_id": issue_id})
+    return on_done
+
+
+def _reporter_name(user: dict) -> str:
+    # robust name extraction
+    reporter_name = user.get('name')
+    if not reporter_name:
+        reporter_name = user.get('given_name', '') + ' ' + user.get('family_name', '')
+        reporter_name = reporter_name.strip()
+    if not reporter_name:
+         reporter_name = user.get('email', '').split('@')[0]
+    return reporter_name
+
+
+async def _stored_image(db: AsyncSession, sha256: str) -> Optional[dict]:
+    """Image columns of an identical photo that has already been uploaded."""
+    existing = (await db.execute(
+        select(Issue.image_url, Issue.thumbnail_url, Issue.medium_url)
+        .where(Issue.image_sha256 == sha256, Issue.image_status == "uploaded")
+        .limit(1)
+    )).first()
+    return {**existing._asdict(), "image_status": "uploaded", "image_sha256": sha256} if existing else None
+
+
+async def _prepare_image(db: AsyncSession, image: Optional[UploadFile]):
+    """Returns (image columns for the new issue, UploadJob or None); the job's on_done is set after the insert."""
+    if not image:
+        return {}, None
+    file_extension = os.path.splitext(image.filename or "")[1]
+
+    # Upload to Supabase Storage
+    if not supabase:
+         logger.error("Supabase client is not initialized; refusing image upload")
+         raise HTTPException(status_code=500, detail="Image storage service not configured.")
+
+    # Spool to disk in chunks rather than reading the whole image into memory
+    file_path, sha256 = await spool_upload(image, MAX_IMAGE_UPLOAD_BYTES)
+
+    # The same photo submitted again reuses the stored files and skips the upload
+    existing = await _stored_image(db, sha256)
+    if existing:
+        os.remove(file_path)
+        return existing, None
+    upload = UploadJob(
+        bucket="issue-images",
+        sha256=sha256,
+        extension=file_extension,
+        file_path=file_path,
+        content_type=image.content_type,
+        on_done=None,
+    )
+    return {"image_status": "pending", "image_sha256": sha256}, upload
+
+
+async def _find_duplicates(db: AsyncSession, location: str, description: str) -> list:
+    """Open issues at the same location that read like `description`, most similar first."""
+    await duplicate_index.refresh(db)
+    matches = duplicate_index.find(location, description)
+    if not matches:
+        return []
+    issues = {issue.id: issue for issue in (await db.execute(
+        select(Issue).where(Issue.id.in_([issue_id for issue_id, _ in matches]))
+    )).scalars()}
+    return [issues[issue_id] for issue_id, _ in matches if issue_id in issues]
+
+
+def _duplicate_conflict(message: str, duplicates: list) -> HTTPException:
+    """409 listing the similar issues, so the client can resubmit with on_duplicate=merge or create."""
+    return HTTPException(status_code=409, detail={
+        "message": message,
+        "duplicates": [IssueResponse.model_validate(d).model_dump(mode="json") for d in duplicates],
+    })
+
+
+_PHOTO_CONFLICT = "A similar issue at this location already has a photo; send it with on_duplicate=create"
+
+
+def _has_photo(issue: Issue) -> bool:
+    return issue.image_status in ("pending", "uploaded")
+
+
+async def _attach_image(db: AsyncSession, issue_id: int, image_fields: dict) -> bool:
+    """
+    Give a merged report's photo to the issue it was merged into, which must not
+    have one already (a failed upload does not count). Returns False if it has.
+    Runs in the caller's transaction; the caller queues the upload once it commits.
+    """
+    return bool((await db.execute(
+        update(Issue)
+        .where(Issue.id == issue_id, or_(Issue.image_status.is_(None), Issue.image_status == "failed"))
+        .values(**{"image_url": None, "thumbnail_url": None, "medium_url": None, **image_fields})
+        .execution_options(synchronize_session=False)
+    )).rowcount)
+
+
 # Issue endpoints
 @app.post("/issues", response_model=IssueResponse)
 async def create_issue(
@@ -262,130 +470,545 @@ async def create_issue(
         description: str = Form(...),
         location: str = Form(...),
         image: Optional[UploadFile] = File(None),
-        db: Session = Depends(get_db)
+        on_duplicate: Literal["merge", "reject", "create"] = Form("reject"),
+        idempotency_key: Optional[str] = Header(None),
+        db: AsyncSession = Depends(get_async_db)
 ):
     try:
         user = get_current_user(request)
         if not user:
             raise HTTPException(status_code=401, detail="Authentication required")
-        user_id = user.get('sub')
-        
-        print(f"DEBUG: Creating issue for user: {user}")
-        
-        # robust name extraction
-        reporter_name = user.get('name')
-        if not reporter_name:
-            reporter_name = user.get('given_name', '') + ' ' + user.get('family_name', '')
-            reporter_name = reporter_name.strip()
-        if not reporter_name:
-             reporter_name = user.get('email', '').split('@')[0]
-
-        # Auto-categorization Logic
-        category = "general"
-        safety_keywords = ['fire', 'smoke', 'spark', 'wire', 'shock', 'leak', 'gas', 'explosion', 'danger', 'hazard', 'unsafe', 'broken', 'crack', 'collapse']
-        desc_lower = description.lower()
-        if any(word in desc_lower for word in safety_keywords):
-            category = "safety_hazard"
-            print(f"DEBUG: Auto-categorized as SAFETY_HAZARD")
-
-        image_url = None
-        if image:
-            file_extension = os.path.splitext(image.filename)[1]
-            filename = f"{int(datetime.now().timestamp())}_{user_id[:5]}{file_extension}"
-            
-            # Read file content
-            content = await image.read()
-            
-            # Upload to Supabase Storage
-            if not supabase:
-                 print("ERROR: Supabase client is not initialized. Skipping upload.")
-                 raise HTTPException(status_code=500, detail="Image storage service not configured.")
 
-            try:
-                bucket_name = "issue-images"
-                res = supabase.storage.from_(bucket_name).upload(
-                    path=filename,
-                    file=content,
-                    file_options={"content-type": image.content_type}
-                )
-                
-                # Get Public URL
-                public_url_response = supabase.storage.from_(bucket_name).get_public_url(filename)
-                image_url = public_url_response
-                print(f"DEBUG: Image uploaded to Supabase: {image_url}")
-                
-            except Exception as upload_error:
-                print(f"ERROR uploading to Supabase: {upload_error}")
-                # Fallback or error handling? For now, log it.
-                # If upload fails, image_url remains None
-
-        issue = Issue(
-            description=description,
-            location=location,
-            image_url=image_url,
-            user_id=user_id,
-            reporter_name=reporter_name,
-            reporter_email=user.get('email'),
-            category=category
+        # A retry with the same Idempotency-Key gets the first response back
+        return await run_once(
+            f"issues:{user.get('sub')}", idempotency_key,
+            fingerprint(description, location, on_duplicate, await upload_sha256(image)),
+            lambda: _create_issue(db, user, description, location, image, on_duplicate),
         )
-        db.add(issue)
-        db.commit()
-        db.refresh(issue)
-        return issue
+    except HTTPException:
+        raise
     except Exception as e:
-        import traceback
-        traceback.print_exc()
-        print(f"ERROR in create_issue: {e}")
+        logger.exception("create_issue failed")
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.get("/issues", response_model=list[IssueResponse])
-async def get_issues(request: Request, db: Session = Depends(get_db)):
+async def _create_issue(
+        db: AsyncSession,
+        user: dict,
+        description: str,
+        location: str,
+        image: Optional[UploadFile],
+        on_duplicate: str,
+) -> IssueResponse:
+    user_id = user.get('sub')
+    reporter_name = _reporter_name(user)
+
+    # Near-duplicates of an open issue give a 409 listing them, or become an upvote on it
+    if on_duplicate != "create":
+        duplicates = await _find_duplicates(db, location, description)
+        if duplicates and on_duplicate == "reject":
+            raise _duplicate_conflict("Similar issues are already open at this location", duplicates)
+        if duplicates:
+            original = duplicates[0]
+            # The photo goes onto the original; it is never dropped, so if the original has one it is a 409
+            if image and _has_photo(original):
+                raise _duplicate_conflict(_PHOTO_CONFLICT, duplicates)
+            image_fields, upload = await _prepare_image(db, image)
+            try:
+                if image and not await _attach_image(db, original.id, image_fields):
+                    raise _duplicate_conflict(_PHOTO_CONFLICT, duplicates)
+                # The photo and the vote commit together
+                upvotes = await add_upvote(db, original.id, user_id)
+                await db.commit()
+            except BaseException:
+                # Before run_once releases the Idempotency-Key in its own session
+                await db.rollback()
+                if upload:
+                    os.remove(upload.file_path)
+                raise
+            if upload:
+                upload.on_done = _issue_image_callback(original.id)
+                await enqueue_upload(upload)
+            await db.refresh(original)
+            if upvotes is not None:
+                await publish("issue.upvoted", id=original.id, upvotes=upvotes)
+            logger.info("Merged report into existing issue", extra={"issue_id": original.id})
+            return IssueResponse.model_validate(original).model_copy(update={"merged": True})
+
+    # Auto-categorization Logic (taxonomy in categories.json)
+    category, priority = categorizer.classify(description)
+    logger.debug("Auto-categorized issue", extra={"category": category, "priority": priority})
+
+    location_id, place = await resolve_location(db, location)
+    image_fields, upload = await _prepare_image(db, image)
+
+    issue = Issue(
+        description=description,
+        location=location,
+        location_id=location_id,
+        user_id=user_id,
+        reporter_name=reporter_name,
+        reporter_email=user.get('email'),
+        category=category,
+        priority=priority,
+        **image_fields
+    )
+    db.add(issue)
+    await db.flush()
+    await rollups.record(db, rollups.created(
+        "issues", issue.created_at, category=category, location=place, status=issue.status,
+    ))
+    await db.commit()
+    await db.refresh(issue)
+    duplicate_index.add(issue.id, issue.location, issue.description)
+    await publish("issue.created", id=issue.id, status=issue.status, category=issue.category, priority=issue.priority)
+    logger.info("Issue created", extra={"issue_id": issue.id, "category": category, "priority": priority})
+
+    # The upload finishes in the background; image_url is filled in when it lands
+    if upload:
+        upload.on_done = _issue_image_callback(issue.id)
+        await enqueue_upload(upload)
+    return IssueResponse.model_validate(issue)
+
+
+class IssueBatchItem(BaseModel):
+    description: str = Field(min_length=1)
+    location: str = Field(min_length=1)
+    image: Optional[str] = None  # Name of the multipart part holding the photo
+    image_sha256: Optional[str] = None  # Or: a photo the server already stores
+    on_duplicate: Literal["merge", "reject", "create"] = "reject"
+    idempotency_key: Optional[str] = None
+
+
+async def _batch_item_image(db: AsyncSession, item: IssueBatchItem, files: dict) -> tuple:
+    """(image columns, UploadJob or None, error message or None) for a batch item's photo."""
+    if item.image:
+        return *await _prepare_image(db, files[item.image]), None
+    if item.image_sha256:
+        stored = await _stored_image(db, item.image_sha256)
+        return (stored, None, None) if stored else ({}, None, "image_sha256: unknown image")
+    return {}, None, None
+
+
+@app.post("/issues/batch", response_model=BatchResponse)
+async def create_issues_batch(request: Request, db: AsyncSession = Depends(get_async_db)):
+    """
+    Several issues at once (offline queues). Each item is handled like POST /issues,
+    including against the items before it; everything the batch writes (new issues,
+    votes and photos of merged items) commits in one transaction. Results are per
+    item, in order.
+    """
+    user = get_current_user(request)
+    if not user:
+        raise HTTPException(status_code=401, detail="Authentication required")
+    user_id = user.get('sub')
+    reporter_name = _reporter_name(user)
+
+    raw_items, files = await read_batch(request)
+    results: list[Optional[BatchItemResult]] = [None] * len(raw_items)
+    accepted = []  # (index, upload job or None, row)
+    merged = []  # (index, original id, new upvote count or None, upload job or None)
+    # Items repeating an earlier item of this batch are rejected or fold into it, as they would be one by one
+    in_batch = DuplicateIndex()
+    repeats_of = {}  # item index -> (position in `accepted`, on_duplicate)
+    keys = ItemKeys(f"issues/batch:{user_id}")
+    places = {}  # location text -> (location_id, canonical name)
+
+    try:
+        # Keys are claimed (in their own sessions) before this session takes the write lock
+        items = []
+        for index, raw in enumerate(raw_items):
+            item, error = parse_item(IssueBatchItem, raw)
+            if item:
+                results[index], error = await keys.claim(
+                    index, item, item.on_duplicate, await item_file_sha256(files, item.image, item.image_sha256),
+                )
+                if results[index]:
+                    continue
+            if item and item.image and item.image not in files:
+                error = f"image: no file part named {item.image!r}"
+            if error:
+                results[index] = BatchItemResult(index=index, status="error", detail=error)
+                continue
+            items.append((index, item))
+
+        for index, item in items:
+            has_image = bool(item.image or item.image_sha256)
+            if item.on_duplicate != "create":
+                repeats = in_batch.find(item.location, item.description, limit=1)
+                # An item with a photo is not folded into an earlier one: that row may have its own
+                if repeats and (item.on_duplicate == "reject" or not has_image):
+                    repeats_of[index] = (repeats[0][0], item.on_duplicate)
+                    continue
+                duplicates = await _find_duplicates(db, item.location, item.description)
+                if duplicates and item.on_duplicate == "reject":
+                    results[index] = BatchItemResult(
+                        index=index, status="error", id=duplicates[0].id,
+                        detail="Similar issues are already open at this location",
+                    )
+                    continue
+                if duplicates:
+                    original_id = duplicates[0].id
+                    upload = None
+                    if has_image:
+                        error = _PHOTO_CONFLICT if _has_photo(duplicates[0]) else None
+                        if not error:
+                            image_fields, upload, error = await _batch_item_image(db, item, files)
+                        if not error and not await _attach_image(db, original_id, image_fields):
+                            error = _PHOTO_CONFLICT
+                        if error:
+                            if upload:
+                                os.remove(upload.file_path)
+                            results[index] = BatchItemResult(index=index, status="error", id=original_id, detail=error)
+                            continue
+                    merged.append((index, original_id, await add_upvote(db, original_id, user_id), upload))
+                    continue
+
+            image_fields, upload, error = await _batch_item_image(db, item, files)
+            if error:
+                results[index] = BatchItemResult(index=index, status="error", detail=error)
+                continue
+
+            category, priority = categorizer.classify(item.description)
+            # Every row has the same keys so the insert runs as one executemany
+            row = {
+                "description": item.description,
+                "location": item.location,
+                "location_id": None,  # Resolved below, once the batch has claimed its keys
+                "user_id": user_id,
+                "reporter_name": reporter_name,
+                "reporter_email": user.get('email'),
+                "category": category,
+                "priority": priority,
+                "image_url": None, "image_status": None, "thumbnail_url": None, "medium_url": None,
+                "image_sha256": None,
+                **image_fields,
+            }
+            in_batch.add(len(accepted), item.location, item.description)
+            accepted.append((index, upload, row))
+
+        inserted = []
+        if accepted:
+            for _, _, row in accepted:
+                if row["location"] not in places:
+                    places[row["location"]] = await resolve_location(db, row["location"])
+                row["location_id"] = places[row["location"]][0]
+            inserted = (await db.execute(
+                insert(Issue).returning(Issue.id, Issue.status, Issue.created_at, sort_by_parameter_order=True),
+                [row for _, _, row in accepted],
+            )).all()
+            await rollups.record(db, [
+                event
+                for (_, _, row), (_, status, created_at) in zip(accepted, inserted)
+                for event in rollups.created(
+                    "issues", created_at, category=row["category"], location=places[row["location"]][1], status=status,
+                )
+            ])
+        await db.commit()
+    except BaseException:
+        # Nothing was committed, so every key is free for the retry (released once our write lock is gone)
+        await db.rollback()
+        for upload in [upload for _, upload, _ in accepted] + [upload for *_, upload in merged]:
+            if upload:
+                os.remove(upload.file_path)
+        await keys.release_all()
+        raise
+
+    for (index, upload, row), (issue_id, status, _) in zip(accepted, inserted):
+        results[index] = BatchItemResult(index=index, status="created", id=issue_id)
+        duplicate_index.add(issue_id, row["location"], row["description"])
+        await publish("issue.created", id=issue_id, status=status, category=row["category"], priority=row["priority"])
+        if upload:
+            upload.on_done = _issue_image_callback(issue_id)
+            await enqueue_upload(upload)
+    for index, original_id, upvotes, upload in merged:
+        results[index] = BatchItemResult(index=index, status="merged", id=original_id)
+        if upvotes is not None:
+            await publish("issue.upvoted", id=original_id, upvotes=upvotes)
+        if upload:
+            upload.on_done = _issue_image_callback(original_id)
+            await enqueue_upload(upload)
+    for index, (position, on_duplicate) in repeats_of.items():
+        issue_id = inserted[position][0]
+        if on_duplicate == "merge":
+            results[index] = BatchItemResult(index=index, status="merged", id=issue_id)
+        else:
+            earlier = accepted[position][0]
+            results[index] = BatchItemResult(
+                index=index, status="error", id=issue_id, duplicate_of=earlier,
+                detail=f"Similar to item {earlier} of this batch",
+            )
+    await keys.finish(results)
+    logger.info("Issue batch stored", extra={"items": len(raw_items), "inserted": len(inserted)})
+    return BatchResponse(results=results)
+
+
+@app.get("/issues", response_model=IssuePage)
+async def get_issues(
+        request: Request,
+        cursor: Optional[str] = None,
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+        fields: Optional[str] = Query(None, description="Comma-separated subset of issue fields"),
+        status: Optional[str] = Query(None, description="Only issues with this status"),
+        category: Optional[str] = Query(None, description="Only issues in this category"),
+        mine: bool = Query(False, description="Only issues the signed-in user reported"),
+        db: AsyncSession = Depends(get_async_db)
+):
+    user = get_current_user(request)
+    if not user:
+        raise HTTPException(status_code=401, detail="Authentication required")
+    selected = parse_fields(fields, ISSUE_FIELDS)
+    user_id = user.get("sub") if mine else None
+
+    # Read the watermark before the rows: anything written in between shows up in the next delta
+    sync_token, version = await sync_state(db, Issue)
+    etag = make_etag("issues", version, cursor, limit, selected, status, category, user_id)
+    if is_not_modified(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+
+    # Each filter has a (<column>, created_at, id) index, so a filtered page is still one range scan
+    stmt = project(Issue, selected)
+    if status:
+        stmt = stmt.where(Issue.status == status)
+    if category:
+        stmt = stmt.where(Issue.category == category)
+    if mine:
+        stmt = stmt.where(Issue.user_id == user_id)
+    rows, next_cursor = await paginate(db, stmt, Issue, cursor, limit)
+    return ORJSONResponse({
+        "items": to_dicts(rows, selected),
+        "next_cursor": next_cursor,
+        "sync_token": sync_token if cursor is None else None,
+    }, headers={"ETag": etag})
+
+
+@app.get("/issues/search", response_model=IssuePage)
+async def search_issues(
+        request: Request,
+        q: str = Query(..., min_length=1, max_length=200),
+        cursor: Optional[str] = None,
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+        fields: Optional[str] = Query(None, description="Comma-separated subset of issue fields"),
+        db: AsyncSession = Depends(get_async_db)
+):
+    """Issues whose description or location match every word of `q`, best match first."""
     if not get_current_user(request):
         raise HTTPException(status_code=401, detail="Authentication required")
-    issues = db.query(Issue).order_by(Issue.created_at.desc()).all()
-    return issues
+    selected = parse_fields(fields, ISSUE_FIELDS)
+    rows, next_cursor = await search(db, project(Issue, selected), Issue, q, cursor, limit)
+    return ORJSONResponse({"items": to_dicts(rows, selected), "next_cursor": next_cursor})
 
 
-@app.post("/issues/{issue_id}/upvote")
-async def upvote_issue(request: Request, issue_id: int, db: Session = Depends(get_db)):
+@app.get("/issues/similar", response_model=list[IssueResponse])
+async def get_similar_issues(
+        request: Request,
+        location: str,
+        description: str,
+        db: AsyncSession = Depends(get_async_db)
+):
+    """Open issues a report would be merged into; lets clients suggest upvoting before submitting."""
+    if not get_current_user(request):
+        raise HTTPException(status_code=401, detail="Authentication required")
+    return await _find_duplicates(db, location, description)
+
+
+@app.get("/issues/changes", response_model=IssueChanges)
+async def get_issue_changes(
+        request: Request,
+        since: Optional[str] = None,
+        limit: int = Query(MAX_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+        fields: Optional[str] = Query(None, description="Comma-separated subset of issue fields"),
+        db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Delta feed: issues created or modified after the `since` token, oldest first.
+    Keep calling with the returned `next_since` while `has_more` is true.
+    """
     if not get_current_user(request):
         raise HTTPException(status_code=401, detail="Authentication required")
-    issue = db.query(Issue).filter(Issue.id == issue_id).first()
-    if not issue:
+    selected = parse_fields(fields, ISSUE_FIELDS)
+    rows, next_since, has_more = await changes_since(db, project(Issue, selected), Issue, since, limit)
+    return ORJSONResponse({"items": to_dicts(rows, selected), "next_since": next_since, "has_more": has_more})
+
+
+@app.post("/issues/{issue_id}/upvote")
+async def upvote_issue(request: Request, issue_id: int, db: AsyncSession = Depends(get_async_db)):
+    user = get_current_user(request)
+    if not user:
+        raise HTTPException(status_code=401, detail="Authentication required")
+
+    upvotes = await cast_upvote(db, issue_id, user.get('sub'))
+    if upvotes is not None:
+        await publish("issue.upvoted", id=issue_id, upvotes=upvotes)
+        return {"message": "Upvoted", "upvotes": upvotes}
+
+    # Duplicate vote or missing issue: only this path pays for a lookup
+    upvotes = await db.scalar(select(Issue.upvotes).where(Issue.id == issue_id))
+    if upvotes is None:
         raise HTTPException(status_code=404, detail="Issue not found")
-    issue.upvotes += 1
-    db.commit()
-    return {"message": "Upvoted", "upvotes": issue.upvotes}
+    return {"message": "Already upvoted", "upvotes": upvotes}
+
+
+async def _set_status(db: AsyncSession, condition, status: str, changed_by: Optional[str]) -> list:
+    """
+    Move every issue matching `condition` to `status` with one UPDATE and record
+    each change in issue_status_history; returns the ids that changed. The caller commits.
+    """
+    now = datetime.utcnow()
+    changed = (await db.execute(
+        update(Issue)
+        .where(condition, Issue.status.is_distinct_from(status))
+        .values(status=status, updated_at=now)
+        .returning(Issue.id)
+        .execution_options(synchronize_session=False)
+    )).scalars().all()
+    if changed:
+        await db.execute(insert(IssueStatusHistory), [
+            {"issue_id": issue_id, "status": status, "changed_at": now, "changed_by": changed_by}
+            for issue_id in changed
+        ])
+        await rollups.record(db, rollups.status_changed("issues", status, now, len(changed)))
+    return changed
+
+
+@app.patch("/issues/status", response_model=BulkStatusResult)
+async def update_statuses(request: Request, body: BulkStatusUpdate, db: AsyncSession = Depends(get_async_db)):
+    """
+    Admin only: set the status of many issues at once, given by `ids` or by a
+    `filter` (status, category, priority, location, created_before).
+    """
+    user = get_current_user(request)
+    if not is_admin(user):
+        raise HTTPException(status_code=403, detail="Admin access required")
+    if (body.ids is None) == (body.filter is None):
+        raise HTTPException(status_code=400, detail="Give either ids or filter")
+
+    if body.ids is not None:
+        condition = Issue.id.in_(body.ids)
+    else:
+        criteria = body.filter.model_dump(exclude_none=True)
+        if not criteria:
+            # An empty filter would match every issue
+            raise HTTPException(status_code=400, detail="filter needs at least one field")
+        created_before = criteria.pop("created_before", None)
+        condition = and_(
+            *(getattr(Issue, name) == value for name, value in criteria.items()),
+            *([Issue.created_at < created_before] if created_before else []),
+        )
+
+    changed = await _set_status(db, condition, body.status, user.get("email"))
+    await db.commit()
+    for issue_id in changed:
+        await publish("issue.status_changed", id=issue_id, status=body.status)
+    logger.info("Issue statuses updated", extra={"status": body.status, "updated": len(changed)})
+    return BulkStatusResult(updated=len(changed), ids=changed)
 
 
 @app.patch("/issues/{issue_id}/status")
-def update_status(issue_id: int, status_update: StatusUpdate, db: Session = Depends(get_db)):
-    issue = db.query(Issue).filter(Issue.id == issue_id).first()
-    if not issue:
+async def update_status(
+        issue_id: int,
+        status_update: StatusUpdate,
+        request: Request,
+        db: AsyncSession = Depends(get_async_db)
+):
+    user = get_current_user(request)
+    if not is_admin(user):
+        raise HTTPException(status_code=403, detail="Admin access required")
+    changed_by = user.get("email")
+    changed = await _set_status(db, Issue.id == issue_id, status_update.status, changed_by)
+    # Nothing changed: either the issue is already in that status or it does not exist
+    if not changed and not await db.scalar(select(Issue.id).where(Issue.id == issue_id)):
         raise HTTPException(status_code=404, detail="Issue not found")
-    issue.status = status_update.status
-    db.commit()
+    await db.commit()
+    if changed:
+        await publish("issue.status_changed", id=issue_id, status=status_update.status)
     return {"message": "Status updated"}
 
 
+@app.get("/events")
+async def event_stream(request: Request):
+    """
+    Server-Sent Events: issue.created, issue.status_changed, issue.upvoted,
+    safety.report_created and safety.report_updated. Issue events are only sent to signed-in users; the
+    safety feed is public, like /safety/community. A `resync` event means some
+    events were dropped and the client should refetch.
+    """
+    prefixes = ("issue.", "safety.") if get_current_user(request) else ("safety.",)
+    return StreamingResponse(
+        stream(prefixes),
+        media_type="text/event-stream",
+        # Stop proxies (nginx, Cloud Run) from buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @app.get("/analytics")
-async def get_analytics(request: Request, db: Session = Depends(get_db)):
+async def get_analytics(request: Request, db: AsyncSession = Depends(get_async_db)):
     if not get_current_user(request):
         raise HTTPException(status_code=401, detail="Authentication required")
-    total = db.query(Issue).count()
-    pending = db.query(Issue).filter(Issue.status == "pending").count()
-    in_progress = db.query(Issue).filter(Issue.status == "in_progress").count()
-    resolved = db.query(Issue).filter(Issue.status == "resolved").count()
+
+    # One pass over the (status, category, priority) index instead of a COUNT(*) per status
+    rows = (await db.execute(
+        select(Issue.status, Issue.category, Issue.priority, func.count(Issue.id))
+        .group_by(Issue.status, Issue.category, Issue.priority)
+    )).all()
+
+    by_status, by_category, by_priority = {}, {}, {}
+    for status, category, priority, count in rows:
+        by_status[status] = by_status.get(status, 0) + count
+        by_category[category] = by_category.get(category, 0) + count
+        by_priority[priority] = by_priority.get(priority, 0) + count
 
     return {
-        "total_issues": total,
-        "pending": pending,
-        "in_progress": in_progress,
-        "resolved": resolved
+        "total_issues": sum(by_status.values()),
+        "pending": by_status.get("pending", 0),
+        "in_progress": by_status.get("in_progress", 0),
+        "resolved": by_status.get("resolved", 0),
+        "by_category": by_category,
+        "by_priority": by_priority
     }
 
 
+@app.get("/analytics/timeseries")
+async def get_analytics_timeseries(
+        request: Request,
+        bucket: Literal["day", "week"] = "day",
+        group_by: Literal["category", "location", "status"] = "category",
+        source: Literal["issues", "safety_reports"] = "issues",
+        periods: int = Query(30, ge=1, le=366, description="How many days or weeks, ending with the current one"),
+        top: int = Query(10, ge=1, le=50, description="Groups with their own series; the rest are summed as \"other\""),
+        db: AsyncSession = Depends(get_async_db)
+):
+    """Issues (or safety reports) created, or entering each status, per day or week; read from daily rollups."""
+    if not get_current_user(request):
+        raise HTTPException(status_code=401, detail="Authentication required")
+    if group_by not in rollups.DIMENSIONS[source]:
+        raise HTTPException(status_code=400, detail=f"{source} cannot be grouped by {group_by}")
+    return await rollups.timeseries(db, source, group_by, bucket, periods, top)
+
+
+@app.get("/analytics/hotspots")
+async def get_analytics_hotspots(
+        request: Request,
+        days: int = Query(30, ge=1, le=366, description="Count safety reports from this many days back"),
+        limit: int = Query(20, ge=1, le=100),
+        db: AsyncSession = Depends(get_async_db)
+):
+    """Places ranked by open issues plus recent safety reports (locations matched to canonical places)."""
+    if not get_current_user(request):
+        raise HTTPException(status_code=401, detail="Authentication required")
+    return {"days": days, "hotspots": await hotspots(db, days, limit)}
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics(request: Request):
+    """Prometheus metrics. Set METRICS_TOKEN to require `Authorization: Bearer <token>`."""
+    token = os.getenv("METRICS_TOKEN")
+    if token and not secrets.compare_digest(request.headers.get("authorization", ""), f"Bearer {token}"):
+        raise HTTPException(status_code=401, detail="Metrics token required")
+    return Response(render_metrics(), media_type="text/plain; version=0.0.4")
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run("main:app",  port=8000, reload=True)
@@ -0,0 +1,187 @@
+import bisect
+import contextvars
+import os
+import time
+import uuid
+
+from sqlalchemy import event
+
+from logs import get_logger, request_id
+
+# --- Request and database metrics ---
+# MetricsMiddleware times every request by route template (/issues/{issue_id},
+# not the raw path, so the label set stays small). SQLAlchemy cursor hooks
+# time every query and add it to the running request's totals, so the number
+# of queries a route makes and the time it spends in the database show up per
+# route. Queries slower than SLOW_QUERY_MS are logged with their SQL.
+# /metrics serves everything in the Prometheus text format. Values are per
+# process; with several workers, Prometheus scrapes and sums each of them.
+
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+logger = get_logger(__name__)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _label_string(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labels: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self._values = {}
+
+    def inc(self, labels: tuple = (), amount: float = 1):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        for labels, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_label_string(self.labels, labels)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, labels: tuple, buckets: tuple):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.buckets = buckets
+        self._series = {}  # labels -> [count per bucket (+Inf last), sum]
+
+    def observe(self, labels: tuple, value: float):
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect.bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for labels, (counts, total) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), counts):
+                cumulative += count
+                le = f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{_label_string(self.labels, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_label_string(self.labels, labels)} {total}")
+            lines.append(f"{self.name}_count{_label_string(self.labels, labels)} {cumulative}")
+        return lines
+
+
+http_request_seconds = Histogram(
+    "campusfix_http_request_duration_seconds", "Request latency by route",
+    ("method", "route", "status"), LATENCY_BUCKETS,
+)
+db_queries_per_request = Histogram(
+    "campusfix_db_queries_per_request", "Database queries made while handling one request",
+    ("method", "route"), QUERY_COUNT_BUCKETS,
+)
+db_seconds_per_request = Histogram(
+    "campusfix_db_time_per_request_seconds", "Time spent in the database while handling one request",
+    ("method", "route"), LATENCY_BUCKETS,
+)
+db_query_seconds = Histogram(
+    "campusfix_db_query_duration_seconds", "Latency of single database queries by statement type",
+    ("statement",), LATENCY_BUCKETS,
+)
+slow_queries = Counter("campusfix_db_slow_queries_total", f"Queries slower than SLOW_QUERY_MS ({SLOW_QUERY_MS:g} ms)")
+
+REGISTRY = (http_request_seconds, db_queries_per_request, db_seconds_per_request, db_query_seconds, slow_queries)
+
+
+def render_metrics() -> str:
+    return "\n".join(line for metric in REGISTRY for line in metric.render()) + "\n"
+
+
+# --- Query hooks ---
+
+class _RequestStats:
+    __slots__ = ("queries", "db_seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+
+
+_request_stats = contextvars.ContextVar("request_stats", default=None)
+
+_STATEMENT_TYPES = {"SELECT", "INSERT", "UPDATE", "DELETE", "WITH"}
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._query_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - context._query_started
+    verb = statement.split(None, 1)[0].upper() if statement.strip() else ""
+    db_query_seconds.observe((verb if verb in _STATEMENT_TYPES else "OTHER",), elapsed)
+
+    stats = _request_stats.get()
+    if stats:
+        stats.queries += 1
+        stats.db_seconds += elapsed
+    if elapsed * 1000 >= SLOW_QUERY_MS:
+        slow_queries.inc()
+        # The SQL only: parameters can hold personal data
+        logger.warning("Slow query", extra={"duration_ms": round(elapsed * 1000, 1), "statement": statement[:2000]})
+
+
+def instrument_engine(engine):
+    """Time every query `engine` runs (pass async engines' .sync_engine)."""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+# --- Middleware ---
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency and per-request query totals by route."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = _request_stats.set(_RequestStats())
+        current_id = uuid.uuid4().hex[:16]
+        request = request_id.set(current_id)
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                # Lets a client's bug report be matched with the server's log lines
+                message["headers"] = [*message.get("headers", []), (b"x-request-id", current_id.encode())]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - start
+            # FastAPI puts the matched route in the scope; unmatched paths share one label
+            route = getattr(scope.get("route"), "path", "unmatched")
+            totals = _request_stats.get()
+            http_request_seconds.observe((scope["method"], route, str(status)), elapsed)
+            db_queries_per_request.observe((scope["method"], route), totals.queries)
+            db_seconds_per_request.observe((scope["method"], route), totals.db_seconds)
+            _request_stats.reset(stats)
+            request_id.reset(request)
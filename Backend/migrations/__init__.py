@@ -0,0 +1,77 @@
+import importlib
+import pkgutil
+import re
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, select
+
+from logs import get_logger
+
+# --- Versioned schema migrations ---
+# Each vNNNN_<name>.py module in this package changes the schema in its
+# upgrade(conn) and is applied once, in version order, inside a transaction of
+# its own; schema_migrations records which versions a database has. On
+# Postgres a transaction-scoped advisory lock makes workers that start together
+# queue up: the first applies the pending versions, the others find them done.
+#
+# Migrations are the only thing that changes the schema: add a new module for
+# every change (never edit one that has shipped) and mirror it in models.py.
+# Run them with `python -m migrations`; the app also applies pending ones when
+# it starts.
+
+_MODULE = re.compile(r"v(\d{4})_(\w+)$")
+
+# Any constant works; it only has to be the same in every worker
+_ADVISORY_LOCK_KEY = 0x43465f4d  # "CF_M"
+
+logger = get_logger(__name__)
+
+_metadata = MetaData()
+schema_migrations = Table(
+    "schema_migrations", _metadata,
+    Column("version", Integer, primary_key=True),
+    Column("name", String, nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+
+def available() -> list:
+    """(version, name, module) for every migration in this package, in order."""
+    found = []
+    for info in pkgutil.iter_modules(__path__):
+        match = _MODULE.match(info.name)
+        if match:
+            found.append((int(match.group(1)), match.group(2), f"{__name__}.{info.name}"))
+    return sorted(found)
+
+
+def _lock(conn):
+    if conn.dialect.name == "postgresql":
+        conn.exec_driver_sql(f"SELECT pg_advisory_xact_lock({_ADVISORY_LOCK_KEY})")
+
+
+def applied(engine) -> dict:
+    """version -> applied_at for every migration the database has had."""
+    with engine.begin() as conn:
+        _lock(conn)
+        schema_migrations.create(conn, checkfirst=True)
+        return dict(conn.execute(select(schema_migrations.c.version, schema_migrations.c.applied_at)).all())
+
+
+def migrate(engine) -> list:
+    """Apply every pending migration; returns the names of those applied."""
+    done = applied(engine)
+    ran = []
+    for version, name, module in available():
+        if version in done:
+            continue
+        with engine.begin() as conn:
+            _lock(conn)
+            # Another worker may have applied it while this one waited for the lock
+            if conn.scalar(select(schema_migrations.c.version).where(schema_migrations.c.version == version)):
+                continue
+            importlib.import_module(module).upgrade(conn)
+            conn.execute(schema_migrations.insert().values(version=version, name=name, applied_at=datetime.utcnow()))
+        logger.info("Applied migration", extra={"version": version, "migration": name})
+        ran.append(f"v{version:04d}_{name}")
+    return ran
@@ -0,0 +1,32 @@
+"""
+Apply pending schema migrations to DATABASE_URL.
+
+    cd Backend
+    python -m migrations            # apply everything pending
+    python -m migrations --status   # list migrations and whether each is applied
+"""
+import argparse
+
+from logs import configure_logging
+from migrations import applied, available, migrate
+from models import engine
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--status", action="store_true", help="list migrations without applying any")
+    args = parser.parse_args()
+
+    if args.status:
+        done = applied(engine)
+        for version, name, _ in available():
+            print(f"v{version:04d}_{name:28s} {done[version].isoformat(timespec='seconds') if version in done else 'pending'}")
+        return
+
+    configure_logging()
+    ran = migrate(engine)
+    print(f"Applied {len(ran)} migration(s)" + (": " + ", ".join(ran) if ran else "; the schema is up to date"))
+
+
+if __name__ == "__main__":
+    main()
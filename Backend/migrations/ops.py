@@ -0,0 +1,41 @@
+from sqlalchemy import Column, Table, inspect, text
+
+# Schema operations for migrations. Every one of them is a no-op when its
+# change is already in place, so a migration can run against a database that
+# create_all or an older ad-hoc script had already brought partly up to date,
+# and can simply be re-run if it failed halfway (SQLite runs DDL outside the
+# migration's transaction).
+
+
+def has_table(conn, name: str) -> bool:
+    return inspect(conn).has_table(name)
+
+
+def has_column(conn, table: str, column: str) -> bool:
+    return column in {c["name"] for c in inspect(conn).get_columns(table)}
+
+
+def create_table(conn, table: Table):
+    """Create `table` (a frozen definition in the migration, not the model) if it does not exist."""
+    table.create(conn, checkfirst=True)
+
+
+def add_column(conn, table: str, column: Column, default_sql: str = None, references: str = None):
+    """
+    ALTER TABLE ... ADD COLUMN unless the column exists; `default_sql` also fills
+    existing rows, `references` ("table (column)") adds a foreign key.
+    """
+    if has_column(conn, table, column.name):
+        return
+    ddl = f"ALTER TABLE {table} ADD COLUMN {column.name} {column.type.compile(dialect=conn.dialect)}"
+    if default_sql is not None:
+        ddl += f" DEFAULT {default_sql}"
+    if references is not None:
+        ddl += f" REFERENCES {references}"
+    conn.execute(text(ddl))
+
+
+def create_index(conn, name: str, table: str, *columns: str, unique: bool = False):
+    conn.execute(text(
+        f"CREATE {'UNIQUE ' if unique else ''}INDEX IF NOT EXISTS {name} ON {table} ({', '.join(columns)})"
+    ))
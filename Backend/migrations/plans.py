@@ -0,0 +1,153 @@
+"""
+EXPLAIN check for the hot query paths.
+
+Builds each query the way the app does, asks the database for its plan and
+fails if any of them reads a whole table or sorts rows the index should
+already have returned in order:
+
+    cd Backend
+    python -m migrations.plans              # exit status 1 if a query regressed
+    python -m migrations.plans --verbose    # print every plan
+
+SQLite: a SCAN of a table without an index, or a temp B-tree for ORDER BY /
+GROUP BY, fails. Postgres: sequential scans and sorts are disabled for the
+check, so a "Seq Scan" or "Sort" node in the plan means no index could serve
+the query. Run it against a database with realistic data
+(python -m benchmarks.generate): on a near-empty SQLite table that has been
+ANALYZEd, a full scan can legitimately be the cheapest plan.
+"""
+import argparse
+import json
+import re
+from datetime import datetime
+
+from sqlalchemy import delete, func, select, text, update
+
+from locations import alias_query, open_issues_query, safety_incidents_query
+from migrations import migrate
+from models import AnalyticsDaily, AuthToken, IdempotencyKey, Issue, IssueStatusHistory, SafetyReport, engine
+from pagination import encode_cursor, page_query
+from projection import project
+from sync import changes_query, head_query, window_query
+
+PAGE = 51  # DEFAULT_PAGE_SIZE plus the row that tells whether there is a next page
+_CURSOR = encode_cursor(datetime(2024, 1, 1), 1000)
+_SHA256 = "0" * 64
+
+
+def _issues():
+    return project(Issue, ["id", "description", "location", "status", "created_at"])
+
+
+def _reports():
+    return project(SafetyReport, ["id", "description", "location", "status", "created_at"])
+
+
+def hot_queries() -> list:
+    """(name, statement) for every query on a hot path."""
+    return [
+        ("issues: first page", page_query(_issues(), Issue, None, PAGE)),
+        ("issues: next page", page_query(_issues(), Issue, _CURSOR, PAGE)),
+        ("issues: by status", page_query(_issues().where(Issue.status == "pending"), Issue, _CURSOR, PAGE)),
+        ("issues: by category", page_query(_issues().where(Issue.category == "safety_hazard"), Issue, _CURSOR, PAGE)),
+        ("issues: mine", page_query(_issues().where(Issue.user_id == "user-1"), Issue, _CURSOR, PAGE)),
+        ("issues: at location", select(Issue.id).where(Issue.location == "Library - Room 1")),
+        ("issues: sync token", head_query(Issue)),
+        ("issues: sync window", window_query(Issue, datetime(2024, 1, 1))),
+        ("issues: changes", changes_query(_issues().add_columns(Issue.updated_at), Issue, _CURSOR, PAGE)),
+        ("issues: stored image", select(Issue.image_url).where(
+            Issue.image_sha256 == _SHA256, Issue.image_status == "uploaded").limit(1)),
+        ("issues: stale uploads", update(Issue).where(
+            Issue.image_status == "pending", Issue.updated_at < datetime(2024, 1, 1)).values(image_status="failed")),
+        ("issues: analytics", select(Issue.status, Issue.category, Issue.priority, func.count(Issue.id))
+            .group_by(Issue.status, Issue.category, Issue.priority)),
+        ("issues: status history", select(IssueStatusHistory.status, IssueStatusHistory.changed_at)
+            .where(IssueStatusHistory.issue_id == 1000).order_by(IssueStatusHistory.changed_at)),
+        ("issues: resolved since", select(IssueStatusHistory.issue_id).where(
+            IssueStatusHistory.status == "resolved", IssueStatusHistory.changed_at >= datetime(2024, 1, 1))),
+        ("analytics: time series", select(AnalyticsDaily.day, AnalyticsDaily.value, func.sum(AnalyticsDaily.count))
+            .where(AnalyticsDaily.source == "issues", AnalyticsDaily.dimension == "location",
+                   AnalyticsDaily.day >= datetime(2024, 1, 1).date())
+            .group_by(AnalyticsDaily.day, AnalyticsDaily.value)),
+        ("locations: alias", alias_query("library room 1")),
+        ("locations: open issues", open_issues_query()),
+        ("locations: safety incidents", safety_incidents_query(datetime(2024, 1, 1))),
+        ("safety reports: first page", page_query(_reports(), SafetyReport, None, PAGE)),
+        ("safety reports: next page", page_query(_reports(), SafetyReport, _CURSOR, PAGE)),
+        ("safety reports: by status", page_query(
+            _reports().where(SafetyReport.status == "received"), SafetyReport, _CURSOR, PAGE)),
+        ("safety reports: sync token", head_query(SafetyReport)),
+        ("safety reports: sync window", window_query(SafetyReport, datetime(2024, 1, 1))),
+        ("safety reports: community feed", _reports().order_by(SafetyReport.created_at.desc()).limit(50)),
+        ("safety reports: stored media", select(SafetyReport.media_url).where(
+            SafetyReport.media_sha256 == _SHA256, SafetyReport.media_url.isnot(None)).limit(1)),
+        ("auth tokens: sweep", delete(AuthToken).where(
+            AuthToken.key.startswith("mobile_token:"), AuthToken.expires_at < datetime(2024, 1, 1))),
+        ("idempotency keys: sweep", delete(IdempotencyKey).where(IdempotencyKey.expires_at < datetime(2024, 1, 1))),
+    ]
+
+
+# "SCAN issues" or "SCAN TABLE issues" (older SQLite) is a full scan; "SCAN issues USING INDEX ..." is not
+_SQLITE_FULL_SCAN = re.compile(r"^SCAN (TABLE )?\w+$")
+_SQLITE_SORT = re.compile(r"USE TEMP B-TREE FOR (ORDER|GROUP) BY")
+
+
+def _sqlite_plan(conn, sql: str, params):
+    details = [row[3] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}", params)]
+    problems = [d for d in details if _SQLITE_FULL_SCAN.match(d) or _SQLITE_SORT.search(d)]
+    return "\n".join(details), problems
+
+
+def _postgres_nodes(node: dict):
+    yield node
+    for child in node.get("Plans", ()):
+        yield from _postgres_nodes(child)
+
+
+def _postgres_plan(conn, sql: str, params):
+    conn.execute(text("SET LOCAL enable_seqscan = off"))
+    conn.execute(text("SET LOCAL enable_sort = off"))
+    plan = conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {sql}", params).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    nodes = list(_postgres_nodes(plan[0]["Plan"]))
+    lines = [f"{n['Node Type']} {n.get('Index Name') or n.get('Relation Name') or ''}".strip() for n in nodes]
+    problems = [line for line in lines if line.startswith(("Seq Scan", "Sort", "Incremental Sort"))]
+    return "\n".join(lines), problems
+
+
+def check(engine, verbose: bool = False) -> bool:
+    """Print the verdict for every hot query; returns False if any needs a full scan or a sort."""
+    if engine.dialect.name == "sqlite":
+        explain = _sqlite_plan
+    elif engine.dialect.name == "postgresql":
+        explain = _postgres_plan
+    else:
+        raise SystemExit(f"No plan check for {engine.dialect.name}")
+
+    ok = True
+    for name, stmt in hot_queries():
+        compiled = stmt.compile(dialect=engine.dialect, compile_kwargs={"literal_binds": True})
+        # A few constructs (IS DISTINCT FROM on SQLite) keep their parameter even with literal_binds
+        values = compiled.construct_params()
+        params = tuple(values[key] for key in compiled.positiontup) if compiled.positional else values
+        # Closing the connection rolls back the SET LOCALs (and the sweeps are only EXPLAINed)
+        with engine.connect() as conn:
+            plan, problems = explain(conn, str(compiled), params or None)
+        print(f"{'FAIL' if problems else 'ok  '}  {name}")
+        if problems or verbose:
+            print("        " + plan.replace("\n", "\n        "))
+        ok = ok and not problems
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--verbose", action="store_true", help="print every plan")
+    args = parser.parse_args()
+    migrate(engine)
+    raise SystemExit(0 if check(engine, args.verbose) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, Text
+
+from migrations.ops import add_column, create_index, create_table
+
+# The issues and safety_reports tables as they were before migrations. On an
+# existing database this only adds priority and category if the database
+# predates them (what add_priority_column.py used to do).
+
+metadata = MetaData()
+
+issues = Table(
+    "issues", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("description", Text, nullable=False),
+    Column("location", String, nullable=False),
+    Column("image_url", String),
+    Column("status", String),
+    Column("upvotes", Integer),
+    Column("created_at", DateTime),
+    Column("user_id", String),
+    Column("reporter_name", String),
+    Column("reporter_email", String),
+    Column("priority", String),
+    Column("category", String),
+)
+
+safety_reports = Table(
+    "safety_reports", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("description", Text, nullable=False),
+    Column("location", String, nullable=False),
+    Column("media_url", String),
+    Column("is_nsfw", Integer),
+    Column("created_at", DateTime),
+    Column("status", String),
+    Column("is_critical", Integer),
+)
+
+
+def upgrade(conn):
+    create_table(conn, issues)
+    create_table(conn, safety_reports)
+    create_index(conn, "ix_issues_id", "issues", "id")
+    create_index(conn, "ix_safety_reports_id", "safety_reports", "id")
+    add_column(conn, "issues", Column("priority", String), default_sql="'medium'")
+    add_column(conn, "issues", Column("category", String), default_sql="'general'")
@@ -0,0 +1,16 @@
+from sqlalchemy import Column, DateTime, text
+
+from migrations.ops import add_column, create_index
+
+# updated_at for the delta feed, backfilled from created_at (what
+# add_updated_at_column.py used to do), and the (created_at, id) and
+# (updated_at, id) indexes keyset pagination and /sync walk.
+
+
+def upgrade(conn):
+    for table in ("issues", "safety_reports"):
+        add_column(conn, table, Column("updated_at", DateTime))
+        # Existing rows were last written when they were created
+        conn.execute(text(f"UPDATE {table} SET updated_at = created_at WHERE updated_at IS NULL"))
+        create_index(conn, f"ix_{table}_created_at_id", table, "created_at", "id")
+        create_index(conn, f"ix_{table}_updated_at_id", table, "updated_at", "id")
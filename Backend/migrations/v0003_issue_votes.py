@@ -0,0 +1,24 @@
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, MetaData, String, Table
+
+from migrations.ops import create_index, create_table
+
+# One row per (issue, user) upvote.
+
+metadata = MetaData()
+
+# Only what the foreign key needs to resolve; the table itself exists already
+Table("issues", metadata, Column("id", Integer, primary_key=True))
+
+issue_votes = Table(
+    "issue_votes", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("issue_id", Integer, ForeignKey("issues.id"), nullable=False),
+    Column("user_id", String, nullable=False),
+    Column("created_at", DateTime),
+)
+
+
+def upgrade(conn):
+    create_table(conn, issue_votes)
+    create_index(conn, "ix_issue_votes_id", "issue_votes", "id")
+    create_index(conn, "ux_issue_votes_issue_user", "issue_votes", "issue_id", "user_id", unique=True)
@@ -0,0 +1,20 @@
+from sqlalchemy import Column, String, text
+
+from migrations.ops import add_column, create_index
+
+# Upload state, resized variants and content hashes of attached photos.
+
+
+def upgrade(conn):
+    add_column(conn, "issues", Column("image_status", String))
+    add_column(conn, "issues", Column("thumbnail_url", String))
+    add_column(conn, "issues", Column("medium_url", String))
+    add_column(conn, "issues", Column("image_sha256", String(64)))
+    create_index(conn, "ix_issues_image_sha256", "issues", "image_sha256")
+    # Images attached before background uploads were uploaded synchronously
+    conn.execute(text("UPDATE issues SET image_status = 'uploaded' WHERE image_url IS NOT NULL AND image_status IS NULL"))
+
+    add_column(conn, "safety_reports", Column("thumbnail_url", String))
+    add_column(conn, "safety_reports", Column("medium_url", String))
+    add_column(conn, "safety_reports", Column("media_sha256", String(64)))
+    create_index(conn, "ix_safety_reports_media_sha256", "safety_reports", "media_sha256")
@@ -0,0 +1,7 @@
+from migrations.ops import create_index
+
+# Covers the single-pass GROUP BY in /analytics.
+
+
+def upgrade(conn):
+    create_index(conn, "ix_issues_status_category_priority", "issues", "status", "category", "priority")
@@ -0,0 +1,8 @@
+from search import create_search_indexes
+
+# FTS5 tables and triggers on SQLite, a generated tsvector column with a GIN
+# index on Postgres; see search.py.
+
+
+def upgrade(conn):
+    create_search_indexes(conn)
@@ -0,0 +1,19 @@
+from sqlalchemy import Column, DateTime, MetaData, String, Table, Text
+
+from migrations.ops import create_index, create_table
+
+# OAuth states and mobile tokens shared by all workers; see token_store.py.
+
+metadata = MetaData()
+
+auth_tokens = Table(
+    "auth_tokens", metadata,
+    Column("key", String, primary_key=True),
+    Column("value", Text, nullable=False),
+    Column("expires_at", DateTime, nullable=False),
+)
+
+
+def upgrade(conn):
+    create_table(conn, auth_tokens)
+    create_index(conn, "ix_auth_tokens_expires_at", "auth_tokens", "expires_at")
@@ -0,0 +1,20 @@
+from sqlalchemy import Column, DateTime, MetaData, String, Table, Text
+
+from migrations.ops import create_index, create_table
+
+# Claimed Idempotency-Key headers and the responses they replay; see idempotency.py.
+
+metadata = MetaData()
+
+idempotency_keys = Table(
+    "idempotency_keys", metadata,
+    Column("key", String, primary_key=True),
+    Column("fingerprint", String(64), nullable=False),
+    Column("response", Text),
+    Column("expires_at", DateTime, nullable=False),
+)
+
+
+def upgrade(conn):
+    create_table(conn, idempotency_keys)
+    create_index(conn, "ix_idempotency_keys_expires_at", "idempotency_keys", "expires_at")
@@ -0,0 +1,15 @@
+from migrations.ops import create_index
+
+# Indexes for the filtered lists: issues by status, category or reporter and
+# safety reports by status come back newest first, so each index ends in
+# (created_at, id) and a page is read straight off it without a sort.
+# Location lookups (duplicate checks, per-place lists) get a plain index.
+
+
+def upgrade(conn):
+    create_index(conn, "ix_issues_status_created_at_id", "issues", "status", "created_at", "id")
+    create_index(conn, "ix_issues_category_created_at_id", "issues", "category", "created_at", "id")
+    create_index(conn, "ix_issues_user_id_created_at_id", "issues", "user_id", "created_at", "id")
+    create_index(conn, "ix_issues_location", "issues", "location")
+    create_index(conn, "ix_safety_reports_status_created_at_id", "safety_reports", "status", "created_at", "id")
+    create_index(conn, "ix_safety_reports_location", "safety_reports", "location")
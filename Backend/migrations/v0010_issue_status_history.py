@@ -0,0 +1,25 @@
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, MetaData, String, Table
+
+from migrations.ops import create_index, create_table
+
+# Every status change of an issue, written in the transaction that makes it.
+# Earlier changes were not recorded, so existing issues start with no history.
+
+metadata = MetaData()
+
+Table("issues", metadata, Column("id", Integer, primary_key=True))
+
+issue_status_history = Table(
+    "issue_status_history", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("issue_id", Integer, ForeignKey("issues.id"), nullable=False),
+    Column("status", String, nullable=False),
+    Column("changed_at", DateTime, nullable=False),
+    Column("changed_by", String),
+)
+
+
+def upgrade(conn):
+    create_table(conn, issue_status_history)
+    create_index(conn, "ix_issue_status_history_issue_id_changed_at", "issue_status_history", "issue_id", "changed_at")
+    create_index(conn, "ix_issue_status_history_status_changed_at", "issue_status_history", "status", "changed_at")
@@ -0,0 +1,18 @@
+from sqlalchemy import Column, DateTime, MetaData, String, Table
+
+from migrations.ops import create_table
+
+# Leases that keep a periodic job to one worker at a time; see jobs.py.
+
+metadata = MetaData()
+
+job_leases = Table(
+    "job_leases", metadata,
+    Column("name", String, primary_key=True),
+    Column("holder", String, nullable=False),
+    Column("expires_at", DateTime, nullable=False),
+)
+
+
+def upgrade(conn):
+    create_table(conn, job_leases)
@@ -0,0 +1,21 @@
+from sqlalchemy import Column, Date, Integer, MetaData, String, Table
+
+from migrations.ops import create_table
+
+# Daily counters behind /analytics/timeseries; see rollups.py. The table
+# starts empty: `python -m rollups` fills in the history.
+
+metadata = MetaData()
+
+analytics_daily = Table(
+    "analytics_daily", metadata,
+    Column("source", String, primary_key=True),
+    Column("dimension", String, primary_key=True),
+    Column("day", Date, primary_key=True),
+    Column("value", String, primary_key=True),
+    Column("count", Integer, nullable=False),
+)
+
+
+def upgrade(conn):
+    create_table(conn, analytics_daily)
@@ -0,0 +1,33 @@
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, MetaData, String, Table
+
+from migrations.ops import add_column, create_index, create_table
+
+# Canonical places with their alternative spellings, and a location_id on
+# issues and safety reports. Existing rows keep a NULL location_id until
+# `python -m locations` matches them.
+
+metadata = MetaData()
+
+locations = Table(
+    "locations", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("name", String, nullable=False),
+    Column("key", String, nullable=False, unique=True),
+    Column("created_at", DateTime),
+)
+
+location_aliases = Table(
+    "location_aliases", metadata,
+    Column("alias", String, primary_key=True),
+    Column("location_id", Integer, ForeignKey("locations.id"), nullable=False),
+)
+
+
+def upgrade(conn):
+    create_table(conn, locations)
+    create_table(conn, location_aliases)
+    create_index(conn, "ix_location_aliases_location_id", "location_aliases", "location_id")
+    for table in ("issues", "safety_reports"):
+        add_column(conn, table, Column("location_id", Integer), references="locations (id)")
+    create_index(conn, "ix_issues_location_id_status", "issues", "location_id", "status")
+    create_index(conn, "ix_safety_reports_location_id_created_at", "safety_reports", "location_id", "created_at")
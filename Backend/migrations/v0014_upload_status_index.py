@@ -0,0 +1,8 @@
+from migrations.ops import create_index
+
+# Lets the stale-upload sweep (uploads.fail_stale_uploads) find pending images
+# without scanning issues.
+
+
+def upgrade(conn):
+    create_index(conn, "ix_issues_image_status_updated_at", "issues", "image_status", "updated_at")
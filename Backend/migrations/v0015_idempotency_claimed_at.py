@@ -0,0 +1,12 @@
+from sqlalchemy import Column, DateTime, text
+
+from migrations.ops import add_column
+
+# When each Idempotency-Key was claimed, so a claim whose request died before
+# storing a response can be taken over (see idempotency.py). Keys claimed
+# before this migration count from now.
+
+
+def upgrade(conn):
+    add_column(conn, "idempotency_keys", Column("claimed_at", DateTime))
+    conn.execute(text("UPDATE idempotency_keys SET claimed_at = CURRENT_TIMESTAMP WHERE claimed_at IS NULL"))
@@ -1,6 +1,7 @@
-from sqlalchemy import create_engine, Column, Integer, String, DateTime, Text
+from sqlalchemy import create_engine, Column, Integer, String, Date, DateTime, Text, Index, ForeignKey
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from datetime import datetime
 
 import os
@@ -19,9 +20,43 @@ engine = create_engine(
 )
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+
+def to_async_url(url: str) -> str:
+    """Map a sync DATABASE_URL onto its async driver (asyncpg / aiosqlite)."""
+    if url.startswith("sqlite://"):
+        return url.replace("sqlite://", "sqlite+aiosqlite://", 1)
+    for prefix in ("postgresql+psycopg2://", "postgresql://", "postgres://"):
+        if url.startswith(prefix):
+            # asyncpg spells libpq's sslmode as ssl
+            return url.replace(prefix, "postgresql+asyncpg://", 1).replace("sslmode=", "ssl=")
+    return url
+
+
+# Route handlers are async, so they use this engine to avoid blocking the event loop.
+# Scripts (seed_data.py etc.) keep using the sync engine above.
+async_engine = create_async_engine(to_async_url(SQLALCHEMY_DATABASE_URL))
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
 
+class Location(Base):
+    __tablename__ = "locations"
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String, nullable=False)  # How it was first (or most often) written
+    key = Column(String, nullable=False, unique=True)  # Normalized name; see locations.location_key
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class LocationAlias(Base):
+    __tablename__ = "location_aliases"
+
+    # Every normalized spelling seen for a place, its own name included
+    alias = Column(String, primary_key=True)
+    location_id = Column(Integer, ForeignKey("locations.id"), nullable=False, index=True)
+
+
 class Issue(Base):
     __tablename__ = "issues"
 
@@ -29,14 +64,69 @@ class Issue(Base):
     description = Column(Text, nullable=False)
     location = Column(String, nullable=False)
     image_url = Column(String, nullable=True)
+    image_status = Column(String, nullable=True)  # pending, uploaded, failed; NULL when there is no image
+    thumbnail_url = Column(String, nullable=True)
+    medium_url = Column(String, nullable=True)
+    image_sha256 = Column(String(64), nullable=True, index=True)  # Dedupes re-submitted photos
     status = Column(String, default="pending")  # pending, in_progress, resolved
     upvotes = Column(Integer, default=0)
     created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     user_id = Column(String, nullable=True)
     reporter_name = Column(String, nullable=True)
     reporter_email = Column(String, nullable=True)
     priority = Column(String, default="medium") # high, medium, low
     category = Column(String, default="general") # general, safety_hazard
+    location_id = Column(Integer, ForeignKey("locations.id"), nullable=True)  # Canonical place; see locations.py
+
+    # Created by the migrations in migrations/; keep these in step with them.
+    # Back keyset pagination over (created_at, id) and the delta feed over (updated_at, id)
+    __table_args__ = (
+        Index("ix_issues_created_at_id", "created_at", "id"),
+        Index("ix_issues_updated_at_id", "updated_at", "id"),
+        # Covers the single-pass GROUP BY in /analytics
+        Index("ix_issues_status_category_priority", "status", "category", "priority"),
+        # Filtered lists, newest first
+        Index("ix_issues_status_created_at_id", "status", "created_at", "id"),
+        Index("ix_issues_category_created_at_id", "category", "created_at", "id"),
+        Index("ix_issues_user_id_created_at_id", "user_id", "created_at", "id"),
+        Index("ix_issues_location", "location"),
+        # Open issues per place (/analytics/hotspots), read from the index alone
+        Index("ix_issues_location_id_status", "location_id", "status"),
+        # Finds images left pending by a lost upload job (uploads.fail_stale_uploads)
+        Index("ix_issues_image_status_updated_at", "image_status", "updated_at"),
+    )
+
+
+class IssueVote(Base):
+    __tablename__ = "issue_votes"
+
+    id = Column(Integer, primary_key=True, index=True)
+    issue_id = Column(Integer, ForeignKey("issues.id"), nullable=False)
+    user_id = Column(String, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    # One vote per user per issue; a repeat vote hits this index and becomes a no-op
+    __table_args__ = (Index("ux_issue_votes_issue_user", "issue_id", "user_id", unique=True),)
+
+
+class IssueStatusHistory(Base):
+    __tablename__ = "issue_status_history"
+
+    # One row per status change: the status an issue moved to and when. An issue starts
+    # out "pending" at its created_at, so the previous status is the row before
+    # (LAG over changed_at) and time-to-resolve is changed_at - issues.created_at.
+    id = Column(Integer, primary_key=True)
+    issue_id = Column(Integer, ForeignKey("issues.id"), nullable=False)
+    status = Column(String, nullable=False)
+    changed_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    changed_by = Column(String, nullable=True)  # Email of the admin who made the change
+
+    __table_args__ = (
+        Index("ix_issue_status_history_issue_id_changed_at", "issue_id", "changed_at"),
+        # "Resolved this week" and similar reports
+        Index("ix_issue_status_history_status_changed_at", "status", "changed_at"),
+    )
 
 
 class SafetyReport(Base):
@@ -46,10 +136,64 @@ class SafetyReport(Base):
     description = Column(Text, nullable=False)
     location = Column(String, nullable=False)
     media_url = Column(String, nullable=True)
+    thumbnail_url = Column(String, nullable=True)
+    medium_url = Column(String, nullable=True)
+    media_sha256 = Column(String(64), nullable=True, index=True)
     is_nsfw = Column(Integer, default=0) # 0=False, 1=True (using Integer for SQLite boolean compatibility if needed, though SQLAlchemy handles Boolean)
     created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     status = Column(String, default="received") # received, investigating, resolved
     is_critical = Column(Integer, default=1) # Default to True (1) as safety issues are critical
+    location_id = Column(Integer, ForeignKey("locations.id"), nullable=True)
+
+    __table_args__ = (
+        Index("ix_safety_reports_created_at_id", "created_at", "id"),
+        Index("ix_safety_reports_updated_at_id", "updated_at", "id"),
+        Index("ix_safety_reports_status_created_at_id", "status", "created_at", "id"),
+        Index("ix_safety_reports_location", "location"),
+        Index("ix_safety_reports_location_id_created_at", "location_id", "created_at"),
+    )
+
+
+class AuthToken(Base):
+    __tablename__ = "auth_tokens"
+
+    # "<namespace>:<token>", e.g. "mobile_token:..."; see token_store.py
+    key = Column(String, primary_key=True)
+    value = Column(Text, nullable=False)  # JSON
+    expires_at = Column(DateTime, nullable=False, index=True)
+
+
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+
+    # "<scope>:<Idempotency-Key header>", e.g. "issues:<user id>:<uuid>"; see idempotency.py
+    key = Column(String, primary_key=True)
+    fingerprint = Column(String(64), nullable=False)  # Hash of the request it was first used with
+    response = Column(Text, nullable=True)  # JSON; NULL while that request is still running
+    claimed_at = Column(DateTime, nullable=True)
+    expires_at = Column(DateTime, nullable=False, index=True)
+
+
+class AnalyticsDaily(Base):
+    __tablename__ = "analytics_daily"
+
+    # Counters for /analytics/timeseries, maintained by rollups.py. The key order
+    # makes "one dimension of one source over a date range" a primary key range.
+    source = Column(String, primary_key=True)  # issues, safety_reports
+    dimension = Column(String, primary_key=True)  # category, location, status
+    day = Column(Date, primary_key=True)
+    value = Column(String, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+
+class JobLease(Base):
+    __tablename__ = "job_leases"
+
+    # Which worker may run a periodic job, and until when; see jobs.py
+    name = Column(String, primary_key=True)
+    holder = Column(String, nullable=False)
+    expires_at = Column(DateTime, nullable=False)
 
 
 def get_db():
@@ -58,3 +202,8 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,93 @@
+import asyncio
+import os
+import signal
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+from logs import get_logger
+
+try:
+    from nude import Nude
+    from PIL import Image
+except ImportError:
+    Nude = None
+
+# --- NSFW classification off the event loop ---
+# nude.py is pure-Python per-pixel work, so it runs in a process pool on a
+# downscaled copy of the image. Each job is bounded by a hard timeout enforced
+# inside the worker, so a pathological image cannot pin a worker forever.
+
+NSFW_WORKERS = int(os.getenv("NSFW_WORKERS", "2"))
+NSFW_TIMEOUT_SECONDS = float(os.getenv("NSFW_TIMEOUT_SECONDS", "10"))
+NSFW_THUMBNAIL_SIZE = int(os.getenv("NSFW_THUMBNAIL_SIZE", "320"))
+
+logger = get_logger(__name__)
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+class _ClassificationTimeout(Exception):
+    pass
+
+
+def _on_alarm(signum, frame):
+    raise _ClassificationTimeout()
+
+
+def classify_file(path: str, thumbnail_size: int = NSFW_THUMBNAIL_SIZE, timeout: float = NSFW_TIMEOUT_SECONDS) -> bool:
+    """Runs in a pool worker: downscale the image, then classify it."""
+    # Pool workers run tasks on their main thread, so SIGALRM can interrupt the pixel loop
+    signal.signal(signal.SIGALRM, _on_alarm)
+    signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        with Image.open(path) as image:
+            # JPEG can decode straight at a reduced scale, which skips most of the work
+            image.draft("RGB", (thumbnail_size, thumbnail_size))
+            image = image.convert("RGB")
+            image.thumbnail((thumbnail_size, thumbnail_size))
+        # nudepy 0.4 only opens images by path
+        with tempfile.NamedTemporaryFile(suffix=".png") as thumbnail:
+            image.save(thumbnail, "PNG")
+            thumbnail.flush()
+            return bool(Nude(thumbnail.name).parse().result)
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+
+
+def start_moderation_pool():
+    global _pool
+    if Nude is not None:
+        _pool = ProcessPoolExecutor(max_workers=NSFW_WORKERS)
+
+
+def stop_moderation_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def classifier_available() -> bool:
+    return Nude is not None
+
+
+async def classify(path: str) -> Optional[bool]:
+    """
+    Classify the image at `path` in the process pool.
+    Returns None if the classifier is unavailable, fails or times out.
+    """
+    if _pool is None:
+        return None
+    loop = asyncio.get_running_loop()
+    try:
+        # The worker enforces the timeout itself; this is only a backstop
+        return await asyncio.wait_for(
+            loop.run_in_executor(_pool, classify_file, path),
+            timeout=NSFW_TIMEOUT_SECONDS + 5,
+        )
+    except _ClassificationTimeout:
+        logger.warning("NSFW check timed out", extra={"timeout_seconds": NSFW_TIMEOUT_SECONDS})
+    except Exception as e:
+        logger.warning("NSFW check failed", extra={"error": str(e)})
+    return None
@@ -0,0 +1,56 @@
+import base64
+import json
+from datetime import datetime
+from typing import Optional
+
+from fastapi import HTTPException
+from sqlalchemy import and_, or_
+
+# --- Keyset (cursor) pagination ---
+# Lists are ordered newest first by (created_at, id). The cursor is the
+# sort key of the last row the client has seen, so each page is a single
+# index range scan no matter how deep the client has paged.
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    raw = json.dumps([created_at.isoformat(), row_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(created_at), int(row_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def page_query(stmt, model, cursor: Optional[str], limit: int):
+    """`stmt` restricted to the page after `cursor`, plus one row to tell whether another page exists."""
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        stmt = stmt.where(or_(
+            model.created_at < created_at,
+            and_(model.created_at == created_at, model.id < row_id),
+        ))
+
+    return stmt.order_by(model.created_at.desc(), model.id.desc()).limit(limit + 1)
+
+
+async def paginate(db, stmt, model, cursor: Optional[str], limit: int):
+    """
+    Apply keyset ordering to the `stmt` select and return (rows, next_cursor).
+    `model` must have `created_at` and `id` columns, and `stmt` must select them
+    (see projection.project); rows are returned as tuples.
+    """
+    rows = (await db.execute(page_query(stmt, model, cursor, limit))).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+    return rows, next_cursor
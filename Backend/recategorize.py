@@ -0,0 +1,67 @@
+import argparse
+
+from sqlalchemy import bindparam, select, update
+
+import rollups
+from categorization import categorizer
+from models import Issue, SessionLocal
+
+
+def recategorize(batch_size: int = 1000, update_priority: bool = True, dry_run: bool = False):
+    """
+    Re-run every issue through the categorizer, walking the table in id order.
+    The analytics_daily category counters move with each changed issue.
+    """
+    db = SessionLocal()
+    last_id = 0
+    scanned = changed = 0
+
+    stmt = update(Issue.__table__).where(Issue.__table__.c.id == bindparam("row_id")).values(
+        category=bindparam("new_category"),
+        priority=bindparam("new_priority"),
+    )
+
+    try:
+        while True:
+            rows = db.execute(
+                select(Issue.id, Issue.description, Issue.category, Issue.priority, Issue.created_at)
+                .where(Issue.id > last_id)
+                .order_by(Issue.id)
+                .limit(batch_size)
+            ).all()
+            if not rows:
+                break
+            last_id = rows[-1].id
+            scanned += len(rows)
+
+            updates = []
+            removed, added = [], []
+            for row in rows:
+                category, priority = categorizer.classify(row.description or "")
+                if not update_priority:
+                    priority = row.priority
+                if (category, priority) != (row.category, row.priority):
+                    updates.append({"row_id": row.id, "new_category": category, "new_priority": priority})
+                    old, new = rollups.moved("issues", "category", row.created_at, row.category, category)
+                    removed += old
+                    added += new
+
+            changed += len(updates)
+            if updates and not dry_run:
+                # One executemany per batch (updated_at is bumped too, so synced clients see the change);
+                # committed per batch, with its counter changes, so progress survives an interruption
+                db.connection().execute(stmt, updates)
+                rollups.record_sync(db.connection(), added, removed)
+                db.commit()
+            print(f"Scanned {scanned} issues, {changed} {'would change' if dry_run else 'updated'}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-categorize existing issues with categories.json")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--keep-priority", action="store_true", help="only update category")
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+    recategorize(args.batch_size, update_priority=not args.keep_priority, dry_run=args.dry_run)
@@ -0,0 +1,195 @@
+import argparse
+import time
+from collections import Counter
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import and_, delete, exists, func, insert, literal, select, union_all
+from sqlalchemy.dialects import postgresql, sqlite
+
+from migrations import migrate
+from models import AnalyticsDaily, Issue, IssueStatusHistory, Location, SafetyReport, engine
+
+# --- Daily counters behind /analytics/timeseries ---
+# analytics_daily holds one counter per (source, dimension, day, value): how
+# many issues and safety reports were created each day per category (issues
+# only) and per place (its canonical name; see locations.py), and how many
+# entered each status that day (being created counts as entering the initial
+# status). The writes that create rows or change a status add to the counters
+# in the same transaction, so a time series reads a few hundred counters
+# instead of the raw tables. So do the scripts that rewrite existing rows:
+# recategorize.py moves each changed issue to its new category, and
+# `python -m locations` moves linked rows to their canonical place, both on the
+# rows' creation day.
+#
+# `python -m rollups` rebuilds every counter from the raw tables (run it once
+# after upgrading, or to repair them). Status changes from before
+# issue_status_history existed are taken from each row's current status and
+# updated_at; safety reports have no status history, so the same goes for them.
+
+DIMENSIONS = {
+    "issues": ("category", "location", "status"),
+    "safety_reports": ("location", "status"),
+}
+INITIAL_STATUS = {"issues": "pending", "safety_reports": "received"}
+UNKNOWN = "unknown"
+
+
+def created(source: str, created_at: datetime, **values) -> list:
+    """Counter events for one new row; `values` holds its category/location (and status if set)."""
+    values.setdefault("status", INITIAL_STATUS[source])
+    return [(source, dimension, created_at.date(), values.get(dimension) or UNKNOWN) for dimension in DIMENSIONS[source]]
+
+
+def status_changed(source: str, status: str, changed_at: datetime, count: int = 1) -> list:
+    return [(source, "status", changed_at.date(), status)] * count
+
+
+def moved(source: str, dimension: str, created_at: datetime, old, new) -> tuple:
+    """(removed, added) events for a row whose `dimension` value changed from `old` to `new`."""
+    if created_at is None:
+        return [], []
+    day = created_at.date()
+    return [(source, dimension, day, old or UNKNOWN)], [(source, dimension, day, new or UNKNOWN)]
+
+
+def _upsert(dialect_name: str):
+    insert_ = postgresql.insert if dialect_name == "postgresql" else sqlite.insert
+    stmt = insert_(AnalyticsDaily)
+    return stmt.on_conflict_do_update(
+        index_elements=["source", "dimension", "day", "value"],
+        set_={"count": AnalyticsDaily.count + stmt.excluded["count"]},
+    )
+
+
+def _counter_rows(events: list, removed: list) -> list:
+    counts = Counter(events)
+    counts.subtract(removed)
+    # One row per key: an upsert may not hit the same row twice in one statement
+    return [
+        {"source": source, "dimension": dimension, "day": day, "value": value, "count": count}
+        for (source, dimension, day, value), count in counts.items()
+        if count
+    ]
+
+
+async def record(db, events: list, removed: list = ()):
+    """Add `events` to the counters and take `removed` off; the caller commits, with the change they count."""
+    rows = _counter_rows(events, removed)
+    if rows:
+        await db.execute(_upsert(db.bind.dialect.name), rows)
+
+
+def record_sync(conn, events: list, removed: list = ()):
+    """record() on a sync connection, for scripts."""
+    rows = _counter_rows(events, removed)
+    if rows:
+        conn.execute(_upsert(conn.dialect.name), rows)
+
+
+def bucket_start(day: date, bucket: str) -> date:
+    return day - timedelta(days=day.weekday()) if bucket == "week" else day
+
+
+async def timeseries(db, source: str, dimension: str, bucket: str, periods: int, top: int) -> dict:
+    """
+    Counts per `bucket` ("day" or "week", weeks start on Monday) for the last
+    `periods` buckets, split by `dimension`. The `top` values by total keep their
+    own series; the rest are summed into "other".
+    """
+    step = timedelta(days=7 if bucket == "week" else 1)
+    last = bucket_start(datetime.utcnow().date(), bucket)
+    first = last - step * (periods - 1)
+
+    rows = (await db.execute(
+        select(AnalyticsDaily.day, AnalyticsDaily.value, func.sum(AnalyticsDaily.count))
+        .where(
+            AnalyticsDaily.source == source,
+            AnalyticsDaily.dimension == dimension,
+            AnalyticsDaily.day >= first,
+        )
+        .group_by(AnalyticsDaily.day, AnalyticsDaily.value)
+    )).all()
+
+    totals = Counter()
+    for _, value, count in rows:
+        totals[value] += count
+    groups = [value for value, _ in totals.most_common(top)]
+    if len(totals) > top:
+        groups.append("other")
+    kept = set(groups)
+
+    buckets = {first + step * i: dict.fromkeys(groups, 0) for i in range(periods)}
+    for day, value, count in rows:
+        counts = buckets.get(bucket_start(day, bucket))
+        if counts is not None:
+            counts[value if value in kept else "other"] += count
+
+    return {
+        "source": source,
+        "group_by": dimension,
+        "bucket": bucket,
+        "groups": groups,
+        "series": [{"start": start, "total": sum(counts.values()), "counts": counts} for start, counts in buckets.items()],
+    }
+
+
+# --- Rebuild ---
+
+def _entries(source: str, dimension: str):
+    """(day, value) for every counted event of one source and dimension, as a selectable."""
+    model = Issue if source == "issues" else SafetyReport
+    if dimension == "location":
+        # Counted under the canonical place, as the write paths do; unmatched rows keep their own text
+        return select(
+            func.date(model.created_at).label("day"),
+            func.coalesce(Location.name, model.location, UNKNOWN).label("value"),
+        ).outerjoin(Location, Location.id == model.location_id).where(model.created_at.isnot(None))
+    if dimension != "status":
+        return select(
+            func.date(model.created_at).label("day"),
+            func.coalesce(getattr(model, dimension), UNKNOWN).label("value"),
+        ).where(model.created_at.isnot(None))
+
+    initial = INITIAL_STATUS[source]
+    entered = [
+        select(func.date(model.created_at).label("day"), literal(initial).label("value"))
+        .where(model.created_at.isnot(None)),
+    ]
+    moved = and_(model.status.is_distinct_from(initial), model.updated_at.isnot(None))
+    if source == "issues":
+        entered.append(select(func.date(IssueStatusHistory.changed_at), IssueStatusHistory.status))
+        # Issues changed before the history table existed: one change, at their last write
+        moved = and_(moved, ~exists().where(IssueStatusHistory.issue_id == Issue.id))
+    entered.append(select(func.date(model.updated_at), func.coalesce(model.status, UNKNOWN)).where(moved))
+    return union_all(*entered)
+
+
+def rebuild(conn) -> int:
+    """Recount every counter from the raw tables in the caller's transaction; returns the number of counters."""
+    if conn.dialect.name == "postgresql":
+        # Writers wait (with their uncommitted rows) until the new counts are in, then add to them
+        conn.exec_driver_sql("LOCK TABLE analytics_daily IN EXCLUSIVE MODE")
+    conn.execute(delete(AnalyticsDaily))
+    for source, dimensions in DIMENSIONS.items():
+        for dimension in dimensions:
+            entries = _entries(source, dimension).subquery()
+            conn.execute(insert(AnalyticsDaily).from_select(
+                ["source", "dimension", "day", "value", "count"],
+                select(literal(source), literal(dimension), entries.c.day, entries.c.value, func.count())
+                .where(entries.c.day.isnot(None))
+                .group_by(entries.c.day, entries.c.value),
+            ))
+    return conn.scalar(select(func.count()).select_from(AnalyticsDaily))
+
+
+def main():
+    argparse.ArgumentParser(description="Rebuild the analytics_daily counters from the raw tables.").parse_args()
+    migrate(engine)
+    start = time.perf_counter()
+    with engine.begin() as conn:
+        counters = rebuild(conn)
+    print(f"Rebuilt {counters} counters in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
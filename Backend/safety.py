@@ -1,20 +1,39 @@
 import os
-import shutil
-import time
+import orjson
 from datetime import datetime
 from typing import Optional, List
-from fastapi import APIRouter, Depends, HTTPException, File, UploadFile, Form, Request
-from sqlalchemy.orm import Session
-from pydantic import BaseModel
-from models import SafetyReport, get_db, Issue  # Import Issue just in case, but mostly SafetyReport
-try:
-    from nude import Nude
-except ImportError:
-    Nude = None
+from fastapi import APIRouter, Depends, HTTPException, File, UploadFile, Form, Header, Request, Query, BackgroundTasks
+from sqlalchemy import insert, select, update, null
+from sqlalchemy.ext.asyncio import AsyncSession
+from pydantic import BaseModel, Field
+from models import SafetyReport, get_async_db, AsyncSessionLocal, Issue  # Import Issue just in case, but mostly SafetyReport
+from fastapi.responses import ORJSONResponse, Response
+from pagination import paginate, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from sync import sync_state, make_etag, is_not_modified
+from search import search
+from projection import parse_fields, project, to_dicts
+from events import broker, publish
+from cache import SingleFlightCache
+from idempotency import fingerprint, run_once
+from batch import BatchResponse, BatchItemResult, ItemKeys, item_file_sha256, read_batch, parse_item
+import rollups
+from locations import resolve_location
+from ingest import spool_upload, upload_sha256, MAX_MEDIA_UPLOAD_BYTES
+from uploads import UploadJob, UploadResult, enqueue_upload
+from moderation import classify, classifier_available
+from logs import get_logger
 
 from dependencies import get_current_user, is_admin, supabase
 
 router = APIRouter(prefix="/safety", tags=["safety"])
+logger = get_logger(__name__)
+
+# The public community feed is served from memory: rebuilt at most once per
+# COMMUNITY_CACHE_SECONDS, and immediately after any report changes. Other
+# instances drop their copy when the change event reaches them.
+COMMUNITY_CACHE_SECONDS = float(os.getenv("COMMUNITY_CACHE_SECONDS", "5"))
+community_cache = SingleFlightCache(ttl=COMMUNITY_CACHE_SECONDS)
+broker.add_listener("safety.", lambda event: community_cache.invalidate())
 
 # Pydantic Schemas
 class SafetyReportCreate(BaseModel):
@@ -26,158 +45,436 @@ class SafetyReportResponse(BaseModel):
     id: int
     description: str
     location: str
+    location_id: Optional[int] = None  # The canonical place `location` was matched to
     media_url: Optional[str]
-    is_nsfw: bool
+    thumbnail_url: Optional[str] = None
+    medium_url: Optional[str] = None
+    is_nsfw: Optional[bool]  # None until the NSFW check or an admin review has given a verdict
     created_at: datetime
+    updated_at: Optional[datetime] = None
     status: str
     is_critical: bool
 
     model_config = {"from_attributes": True}
 
+class SafetyReportBatchItem(BaseModel):
+    description: str = Field(min_length=1)
+    location: str = Field(min_length=1)
+    media: Optional[str] = None  # Name of the multipart part holding the file
+    media_sha256: Optional[str] = None  # Or: media the server already stores
+    idempotency_key: Optional[str] = None
+
+class MediaReview(BaseModel):
+    is_nsfw: bool
+
+class SafetyReportPage(BaseModel):
+    items: List[SafetyReportResponse]
+    next_cursor: Optional[str] = None
+
+# Fields list endpoints return (and accept in ?fields=)
+SAFETY_REPORT_FIELDS = tuple(SafetyReportResponse.model_fields)
+
+def _nsfw_flag(value: Optional[int]) -> Optional[bool]:
+    return None if value is None else bool(value)
+
+def _report_response(r: SafetyReport) -> SafetyReportResponse:
+    return SafetyReportResponse(
+        id=r.id,
+        description=r.description,
+        location=r.location,
+        location_id=r.location_id,
+        media_url=r.media_url,
+        thumbnail_url=r.thumbnail_url,
+        medium_url=r.medium_url,
+        is_nsfw=_nsfw_flag(r.is_nsfw),
+        created_at=r.created_at,
+        updated_at=r.updated_at,
+        status=r.status,
+        is_critical=bool(r.is_critical)
+    )
+
+async def _report_changed(event_type: str, **data):
+    # Invalidate here too, in case the event cannot be published
+    community_cache.invalidate()
+    await publish(event_type, **data)
+
+def _report_dicts(rows, fields: tuple) -> list:
+    """Projected rows as response dicts, with the integer flags mapped back to booleans."""
+    items = to_dicts(rows, fields)
+    if "is_nsfw" in fields:
+        for item in items:
+            item["is_nsfw"] = _nsfw_flag(item["is_nsfw"])
+    if "is_critical" in fields:
+        for item in items:
+            item["is_critical"] = bool(item["is_critical"])
+    return items
+
+def _safety_media_callback(report_id: int):
+    async def on_done(result: Optional[UploadResult]):
+        if not result:
+            logger.error("Safety report media upload failed", extra={"report_id": report_id})
+            return
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                update(SafetyReport)
+                .where(SafetyReport.id == report_id)
+                .values(media_url=result.url, thumbnail_url=result.thumbnail_url, medium_url=result.medium_url)
+            )
+            await db.commit()
+        await _report_changed("safety.report_updated", id=report_id)
+    return on_done
+
+async def _moderate_report(report_id: int, temp_path: str, upload: Optional[UploadJob]):
+    """Background task: classify the spooled media and record the verdict, then upload it."""
+    try:
+        is_nsfw = await classify(temp_path)
+        logger.debug("NSFW check done", extra={"report_id": report_id, "is_nsfw": is_nsfw})
+        if is_nsfw is None:
+            # Failed or timed out: is_nsfw stays NULL, so the media stays hidden until an admin reviews it
+            logger.warning("No NSFW verdict, media held for review", extra={"report_id": report_id})
+            return
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                update(SafetyReport).where(SafetyReport.id == report_id).values(is_nsfw=1 if is_nsfw else 0)
+            )
+            await db.commit()
+        await _report_changed("safety.report_updated", id=report_id)
+    finally:
+        # The upload worker deletes the file once it is done with it
+        if upload:
+            await enqueue_upload(upload)
+        else:
+            os.remove(temp_path)
+
+class _ReportMedia:
+    """Media attached to one report, between spooling and the report's commit."""
+
+    def __init__(self):
+        self.fields = {}
+        self.temp_path = None
+        self.upload = None
+
+    @property
+    def check_nsfw(self) -> bool:
+        return self.temp_path is not None and classifier_available()
+
+    @property
+    def is_nsfw(self) -> Optional[int]:
+        # New media starts unjudged (NULL) and hidden from the public feed, whether or not a
+        # classifier will look at it; reused media brings its verdict along in `fields`
+        return None if self.temp_path is not None else self.fields.get("is_nsfw", 0)
+
+    def row_fields(self) -> dict:
+        # Explicit NULL so the column default does not apply
+        return {**self.fields, "is_nsfw": null() if self.is_nsfw is None else self.is_nsfw}
+
+    def discard(self):
+        if self.temp_path:
+            os.remove(self.temp_path)
+
+    async def dispatch(self, background_tasks: BackgroundTasks, report_id: int):
+        """After the commit: run the NSFW check and upload in the background."""
+        if self.upload:
+            self.upload.on_done = _safety_media_callback(report_id)
+        if self.check_nsfw:
+            background_tasks.add_task(_moderate_report, report_id, self.temp_path, self.upload)
+            return
+        if self.temp_path:
+            logger.warning("No NSFW classifier, media held for review", extra={"report_id": report_id})
+        if self.upload:
+            await enqueue_upload(self.upload)
+        elif self.temp_path:
+            os.remove(self.temp_path)
+
+
+async def _stored_media(db: AsyncSession, sha256: str) -> Optional[dict]:
+    """URLs and verdict of identical media that has already been checked and stored."""
+    existing = (await db.execute(
+        select(SafetyReport.media_url, SafetyReport.thumbnail_url, SafetyReport.medium_url, SafetyReport.is_nsfw)
+        .where(
+            SafetyReport.media_sha256 == sha256,
+            SafetyReport.media_url.isnot(None),
+            SafetyReport.is_nsfw.isnot(None),
+        )
+        .limit(1)
+    )).first()
+    return existing._asdict() if existing else None
+
+
+async def _prepare_media(db: AsyncSession, media: Optional[UploadFile]) -> _ReportMedia:
+    prepared = _ReportMedia()
+    if not media:
+        return prepared
+
+    # 1. Spool to a temp file in chunks (size-capped); it is kept for the NSFW check
+    file_extension = os.path.splitext(media.filename or "")[1]
+    temp_path, sha256 = await spool_upload(media, MAX_MEDIA_UPLOAD_BYTES)
+    prepared.fields["media_sha256"] = sha256
+
+    # 2. Identical media already checked and stored: reuse it, skipping upload and NSFW check
+    existing = await _stored_media(db, sha256)
+    if existing:
+        os.remove(temp_path)
+        prepared.fields.update(existing)
+        return prepared
+
+    prepared.temp_path = temp_path
+    if supabase:
+        # Note: For MVP we might use the public bucket but with obfuscated names
+        # Ideally this should be a private bucket with signed URLs
+        prepared.upload = UploadJob(
+            bucket="safety-reports", # Ensure this bucket exists in Supabase
+            sha256=sha256,
+            extension=file_extension,
+            file_path=temp_path,
+            content_type=media.content_type,
+            on_done=None,
+        )
+    return prepared
+
 # Endpoints
 
 @router.post("/reports", response_model=SafetyReportResponse)
 async def create_safety_report(
+    background_tasks: BackgroundTasks,
     description: str = Form(...),
     location: str = Form(...),
     media: Optional[UploadFile] = File(None),
-    db: Session = Depends(get_db)
+    idempotency_key: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Anonymous reporting endpoint. No auth required.
+    A retry with the same Idempotency-Key gets the first response back.
     """
-    image_url = None
-    is_nsfw = False
-
-    if media:
-        # 1. Save locally temporarily to process NSFW
-        file_extension = os.path.splitext(media.filename)[1]
-        temp_filename = f"temp_{int(time.time())}{file_extension}"
-        temp_path = f"static/uploads/{temp_filename}"
-        
-        # Ensure directory exists
-        os.makedirs("static/uploads", exist_ok=True)
-        
-        with open(temp_path, "wb") as buffer:
-            shutil.copyfileobj(media.file, buffer)
-        
-        # 2. Check NSFW
-        if Nude:
-            try:
-                n = Nude(temp_path)
-                n.parse()
-                is_nsfw = n.result
-                print(f"DEBUG: NSFW check result for {media.filename}: {is_nsfw}")
-            except Exception as e:
-                print(f"WARNING: NSFW check failed: {e}")
-        
-        # 3. Upload to Supabase (if configured)
-        if supabase:
-            try:
-                # Read file again from disk
-                with open(temp_path, "rb") as f:
-                    file_content = f.read()
-
-                bucket_name = "safety-reports" # Ensure this bucket exists in Supabase
-                # Or use the same bucket but different folder
-                
-                # Note: For MVP we might use the public bucket but with obfuscated names
-                # Ideally this should be a private bucket with signed URLs
-                
-                final_filename = f"safety_{int(time.time())}_{secrets.token_hex(4)}{file_extension}"
-                
-                res = supabase.storage.from_(bucket_name).upload(
-                    path=final_filename,
-                    file=file_content,
-                    file_options={"content-type": media.content_type}
-                )
-                
-                # Get URL
-                image_url = supabase.storage.from_(bucket_name).get_public_url(final_filename)
-                
-            except Exception as e:
-                print(f"ERROR: Supabase upload failed: {e}")
-                # Fallback: keep local path if in dev
-                # image_url = f"/static/uploads/{temp_filename}"
-        
-        # Cleanup temp file
-        # os.remove(temp_path) # Optionally keep for debug
+    return await run_once(
+        "safety_reports", idempotency_key, fingerprint(description, location, await upload_sha256(media)),
+        lambda: _create_report(db, background_tasks, description, location, media),
+    )
 
+async def _create_report(
+    db: AsyncSession,
+    background_tasks: BackgroundTasks,
+    description: str,
+    location: str,
+    media: Optional[UploadFile],
+) -> SafetyReportResponse:
+    prepared = await _prepare_media(db, media)
+
+    # 3. Store the report first; the NSFW check and upload run after the response
     new_report = SafetyReport(
         description=description,
         location=location,
-        media_url=image_url,
-        is_nsfw=1 if is_nsfw else 0, # Store as int
-        is_critical=1 # Always critical
-    )
-    
-    db.add(new_report)
-    db.commit()
-    db.refresh(new_report)
-    
-    # Map integer fields back to boolean for Pydantic response
-    response_obj = SafetyReportResponse(
-        id=new_report.id,
-        description=new_report.description,
-        location=new_report.location,
-        media_url=new_report.media_url,
-        is_nsfw=bool(new_report.is_nsfw),
-        created_at=new_report.created_at,
-        status=new_report.status,
-        is_critical=bool(new_report.is_critical)
+        is_critical=1, # Always critical
+        **prepared.row_fields()
     )
     
-    return response_obj
+    try:
+        new_report.location_id, place = await resolve_location(db, location)
+        db.add(new_report)
+        await db.flush()
+        await rollups.record(db, rollups.created("safety_reports", new_report.created_at, location=place))
+        await db.commit()
+        await db.refresh(new_report)
+    except BaseException:
+        prepared.discard()
+        raise
 
-@router.get("/reports", response_model=List[SafetyReportResponse])
-async def get_safety_reports(request: Request, db: Session = Depends(get_db)):
+    await prepared.dispatch(background_tasks, new_report.id)
+    await _report_changed("safety.report_created", id=new_report.id, location=new_report.location, created_at=new_report.created_at)
+
+    return _report_response(new_report)
+
+@router.post("/reports/batch", response_model=BatchResponse)
+async def create_safety_reports_batch(
+    request: Request,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_async_db)
+):
     """
-    Admin only: Get all safety reports.
+    Anonymous reporting, several reports at once (offline queues). No auth required.
+    Valid reports are stored in one transaction; results are per item, in order.
+    """
+    raw_items, files = await read_batch(request)
+    results: List[Optional[BatchItemResult]] = [None] * len(raw_items)
+    accepted = []  # (index, prepared media, row)
+    keys = ItemKeys("safety_reports/batch")
+    places = {}  # location text -> (location_id, canonical name)
+
+    try:
+        for index, raw in enumerate(raw_items):
+            item, error = parse_item(SafetyReportBatchItem, raw)
+            stored = None
+            if item:
+                results[index], error = await keys.claim(
+                    index, item, await item_file_sha256(files, item.media, item.media_sha256),
+                )
+                if results[index]:
+                    continue
+            if item and item.media and item.media not in files:
+                error = f"media: no file part named {item.media!r}"
+            elif item and item.media_sha256 and not item.media:
+                stored = await _stored_media(db, item.media_sha256)
+                if not stored:
+                    error = "media_sha256: unknown media"
+            if error:
+                results[index] = BatchItemResult(index=index, status="error", detail=error)
+                continue
+
+            if stored:
+                prepared = _ReportMedia()
+                prepared.fields = {"media_sha256": item.media_sha256, **stored}
+            else:
+                prepared = await _prepare_media(db, files.get(item.media))
+            # Every row has the same keys so the insert runs as one executemany
+            row = {
+                "description": item.description,
+                "location": item.location,
+                "location_id": None,  # Resolved below, once the batch has claimed its keys
+                "is_critical": 1,
+                "media_sha256": None, "media_url": None, "thumbnail_url": None, "medium_url": None,
+                **prepared.fields,
+                "is_nsfw": prepared.is_nsfw,
+            }
+            accepted.append((index, prepared, row))
+
+        inserted = []
+        if accepted:
+            for _, _, row in accepted:
+                if row["location"] not in places:
+                    places[row["location"]] = await resolve_location(db, row["location"])
+                row["location_id"] = places[row["location"]][0]
+            inserted = (await db.execute(
+                insert(SafetyReport).returning(SafetyReport.id, SafetyReport.created_at, sort_by_parameter_order=True),
+                [row for _, _, row in accepted],
+            )).all()
+            await rollups.record(db, [
+                event
+                for (_, _, row), (_, created_at) in zip(accepted, inserted)
+                for event in rollups.created("safety_reports", created_at, location=places[row["location"]][1])
+            ])
+            await db.commit()
+    except BaseException:
+        # Release the write lock first: the keys are released in their own sessions
+        await db.rollback()
+        for _, prepared, _ in accepted:
+            prepared.discard()
+        await keys.release_all()
+        raise
+
+    for (index, prepared, row), (report_id, created_at) in zip(accepted, inserted):
+        await prepared.dispatch(background_tasks, report_id)
+        results[index] = BatchItemResult(index=index, status="created", id=report_id)
+        await _report_changed("safety.report_created", id=report_id, location=row["location"], created_at=created_at)
+
+    await keys.finish(results)
+    return BatchResponse(results=results)
+
+@router.get("/reports", response_model=SafetyReportPage)
+async def get_safety_reports(
+    request: Request,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    fields: Optional[str] = Query(None, description="Comma-separated subset of report fields"),
+    status: Optional[str] = Query(None, description="Only reports with this status"),
+    needs_review: bool = Query(False, description="Only reports whose media has no NSFW verdict yet"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Admin only: Get safety reports, newest first, one page at a time.
+    Pass the returned `next_cursor` back as `cursor` to get the next page.
     """
     user = get_current_user(request)
     if not is_admin(user):
         raise HTTPException(status_code=403, detail="Admin access required")
+    selected = parse_fields(fields, SAFETY_REPORT_FIELDS)
     
-    reports = db.query(SafetyReport).order_by(SafetyReport.created_at.desc()).all()
-    
-    # Convert DB models to Pydantic
-    return [
-        SafetyReportResponse(
-            id=r.id,
-            description=r.description,
-            location=r.location,
-            media_url=r.media_url,
-            is_nsfw=bool(r.is_nsfw),
-            created_at=r.created_at,
-            status=r.status,
-            is_critical=bool(r.is_critical)
-        ) for r in reports
-    ]
+    _, version = await sync_state(db, SafetyReport)
+    etag = make_etag("safety_reports", version, cursor, limit, selected, status, needs_review)
+    if is_not_modified(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+
+    stmt = project(SafetyReport, selected)
+    if status:
+        stmt = stmt.where(SafetyReport.status == status)
+    if needs_review:
+        stmt = stmt.where(SafetyReport.media_sha256.isnot(None), SafetyReport.is_nsfw.is_(None))
+    rows, next_cursor = await paginate(db, stmt, SafetyReport, cursor, limit)
+    return ORJSONResponse({"items": _report_dicts(rows, selected), "next_cursor": next_cursor}, headers={"ETag": etag})
+
+@router.get("/reports/search", response_model=SafetyReportPage)
+async def search_safety_reports(
+    request: Request,
+    q: str = Query(..., min_length=1, max_length=200),
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    fields: Optional[str] = Query(None, description="Comma-separated subset of report fields"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Admin only: Reports whose description or location match every word of `q`, best match first.
+    """
+    user = get_current_user(request)
+    if not is_admin(user):
+        raise HTTPException(status_code=403, detail="Admin access required")
+
+    selected = parse_fields(fields, SAFETY_REPORT_FIELDS)
+    rows, next_cursor = await search(db, project(SafetyReport, selected), SafetyReport, q, cursor, limit)
+    return ORJSONResponse({"items": _report_dicts(rows, selected), "next_cursor": next_cursor})
+
+@router.patch("/reports/{report_id}/review", response_model=SafetyReportResponse)
+async def review_report_media(
+    report_id: int,
+    review: MediaReview,
+    request: Request,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Admin only: Record the NSFW verdict for a report's media by hand.
+    Media without a verdict (the check failed, timed out or no classifier is
+    installed) stays out of the community feed until this is called.
+    """
+    user = get_current_user(request)
+    if not is_admin(user):
+        raise HTTPException(status_code=403, detail="Admin access required")
+
+    report = await db.get(SafetyReport, report_id)
+    if not report:
+        raise HTTPException(status_code=404, detail="Safety report not found")
+    if report.media_sha256 is None:
+        raise HTTPException(status_code=400, detail="Safety report has no media")
+    report.is_nsfw = 1 if review.is_nsfw else 0
+    await db.commit()
+    await db.refresh(report)
+    logger.info("Media reviewed", extra={"report_id": report_id, "is_nsfw": review.is_nsfw, "reviewed_by": user.get("sub")})
+    await _report_changed("safety.report_updated", id=report_id)
+    return _report_response(report)
+
+async def _build_community_feed():
+    # Own session: the result is shared by every request waiting on this build
+    async with AsyncSessionLocal() as db:
+        rows = (await db.execute(
+            project(SafetyReport, SAFETY_REPORT_FIELDS)
+            .order_by(SafetyReport.created_at.desc())
+            .limit(50)
+        )).all()
+
+    items = _report_dicts(rows, SAFETY_REPORT_FIELDS)
+    for item in items:
+        # Public feed: only show media that passed the NSFW check or a review
+        if item["is_nsfw"] is not False:
+            item["media_url"] = item["thumbnail_url"] = item["medium_url"] = None
+    body = orjson.dumps(items)
+    return body, make_etag("community", body)
 
 @router.get("/community", response_model=List[SafetyReportResponse])
-async def get_community_reports(db: Session = Depends(get_db)):
+async def get_community_reports(request: Request):
     """
     Public community feed: Returns anonymous reports to keep campus informed.
-    Filters out resolved issues to focus on active alerts.
+    Served from an in-process cache; the headers let a CDN cache it as well.
     """
-    # Fetch all reports or just active ones? Let's show all for transparency, but sorted.
-    # We might want to limit description length in a real app, but for now full is fine.
-    reports = db.query(SafetyReport)\
-        .order_by(SafetyReport.created_at.desc())\
-        .limit(50)\
-        .all()
-    
-    return [
-        SafetyReportResponse(
-            id=r.id,
-            description=r.description,
-            location=r.location,
-            media_url=r.media_url,
-            is_nsfw=bool(r.is_nsfw),
-            created_at=r.created_at,
-            status=r.status,
-            is_critical=bool(r.is_critical)
-        ) for r in reports
-    ]
-
-import secrets # Imported here to be available in create_safety_report
+    body, etag = await community_cache.get(_build_community_feed)
+    headers = {"ETag": etag, "Cache-Control": f"public, max-age={int(COMMUNITY_CACHE_SECONDS)}"}
+    if is_not_modified(request, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
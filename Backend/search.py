@@ -0,0 +1,124 @@
+import base64
+import json
+import re
+from typing import Optional
+
+from fastapi import HTTPException
+from sqlalchemy import column, func, literal_column, or_, table, text
+
+# --- Full-text search over description and location ---
+# SQLite keeps an external-content FTS5 table per searchable table, maintained
+# by triggers; Postgres keeps a generated tsvector column with a GIN index.
+# Either way the index follows every insert and update without application
+# code. Matches in the description rank above matches in the location.
+#
+# Results are ordered by relevance, which the database has to compute for every
+# match before it can sort, so pages use an opaque offset cursor rather than a
+# keyset one.
+
+SEARCHABLE_TABLES = ("issues", "safety_reports")
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+
+def _sqlite_ddl(name: str) -> list:
+    fts = f"{name}_fts"
+    return [
+        f"CREATE VIRTUAL TABLE {fts} USING fts5("
+        f"description, location, content='{name}', content_rowid='id', tokenize='porter unicode61')",
+        f"CREATE TRIGGER {fts}_ai AFTER INSERT ON {name} BEGIN "
+        f"INSERT INTO {fts}(rowid, description, location) VALUES (new.id, new.description, new.location); END",
+        f"CREATE TRIGGER {fts}_ad AFTER DELETE ON {name} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, description, location) "
+        f"VALUES ('delete', old.id, old.description, old.location); END",
+        f"CREATE TRIGGER {fts}_au AFTER UPDATE OF description, location ON {name} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, description, location) "
+        f"VALUES ('delete', old.id, old.description, old.location); "
+        f"INSERT INTO {fts}(rowid, description, location) VALUES (new.id, new.description, new.location); END",
+        # Index the rows that existed before the search table did
+        f"INSERT INTO {fts}({fts}) VALUES ('rebuild')",
+    ]
+
+
+def _postgres_ddl(name: str) -> list:
+    return [
+        f"ALTER TABLE {name} ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS ("
+        f"setweight(to_tsvector('english', coalesce(description, '')), 'A') || "
+        f"setweight(to_tsvector('english', coalesce(location, '')), 'B')) STORED",
+        f"CREATE INDEX IF NOT EXISTS ix_{name}_search_vector ON {name} USING GIN (search_vector)",
+    ]
+
+
+def create_search_indexes(conn):
+    """Create the search index for each searchable table if it is missing (migration v0006)."""
+    for name in SEARCHABLE_TABLES:
+        if conn.dialect.name == "sqlite":
+            exists = conn.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                {"name": f"{name}_fts"},
+            ).first()
+            statements = [] if exists else _sqlite_ddl(name)
+        elif conn.dialect.name == "postgresql":
+            statements = _postgres_ddl(name)
+        else:
+            statements = []
+        for statement in statements:
+            conn.execute(text(statement))
+
+
+def _terms(q: str) -> list:
+    return [term.lower() for term in _WORD.findall(q)]
+
+
+def _encode_offset(offset: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps({"offset": offset}).encode()).decode().rstrip("=")
+
+
+def _decode_offset(cursor: str) -> int:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        offset = int(json.loads(base64.urlsafe_b64decode(padded))["offset"])
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if offset < 0:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return offset
+
+
+def _ranked(dialect: str, stmt, model, terms: list):
+    """Restrict `stmt` to rows matching every term (the last one as a prefix), best match first."""
+    name = model.__tablename__
+    if dialect == "sqlite":
+        fts = table(f"{name}_fts", column("rowid"))
+        # Terms are quoted so nothing the user types is read as FTS5 query syntax
+        match = " ".join(f'"{term}"' for term in terms) + "*"
+        # bm25 is lower-is-better; description hits weigh twice as much as location hits
+        rank = func.bm25(literal_column(fts.name), 2.0, 1.0)
+        return stmt.join(fts, fts.c.rowid == model.id)\
+            .where(literal_column(fts.name).op("MATCH")(match))\
+            .order_by(rank, model.id)
+    if dialect == "postgresql":
+        vector = literal_column(f"{name}.search_vector")
+        query = func.to_tsquery("english", " & ".join(terms) + ":*")
+        return stmt.where(vector.op("@@")(query))\
+            .order_by(func.ts_rank_cd(vector, query).desc(), model.id)
+    # No index on other databases: plain substring match, newest first
+    for term in terms:
+        stmt = stmt.where(or_(model.description.ilike(f"%{term}%"), model.location.ilike(f"%{term}%")))
+    return stmt.order_by(model.created_at.desc(), model.id.desc())
+
+
+async def search(db, stmt, model, q: str, cursor: Optional[str], limit: int):
+    """
+    Run a full-text search for `q` over `model`'s description and location.
+    Returns (rows, next_cursor) like `paginate`, rows as tuples of `stmt`'s columns.
+    """
+    terms = _terms(q)
+    if not terms:
+        return [], None
+    offset = _decode_offset(cursor) if cursor else 0
+
+    stmt = _ranked(db.bind.dialect.name, stmt, model, terms).offset(offset).limit(limit + 1)
+    rows = (await db.execute(stmt)).all()
+    next_cursor = _encode_offset(offset + limit) if len(rows) > limit else None
+    return rows[:limit], next_cursor
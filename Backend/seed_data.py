@@ -1,11 +1,12 @@
 
 from sqlalchemy.orm import Session
-from models import Issue, SafetyReport, engine, SessionLocal, Base
+from models import Issue, SafetyReport, engine, SessionLocal
+from migrations import migrate
 import random
 from datetime import datetime, timedelta
 
 def seed_data():
-    Base.metadata.create_all(bind=engine)
+    migrate(engine)
     db = SessionLocal()
 
     try:
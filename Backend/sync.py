@@ -0,0 +1,130 @@
+import hashlib
+import os
+from datetime import datetime, timedelta
+from typing import Optional
+
+from fastapi import Request
+from sqlalchemy import Float, and_, func, or_, select
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+
+from pagination import encode_cursor, decode_cursor
+
+# --- Delta sync & conditional GET helpers ---
+# Sync tokens are opaque (updated_at, id) watermarks, encoded the same way as
+# pagination cursors. updated_at is stamped by the application when a row is
+# written, not when its transaction commits, so a row can become visible after
+# rows stamped later than it. A token therefore never points past the sync
+# horizon, SYNC_OVERLAP_SECONDS ago: the last SYNC_OVERLAP_SECONDS of changes
+# are sent again on the next sync, and clients merge rows by id. Writes have to
+# commit (and worker clocks agree) within that window.
+#
+# Rows are never hard-deleted, so a list's version is the newest watermark of
+# its table plus a digest of the rows written within the horizon, which
+# changes when a late commit lands there too; it is a cheap validator for
+# list ETags.
+
+SYNC_OVERLAP_SECONDS = float(os.getenv("SYNC_OVERLAP_SECONDS", "60"))
+
+
+def sync_horizon() -> datetime:
+    """Rows stamped before this are assumed to have committed."""
+    return datetime.utcnow() - timedelta(seconds=SYNC_OVERLAP_SECONDS)
+
+
+def capped_watermark(updated_at: datetime, row_id: int) -> tuple:
+    """(updated_at, row_id), or the horizon if that is later: resuming from it re-reads the overlap window."""
+    horizon = sync_horizon()
+    return (horizon, 0) if updated_at >= horizon else (updated_at, row_id)
+
+
+def head_query(model):
+    return select(model.updated_at, model.id)\
+        .where(model.updated_at.isnot(None))\
+        .order_by(model.updated_at.desc(), model.id.desc())\
+        .limit(1)
+
+
+class _timestamp_number(FunctionElement):
+    """A timestamp as a number (days or seconds, depending on the database), so timestamps can be summed."""
+    type = Float()
+    inherit_cache = True
+
+
+@compiles(_timestamp_number)
+def _timestamp_number_default(element, compiler, **kw):
+    return f"EXTRACT(EPOCH FROM {compiler.process(element.clauses, **kw)})"
+
+
+@compiles(_timestamp_number, "sqlite")
+def _timestamp_number_sqlite(element, compiler, **kw):
+    return f"julianday({compiler.process(element.clauses, **kw)})"
+
+
+def window_query(model, horizon: datetime):
+    """Count, id sum and timestamp sum of the rows written since `horizon`; served by the (updated_at, id) index."""
+    return select(func.count(), func.sum(model.id), func.sum(_timestamp_number(model.updated_at)))\
+        .where(model.updated_at >= horizon)
+
+
+async def sync_state(db, model) -> tuple:
+    """
+    (sync token, version) of a table. The token is where a client that has just
+    read the table starts its delta sync (None for an empty table); the version
+    changes whenever a row is written.
+    """
+    head = (await db.execute(head_query(model))).first()
+    if head is None:
+        return None, "empty"
+    horizon = sync_horizon()
+    count, id_sum, time_sum = (await db.execute(window_query(model, horizon))).one()
+    token = encode_cursor(*capped_watermark(head.updated_at, head.id))
+    return token, f"{head.updated_at.isoformat()}/{head.id}/{count}/{id_sum}/{time_sum or 0:.6f}"
+
+
+def changes_query(stmt, model, since: Optional[str], limit: int):
+    """`stmt` restricted to rows written after `since`, oldest first, plus one row to tell whether there are more."""
+    stmt = stmt.where(model.updated_at.isnot(None))
+    if since:
+        updated_at, row_id = decode_cursor(since)
+        stmt = stmt.where(or_(
+            model.updated_at > updated_at,
+            and_(model.updated_at == updated_at, model.id > row_id),
+        ))
+
+    return stmt.order_by(model.updated_at.asc(), model.id.asc()).limit(limit + 1)
+
+
+async def changes_since(db, stmt, model, since: Optional[str], limit: int):
+    """
+    Rows written after the `since` watermark, oldest first; `stmt` must select
+    `updated_at` and `id`. Returns (rows, next_since, has_more); `next_since` is
+    the token to send next time.
+    """
+    rows = (await db.execute(changes_query(stmt, model, since, limit))).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    if rows:
+        last = (rows[-1].updated_at, rows[-1].id)
+    elif since:
+        last = decode_cursor(since)
+    else:
+        return rows, None, False
+    # Mid-sync pages resume exactly; a caught-up client re-reads the overlap window next time
+    next_since = encode_cursor(*(last if has_more else capped_watermark(*last)))
+    return rows, next_since, has_more
+
+
+def make_etag(*parts) -> str:
+    digest = hashlib.sha256("|".join(str(p) for p in parts).encode()).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def is_not_modified(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return etag in [tag.strip() for tag in header.split(",")]
@@ -0,0 +1,93 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+import cache
+from cache import SingleFlightCache
+
+pytestmark = pytest.mark.anyio
+
+
+class Builder:
+    """A build that counts its runs and, while `gate` is clear, waits for it."""
+
+    def __init__(self):
+        self.runs = 0
+        self.gate = asyncio.Event()
+        self.gate.set()
+
+    async def __call__(self):
+        self.runs += 1
+        run = self.runs
+        await self.gate.wait()
+        return f"value {run}"
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = SimpleNamespace(value=1000.0)
+    monkeypatch.setattr(cache, "time", SimpleNamespace(monotonic=lambda: now.value))
+    return now
+
+
+async def test_concurrent_misses_share_one_build():
+    feed, build = SingleFlightCache(ttl=60), Builder()
+    build.gate.clear()
+    waiting = [asyncio.create_task(feed.get(build)) for _ in range(10)]
+    await asyncio.sleep(0)
+    build.gate.set()
+    assert await asyncio.gather(*waiting) == ["value 1"] * 10
+    assert build.runs == 1
+
+
+async def test_entries_expire_after_the_ttl(clock):
+    feed, build = SingleFlightCache(ttl=30), Builder()
+    assert await feed.get(build) == "value 1"
+    clock.value += 29
+    assert await feed.get(build) == "value 1"
+    clock.value += 2
+    assert await feed.get(build) == "value 2"
+
+
+async def test_a_build_running_when_invalidated_is_not_cached():
+    feed, build = SingleFlightCache(ttl=60), Builder()
+    build.gate.clear()
+    stale = asyncio.create_task(feed.get(build))
+    await asyncio.sleep(0)
+    feed.invalidate()
+    build.gate.set()
+    assert await stale == "value 1"  # Its own caller still gets it
+    assert await feed.get(build) == "value 2"
+    assert await feed.get(build) == "value 2"
+
+
+async def test_a_failed_build_is_not_cached():
+    feed = SingleFlightCache(ttl=60)
+
+    async def failing():
+        raise RuntimeError("database down")
+    with pytest.raises(RuntimeError):
+        await feed.get(failing)
+    assert await feed.get(Builder()) == "value 1"
+
+
+async def test_a_waiter_going_away_does_not_cancel_the_build():
+    feed, build = SingleFlightCache(ttl=60), Builder()
+    build.gate.clear()
+    leaving = asyncio.create_task(feed.get(build))
+    staying = asyncio.create_task(feed.get(build))
+    await asyncio.sleep(0)
+    leaving.cancel()
+    build.gate.set()
+    assert await staying == "value 1"
+    assert build.runs == 1
+
+
+async def test_a_new_safety_report_refreshes_the_community_feed(client):
+    def ids(response):
+        return [item["id"] for item in response.json()]
+    before = await client.get("/safety/community")
+    created = (await client.post("/safety/reports", data={"description": "Broken lamp", "location": "Gate"})).json()
+    after = await client.get("/safety/community")
+    assert created["id"] in ids(after) and created["id"] not in ids(before)
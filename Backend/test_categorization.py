@@ -0,0 +1,47 @@
+import pytest
+
+from categorization import Categorizer, categorizer, plural
+
+
+@pytest.mark.parametrize("text", [
+    "Room rates are too high",
+    "The guard was fired",
+    "Taped the poster to the notice board",
+    "Students acing exams",
+    "Tiled floor in the lobby",
+])
+def test_words_that_only_start_with_a_keyword_do_not_match(text):
+    assert categorizer.classify(text) == ("general", "medium")
+
+
+def test_an_unlisted_form_of_a_hazard_keyword_does_not_raise_priority():
+    assert categorizer.classify("I was shocked by the dirty toilets") == ("plumbing", "medium")
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("Exposed wires near the switches", ("safety_hazard", "high")),
+    ("Gas leaking in the chemistry lab", ("safety_hazard", "high")),
+    ("Cracked ceiling tiles", ("structural", "high")),
+    ("Water leaking from the tap", ("plumbing", "medium")),
+    ("Fan not working", ("electrical", "medium")),
+    ("Two benches broken", ("furniture", "low")),
+    ("Wireless mouse missing", ("general", "medium")),
+])
+def test_keywords_match_with_their_plurals_and_listed_forms(text, expected):
+    assert categorizer.classify(text) == expected
+
+
+def test_plurals():
+    assert [plural(k) for k in ("rat", "switch", "gas leak", "box")] == ["rats", "switches", "gas leaks", "boxes"]
+
+
+def test_a_listed_form_belongs_to_the_category_that_lists_it():
+    config = {"default": {"category": "general", "priority": "low"}, "categories": [
+        {"name": "a", "priority": "low", "keywords": ["pane"]},
+        {"name": "b", "priority": "low", "keywords": ["panes"]},
+    ]}
+    assert Categorizer(config).classify("Broken panes") == ("b", "low")
+
+
+def test_forms_count_as_their_keyword():
+    assert categorizer.keywords("Leaking taps, the leakage is getting worse") == ["leak", "tap", "leak"]
@@ -0,0 +1,135 @@
+import os
+
+import pytest
+from sqlalchemy import select
+
+import main
+from duplicates import DuplicateIndex
+from models import Issue, engine
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.mark.parametrize("first, second", [
+    ("Fan not working", "Light not working"),
+    ("AC not working", "Fan not working"),
+    ("Water leaking from tap", "Water leaking from ceiling"),
+])
+def test_reports_about_different_things_are_not_duplicates(first, second):
+    index = DuplicateIndex()
+    index.add(1, "Hostel B", first)
+    assert index.find("Hostel B", second) == []
+
+
+@pytest.mark.parametrize("first, second", [
+    ("Ceiling fan not working", "The ceiling fan is not working"),
+    ("Projector in room 101 broken", "Projector broken in room 101"),
+    ("Fan is making noise", "Ceiling fan making loud noise"),
+])
+def test_rewordings_of_one_report_are_duplicates(first, second):
+    index = DuplicateIndex()
+    index.add(1, "Hostel B", first)
+    assert [issue_id for issue_id, _ in index.find("Hostel B", second)] == [1]
+
+
+@pytest.fixture
+def uploads(monkeypatch):
+    """Image uploads that are queued but never run; returns the queued jobs."""
+    queued = []
+
+    async def enqueue(job):
+        queued.append(job)
+    monkeypatch.setattr(main, "supabase", object())
+    monkeypatch.setattr(main, "enqueue_upload", enqueue)
+    yield queued
+    for job in queued:
+        os.remove(job.file_path)
+
+
+async def report(client, description="Ceiling fan not working", image=None, **fields):
+    files = {"image": ("fan.jpg", image, "image/jpeg")} if image else None
+    return await client.post("/issues", data={"description": description, "location": "Hostel B", **fields}, files=files)
+
+
+async def test_a_similar_report_gets_the_candidates_back_by_default(client, login):
+    login()
+    original = (await report(client)).json()
+    response = await report(client, "The ceiling fan is not working")
+    assert response.status_code == 409
+    assert [d["id"] for d in response.json()["detail"]["duplicates"]] == [original["id"]]
+
+    created = await report(client, "The ceiling fan is not working", on_duplicate="create")
+    assert created.json()["id"] != original["id"]
+
+
+async def test_merging_upvotes_the_original_and_keeps_the_photo(client, login, uploads):
+    login("student-1")
+    original = (await report(client)).json()
+    login("student-2")
+    merged = (await report(client, "The ceiling fan is not working", image=b"photo", on_duplicate="merge")).json()
+    assert merged["merged"] and merged["id"] == original["id"]
+    assert merged["upvotes"] == 1
+    assert merged["image_status"] == "pending"
+    assert len(uploads) == 1
+
+
+async def test_a_photo_is_not_merged_into_an_issue_that_has_one(client, login, uploads):
+    login("student-1")
+    original = (await report(client, image=b"first photo")).json()
+    login("student-2")
+    response = await report(client, "The ceiling fan is not working", image=b"second photo", on_duplicate="merge")
+    assert response.status_code == 409
+    with engine.connect() as conn:
+        assert conn.execute(select(Issue.upvotes).where(Issue.id == original["id"])).scalar_one() == 0
+    assert len(uploads) == 1
+
+
+async def test_batch_items_get_the_candidates_back_by_default(client, login):
+    login()
+    original = (await report(client)).json()
+    results = (await client.post("/issues/batch", json={"items": [
+        {"description": "The ceiling fan is not working", "location": "Hostel B"},
+        {"description": "The ceiling fan is not working", "location": "Hostel B", "on_duplicate": "merge"},
+    ]})).json()["results"]
+    assert [(r["status"], r["id"]) for r in results] == [("error", original["id"]), ("merged", original["id"])]
+
+
+async def test_a_batch_item_repeating_an_earlier_item_is_rejected_by_default(client, login):
+    login()
+    results = (await client.post("/issues/batch", json={"items": [
+        {"description": "The ceiling fan is not working", "location": "Hostel B"},
+        {"description": "Ceiling fan not working", "location": "Hostel B"},
+        {"description": "Ceiling fan not working", "location": "Hostel B", "on_duplicate": "merge"},
+    ]})).json()["results"]
+    first = results[0]["id"]
+    assert [(r["status"], r["id"], r["duplicate_of"]) for r in results] == [
+        ("created", first, None), ("error", first, 0), ("merged", first, None),
+    ]
+    with engine.connect() as conn:
+        assert conn.execute(select(Issue.id)).scalars().all() == [first]
+
+
+async def test_a_failed_batch_keeps_none_of_its_merges(client, login, monkeypatch):
+    login("student-1")
+    original = (await report(client)).json()
+    login("student-2")
+    items = [
+        {"description": "The ceiling fan is not working", "location": "Hostel B",
+         "on_duplicate": "merge", "idempotency_key": "merge-1"},
+        {"description": "Light flickering", "location": "Hostel B", "idempotency_key": "new-1"},
+    ]
+
+    async def fail(*args, **kwargs):
+        raise RuntimeError("insert failed")
+    with monkeypatch.context() as patched:
+        patched.setattr(main.rollups, "record", fail)
+        with pytest.raises(RuntimeError):
+            await client.post("/issues/batch", json={"items": items})
+    with engine.connect() as conn:
+        assert conn.execute(select(Issue.upvotes).where(Issue.id == original["id"])).scalar_one() == 0
+
+    # The retry, with the same keys, merges once
+    results = (await client.post("/issues/batch", json={"items": items})).json()["results"]
+    assert [r["status"] for r in results] == ["merged", "created"]
+    with engine.connect() as conn:
+        assert conn.execute(select(Issue.upvotes).where(Issue.id == original["id"])).scalar_one() == 1
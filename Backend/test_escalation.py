@@ -0,0 +1,56 @@
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import insert, select
+
+import escalation
+from escalation import escalate, escalation_update
+from models import Issue, engine
+
+pytestmark = pytest.mark.anyio
+
+
+def add_issues(*rows) -> list:
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        return conn.execute(insert(Issue).returning(Issue.id, sort_by_parameter_order=True), [{
+            "description": "Broken bench", "location": "Quad", "status": "pending", "priority": "low",
+            "category": "furniture", "upvotes": 0, "created_at": now, "updated_at": now, **row,
+        } for row in rows]).scalars().all()
+
+
+def priorities() -> dict:
+    with engine.connect() as conn:
+        return dict(conn.execute(select(Issue.id, Issue.priority)).all())
+
+
+async def test_open_issues_move_up_and_never_down():
+    ids = add_issues(
+        {"upvotes": 20},
+        {"upvotes": 6},
+        {"upvotes": 20, "status": "resolved"},
+        {"priority": "high"},
+        {"category": "safety_hazard", "created_at": datetime.utcnow() - timedelta(days=60)},
+    )
+    assert await escalate(batch_size=2) == 3
+    assert priorities() == dict(zip(ids, ["high", "medium", "low", "high", "high"]))
+    assert await escalate(batch_size=2) == 0
+
+
+async def test_each_batch_is_stamped_when_it_runs(monkeypatch):
+    first, second = add_issues({"upvotes": 20}, {"upvotes": 20})
+    written_between = []
+
+    def update_after_a_write(dialect, first_id, last_id, now):
+        if first_id == second:
+            # A write that a sync client may already have seen before this batch commits
+            time.sleep(0.01)
+            written_between.extend(add_issues({}))
+        return escalation_update(dialect, first_id, last_id, now)
+    monkeypatch.setattr(escalation, "escalation_update", update_after_a_write)
+
+    await escalation.escalate(batch_size=1)
+    with engine.connect() as conn:
+        stamps = dict(conn.execute(select(Issue.id, Issue.updated_at)).all())
+    assert stamps[second] > stamps[written_between[0]]
@@ -0,0 +1,85 @@
+import pytest
+
+import events
+from events import RESYNC, EventBroker, broker, publish, stream
+
+pytestmark = pytest.mark.anyio
+
+
+def drain(subscription) -> list:
+    received = []
+    while not subscription.queue.empty():
+        received.append(subscription.queue.get_nowait())
+    return received
+
+
+async def test_each_event_reaches_every_subscriber_that_wants_it():
+    local = EventBroker()
+    everything = local.subscribe(("issue.", "safety."))
+    issues = local.subscribe(("issue.",))
+    safety = local.subscribe(("safety.",))
+    heard = []
+    local.add_listener("safety.", heard.append)
+
+    created = {"type": "issue.created", "data": {"id": 1}}
+    reported = {"type": "safety.report_created", "data": {"id": 2}}
+    await local.publish(created)
+    await local.publish(reported)
+    assert drain(everything) == [created, reported]
+    assert drain(issues) == [created]
+    assert drain(safety) == [reported]
+    assert heard == [reported]
+
+    local.unsubscribe(issues)
+    await local.publish(created)
+    assert drain(issues) == []
+
+
+async def test_a_subscriber_that_falls_behind_gets_one_resync(monkeypatch):
+    monkeypatch.setattr(events, "EVENT_QUEUE_SIZE", 3)
+    local = EventBroker()
+    slow = local.subscribe(("issue.",))
+    for n in range(5):
+        await local.publish({"type": "issue.upvoted", "data": {"id": n}})
+    received = drain(slow)
+    assert RESYNC in received
+    assert len(received) <= 3
+
+
+async def test_the_stream_sends_events_as_sse_and_unsubscribes_when_closed(monkeypatch):
+    monkeypatch.setattr(events, "EVENT_HEARTBEAT_SECONDS", 0.01)
+    sse = stream(("issue.",))
+    assert await sse.__anext__() == "retry: 5000\n\n"
+    assert await sse.__anext__() == ": ping\n\n"
+
+    await publish("safety.report_created", id=7)  # Not asked for
+    await publish("issue.status_changed", id=3, status="resolved")
+    assert await sse.__anext__() == 'event: issue.status_changed\ndata: {"id": 3, "status": "resolved"}\n\n'
+
+    subscribers = len(broker._subscribers)
+    await sse.aclose()
+    assert len(broker._subscribers) == subscribers - 1
+
+
+async def test_a_broker_failure_never_reaches_the_request(client, login, monkeypatch):
+    async def down(event):
+        raise ConnectionError("broker down")
+    monkeypatch.setattr(broker, "publish", down)
+    login()
+    response = await client.post("/issues", data={"description": "Fan broken", "location": "Library"})
+    assert response.status_code == 200
+
+
+async def test_endpoints_publish_their_changes(client, login):
+    subscription = broker.subscribe(("issue.",))
+    try:
+        login()
+        issue_id = (await client.post("/issues", data={"description": "Fan broken", "location": "Library"})).json()["id"]
+        login("student-2")
+        await client.post(f"/issues/{issue_id}/upvote")
+        assert [(event["type"], event["data"]["id"]) for event in drain(subscription)] == [
+            ("issue.created", issue_id), ("issue.upvoted", issue_id),
+        ]
+    finally:
+        broker.unsubscribe(subscription)
+
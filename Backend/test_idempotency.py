@@ -0,0 +1,94 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import func, select, update
+
+from idempotency import REPLAYED_HEADER, fingerprint, idempotency_keys
+from models import IdempotencyKey, Issue, engine
+
+pytestmark = pytest.mark.anyio
+
+
+def issue_count() -> int:
+    with engine.connect() as conn:
+        return conn.scalar(select(func.count()).select_from(Issue))
+
+
+async def submit(client, key, description="Fan broken", **fields):
+    return await client.post(
+        "/issues", data={"description": description, "location": "Library", **fields},
+        headers={"Idempotency-Key": key},
+    )
+
+
+async def test_a_retry_gets_the_first_response_back(client, login):
+    login()
+    first = await submit(client, "key-1")
+    retry = await submit(client, "key-1")
+    assert retry.json() == first.json()
+    assert retry.headers[REPLAYED_HEADER] == "true"
+    assert REPLAYED_HEADER not in first.headers
+    assert issue_count() == 1
+
+
+async def test_a_key_reused_for_a_different_report_is_rejected(client, login):
+    login()
+    await submit(client, "key-1")
+    assert (await submit(client, "key-1", "Light flickering")).status_code == 422
+    assert issue_count() == 1
+
+
+async def test_a_key_reused_with_another_photo_or_duplicate_handling_is_rejected(client, login):
+    login()
+    await submit(client, "key-1")
+    assert (await submit(client, "key-1", on_duplicate="merge")).status_code == 422
+    photo = {"image": ("fan.jpg", b"photo", "image/jpeg")}
+    retry = await client.post(
+        "/issues", data={"description": "Fan broken", "location": "Library"}, files=photo,
+        headers={"Idempotency-Key": "key-1"},
+    )
+    assert retry.status_code == 422
+    assert issue_count() == 1
+
+
+async def test_a_claim_whose_request_died_is_taken_over_after_the_timeout(client, login):
+    login()
+    request_fingerprint = fingerprint("Fan broken", "Library", "reject", None)
+    await idempotency_keys.claim("issues:student-1", "key-1", request_fingerprint)
+    assert (await submit(client, "key-1")).status_code == 409
+
+    with engine.begin() as conn:
+        conn.execute(update(IdempotencyKey).values(claimed_at=datetime.utcnow() - timedelta(minutes=10)))
+    assert (await submit(client, "key-1")).status_code == 200
+    assert (await submit(client, "key-1")).headers[REPLAYED_HEADER] == "true"
+    assert issue_count() == 1
+
+
+async def test_keys_are_per_user(client, login):
+    login("student-1")
+    first = (await submit(client, "key-1")).json()
+    login("student-2")
+    second = (await submit(client, "key-1", on_duplicate="create")).json()
+    assert second["id"] != first["id"]
+
+
+async def test_a_failed_request_releases_its_key(client, login):
+    login()
+    await submit(client, "key-1")
+    # Rejected as a duplicate; the same key can then be used for the retry
+    assert (await submit(client, "key-2")).status_code == 409
+    assert (await submit(client, "key-2", on_duplicate="create")).status_code == 200
+    assert issue_count() == 2
+
+
+async def test_batch_items_replay_their_first_result(client, login):
+    login()
+    items = [
+        {"description": "Fan broken", "location": "Library", "idempotency_key": "item-1"},
+        {"description": "Light flickering", "location": "Library", "idempotency_key": "item-2"},
+    ]
+    first = (await client.post("/issues/batch", json={"items": items})).json()["results"]
+    retry = (await client.post("/issues/batch", json={"items": items})).json()["results"]
+    assert [r["status"] for r in first] == ["created", "created"]
+    assert [(r["status"], r["id"]) for r in retry] == [(r["status"], r["id"]) for r in first]
+    assert issue_count() == 2
@@ -0,0 +1,74 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import insert, select
+
+import locations
+from models import AsyncSessionLocal, Issue, SafetyReport, engine
+
+pytestmark = pytest.mark.anyio
+
+
+async def resolve(*spellings) -> list:
+    async with AsyncSessionLocal() as db:
+        ids = [(await locations.resolve_location(db, spelling))[0] for spelling in spellings]
+        await db.commit()
+    return ids
+
+
+@pytest.mark.parametrize("spelling", ["lecture hall 3 ", "Lecture-Hall 3", "LectureHall 3", "LH3", "LH 3", "Lecture Hal 3"])
+async def test_spellings_of_one_place_resolve_to_it(spelling):
+    assert len(set(await resolve("Lecture Hall 3", spelling))) == 1
+
+
+@pytest.mark.parametrize("first, second", [
+    ("Room 101", "Room 102"),
+    ("Hostel A", "Hostel B"),
+    ("Admin Block - Room 2", "Admin Block - Floor 2"),
+    ("Library", "Laboratory"),
+])
+async def test_different_places_stay_apart(first, second):
+    assert len(set(await resolve(first, second))) == 2
+
+
+async def test_the_first_spelling_names_the_place(client, login):
+    login()
+    first = (await client.post("/issues", data={"description": "Fan broken", "location": "Main Library"})).json()
+    second = (await client.post("/issues", data={
+        "description": "Leaking tap", "location": "main libary", "on_duplicate": "create",
+    })).json()
+    assert first["location_id"] == second["location_id"] is not None
+    assert second["location"] == "main libary"
+
+
+async def test_backfill_links_rows_without_touching_updated_at():
+    stamp = datetime(2026, 1, 5, 12)
+    with engine.begin() as conn:
+        conn.execute(insert(Issue), [{"description": "Fan broken", "location": spelling, "status": "pending",
+                                      "created_at": stamp, "updated_at": stamp} for spelling in ("Gym", "gym ", "GYM")])
+    stats = await locations.backfill()
+    assert stats["issues"] == 3
+    with engine.connect() as conn:
+        rows = conn.execute(select(Issue.location_id, Issue.updated_at)).all()
+    assert len({location_id for location_id, _ in rows}) == 1
+    assert {updated_at for _, updated_at in rows} == {stamp}
+
+
+async def test_hotspots_rank_places_by_open_issues_and_recent_safety_reports(client, login):
+    login()
+    gym, library, gate = await resolve("Gym", "Library", "Gate")
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        conn.execute(insert(Issue), [
+            {"description": "Issue", "location": "x", "location_id": location_id, "status": status}
+            for location_id, status in [(gym, "pending"), (gym, "in_progress"), (gym, "resolved"), (library, "pending")]
+        ])
+        conn.execute(insert(SafetyReport), [
+            {"description": "Report", "location": "x", "location_id": location_id, "status": "received",
+             "created_at": created_at}
+            for location_id, created_at in [(gate, now), (gate, now), (gate, now), (library, now - timedelta(days=90))]
+        ])
+    body = (await client.get("/analytics/hotspots", params={"days": 30})).json()
+    assert [(h["name"], h["open_issues"], h["safety_incidents"]) for h in body["hotspots"]] == [
+        ("Gate", 0, 3), ("Gym", 2, 0), ("Library", 1, 0),
+    ]
@@ -0,0 +1,48 @@
+import pytest
+
+import metrics
+from metrics import Histogram
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_metrics_need_the_token_when_one_is_set(client, monkeypatch):
+    monkeypatch.setenv("METRICS_TOKEN", "s3cret")
+    assert (await client.get("/metrics")).status_code == 401
+    assert (await client.get("/metrics", headers={"Authorization": "Bearer wrong"})).status_code == 401
+    assert (await client.get("/metrics", headers={"Authorization": "s3cret"})).status_code == 401
+    response = await client.get("/metrics", headers={"Authorization": "Bearer s3cret"})
+    assert response.status_code == 200
+    assert "# TYPE campusfix_http_request_duration_seconds histogram" in response.text
+
+
+async def test_requests_are_recorded_by_route_template(client, login, monkeypatch):
+    monkeypatch.delenv("METRICS_TOKEN", raising=False)
+    login()
+    response = await client.post("/issues/12345/upvote")
+    assert response.status_code == 404
+    assert len(response.headers["x-request-id"]) == 16
+
+    text = (await client.get("/metrics")).text
+    assert 'campusfix_http_request_duration_seconds_count{method="POST",route="/issues/{issue_id}/upvote",status="404"}' in text
+    assert "/issues/12345" not in text
+    assert 'campusfix_db_queries_per_request_count{method="POST",route="/issues/{issue_id}/upvote"}' in text
+
+
+async def test_slow_queries_are_counted(client, login, monkeypatch):
+    monkeypatch.setattr(metrics, "SLOW_QUERY_MS", 0)
+    before = metrics.slow_queries._values.get((), 0)
+    login()
+    await client.get("/issues")
+    assert metrics.slow_queries._values[()] > before
+
+
+def test_histogram_buckets_are_cumulative_and_labels_escaped():
+    histogram = Histogram("test_seconds", "Test", ("route",), (0.1, 1.0))
+    for value in (0.05, 0.5, 5.0):
+        histogram.observe(('/a"b',), value)
+    lines = histogram.render()
+    assert 'test_seconds_bucket{route="/a\\"b",le="0.1"} 1' in lines
+    assert 'test_seconds_bucket{route="/a\\"b",le="1.0"} 2' in lines
+    assert 'test_seconds_bucket{route="/a\\"b",le="+Inf"} 3' in lines
+    assert 'test_seconds_count{route="/a\\"b"} 3' in lines
@@ -0,0 +1,36 @@
+import os
+import subprocess
+import sys
+
+from sqlalchemy import inspect
+
+from migrations import available
+from models import Base, engine
+
+BACKEND = os.path.dirname(os.path.abspath(__file__))
+
+
+def run(tmp_path, *args) -> subprocess.CompletedProcess:
+    env = {**os.environ, "DATABASE_URL": f"sqlite:///{tmp_path}/fresh.db"}
+    return subprocess.run([sys.executable, "-m", *args], cwd=BACKEND, env=env, capture_output=True, text=True)
+
+
+def test_migrations_apply_once_to_a_fresh_database(tmp_path):
+    first = run(tmp_path, "migrations")
+    assert first.returncode == 0, first.stderr
+    assert first.stdout.splitlines()[-1].startswith(f"Applied {len(available())} migration(s)")
+    assert run(tmp_path, "migrations").stdout.splitlines()[-1].endswith("the schema is up to date")
+    assert "pending" not in run(tmp_path, "migrations", "--status").stdout
+
+
+def test_the_plan_check_passes_on_a_fresh_database(tmp_path):
+    result = run(tmp_path, "migrations.plans")
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert "FAIL" not in result.stdout
+
+
+def test_the_migrated_schema_has_every_model_column_and_index():
+    schema = inspect(engine)
+    for table in Base.metadata.sorted_tables:
+        assert {c.name for c in table.columns} <= {c["name"] for c in schema.get_columns(table.name)}, table.name
+        assert {i.name for i in table.indexes} <= {i["name"] for i in schema.get_indexes(table.name)}, table.name
@@ -0,0 +1,48 @@
+import random
+
+import pytest
+
+pytest.importorskip("nude")
+
+from PIL import Image
+
+import moderation
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def photo(tmp_path):
+    """A 1600x1200 JPEG of coloured noise: slow to parse at full size."""
+    rng = random.Random(0)
+    image = Image.frombytes("RGB", (1600, 1200), bytes(rng.getrandbits(8) for _ in range(1600 * 1200 * 3)))
+    path = tmp_path / "photo.jpg"
+    image.save(path, "JPEG")
+    return str(path)
+
+
+def test_classify_file_parses_a_downscaled_copy(photo, monkeypatch):
+    sizes = []
+
+    class Recorded(moderation.Nude):
+        def __init__(self, path):
+            super().__init__(path)
+            sizes.append((self.width, self.height))
+    monkeypatch.setattr(moderation, "Nude", Recorded)
+    assert moderation.classify_file(photo, thumbnail_size=160) in (True, False)
+    assert max(sizes[0]) <= 160
+
+
+def test_classify_file_stops_at_the_timeout(photo):
+    with pytest.raises(moderation._ClassificationTimeout):
+        moderation.classify_file(photo, timeout=0.01)
+
+
+async def test_classify_runs_in_the_process_pool(tmp_path):
+    path = tmp_path / "sky.png"
+    Image.new("RGB", (800, 600), (40, 90, 200)).save(path)
+    moderation.start_moderation_pool()
+    try:
+        assert await moderation.classify(str(path)) is False
+    finally:
+        moderation.stop_moderation_pool()
@@ -0,0 +1,72 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import insert
+
+from models import Issue, SafetyReport, engine
+
+pytestmark = pytest.mark.anyio
+
+START = datetime(2026, 1, 1)
+
+
+def add_issues(count: int, start: datetime = START, **values) -> list:
+    """Issues with pairs of equal created_at (so pages split ties); returns their ids, newest first."""
+    rows = [{
+        "description": f"Issue {n}", "location": "Library", "status": "pending",
+        "created_at": start + timedelta(minutes=n // 2), "updated_at": start + timedelta(minutes=n // 2),
+        **values,
+    } for n in range(count)]
+    with engine.begin() as conn:
+        ids = conn.execute(insert(Issue).returning(Issue.id, sort_by_parameter_order=True), rows).scalars().all()
+    return [row_id for _, row_id in sorted(zip((r["created_at"] for r in rows), ids), reverse=True)]
+
+
+async def read_all(client, path: str, limit: int, **params) -> list:
+    ids, cursor = [], None
+    while True:
+        page = (await client.get(path, params={"limit": limit, **params, **({"cursor": cursor} if cursor else {})})).json()
+        ids += [item["id"] for item in page["items"]]
+        cursor = page["next_cursor"]
+        if not cursor:
+            return ids
+
+
+async def test_pages_cover_every_issue_once_newest_first(client, login):
+    login()
+    expected = add_issues(11)
+    assert await read_all(client, "/issues", limit=3) == expected
+
+
+async def test_rows_added_while_paging_do_not_shift_pages(client, login):
+    login()
+    expected = add_issues(6)
+    first = (await client.get("/issues", params={"limit": 3})).json()
+    add_issues(4, start=START + timedelta(days=1))  # Newer than everything already listed
+    rest = (await client.get("/issues", params={"limit": 3, "cursor": first["next_cursor"]})).json()
+    assert [item["id"] for item in first["items"] + rest["items"]] == expected
+    assert rest["next_cursor"] is None
+
+
+async def test_filters_and_cursor_combine(client, login):
+    login("student-2")
+    add_issues(5, status="resolved")
+    pending = add_issues(5, user_id="student-2")
+    assert await read_all(client, "/issues", limit=2, status="pending") == pending
+    assert await read_all(client, "/issues", limit=2, mine="true") == pending
+
+
+async def test_invalid_cursor_is_rejected(client, login):
+    login()
+    assert (await client.get("/issues", params={"cursor": "not-a-cursor"})).status_code == 400
+
+
+async def test_safety_reports_page_the_same_way(client, login):
+    login("admin", admin=True)
+    with engine.begin() as conn:
+        conn.execute(insert(SafetyReport), [{
+            "description": f"Report {n}", "location": "Gate", "status": "received",
+            "created_at": START + timedelta(minutes=n // 2),
+        } for n in range(7)])
+    ids = await read_all(client, "/safety/reports", limit=2)
+    assert len(ids) == len(set(ids)) == 7
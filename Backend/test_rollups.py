@@ -0,0 +1,107 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import insert, select
+
+import locations
+import rollups
+from models import AnalyticsDaily, Issue, IssueStatusHistory, SafetyReport, engine
+from recategorize import recategorize
+
+pytestmark = pytest.mark.anyio
+
+DAY = datetime(2026, 3, 2, 9)
+
+
+def counters() -> list:
+    with engine.connect() as conn:
+        return sorted(conn.execute(
+            select(AnalyticsDaily.source, AnalyticsDaily.dimension, AnalyticsDaily.day, AnalyticsDaily.value,
+                   AnalyticsDaily.count).where(AnalyticsDaily.count != 0)
+        ).all())
+
+
+def rebuilt() -> list:
+    with engine.begin() as conn:
+        rollups.rebuild(conn)
+    return counters()
+
+
+def add(model, *rows) -> list:
+    with engine.begin() as conn:
+        ids = conn.execute(insert(model).returning(model.id, sort_by_parameter_order=True), list(rows)).scalars().all()
+        rollups.rebuild(conn)
+    return ids
+
+
+async def test_write_paths_keep_the_counters_equal_to_a_rebuild(client, login):
+    login("admin", admin=True)
+    ids = [(await client.post("/issues", data={
+        "description": description, "location": "Library", "on_duplicate": "create",
+    })).json()["id"] for description in ("Fan broken", "Leaking tap", "Broken chair")]
+    await client.post("/safety/reports", data={"description": "Dark path", "location": "Gate"})
+    assert (await client.patch(f"/issues/{ids[0]}/status", json={"status": "in_progress"})).status_code == 200
+    assert (await client.patch("/issues/status", json={"status": "resolved", "ids": ids[1:]})).json()["updated"] == 2
+
+    before = counters()
+    assert before == rebuilt()
+    today = datetime.utcnow().date()
+    assert ("issues", "status", today, "resolved", 2) in before
+    assert ("issues", "category", today, "plumbing", 1) in before
+
+
+async def test_single_status_update_only_accepts_known_statuses(client, login):
+    [issue_id] = add(Issue, {"description": "Fan broken", "location": "Library", "status": "pending", "created_at": DAY})
+    for sign_in in (lambda: login(None), lambda: login("student-1")):
+        sign_in()
+        assert (await client.patch(f"/issues/{issue_id}/status", json={"status": "resolved"})).status_code == 403
+
+    login("admin", admin=True)
+    assert (await client.patch(f"/issues/{issue_id}/status", json={"status": "done"})).status_code == 422
+    assert (await client.patch("/issues/999/status", json={"status": "resolved"})).status_code == 404
+    assert (await client.patch(f"/issues/{issue_id}/status", json={"status": "resolved"})).status_code == 200
+    with engine.connect() as conn:
+        # Only the admin's change was recorded
+        assert conn.execute(select(IssueStatusHistory.status, IssueStatusHistory.changed_by)).all() == [
+            ("resolved", "admin@campus.example"),
+        ]
+
+
+async def test_bulk_status_update_by_filter(client, login):
+    login("admin", admin=True)
+    rows = [{"description": "Issue", "location": "Library", "status": "pending", "category": category,
+             "created_at": DAY + timedelta(days=n)} for n, category in enumerate(["plumbing", "plumbing", "furniture"])]
+    old, new, other = add(Issue, *rows)
+    result = (await client.patch("/issues/status", json={
+        "status": "resolved", "filter": {"category": "plumbing", "created_before": (DAY + timedelta(days=1)).isoformat()},
+    })).json()
+    assert result == {"updated": 1, "ids": [old]}
+    with engine.connect() as conn:
+        assert conn.execute(select(IssueStatusHistory.issue_id, IssueStatusHistory.status)).all() == [(old, "resolved")]
+
+    assert (await client.patch("/issues/status", json={"status": "resolved", "filter": {}})).status_code == 400
+    assert (await client.patch("/issues/status", json={"status": "resolved"})).status_code == 400
+    login("student-1")
+    assert (await client.patch("/issues/status", json={"status": "resolved", "ids": [new]})).status_code == 403
+
+
+def test_recategorize_moves_the_category_counters():
+    add(Issue,
+        {"description": "Fan broken", "location": "Library", "status": "pending", "category": "general", "created_at": DAY},
+        {"description": "Leaking tap", "location": "Library", "status": "pending", "category": "plumbing",
+         "created_at": DAY})
+    recategorize()
+    after = counters()
+    assert after == rebuilt()
+    assert ("issues", "category", DAY.date(), "electrical", 1) in after
+    assert not [c for c in after if c[1] == "category" and c[3] == "general"]
+
+
+async def test_location_backfill_moves_the_location_counters():
+    add(Issue, *({"description": "Fan broken", "location": spelling, "status": "pending", "created_at": DAY}
+                 for spelling in ("Library", "library ", "Library")))
+    add(SafetyReport, {"description": "Dark path", "location": "LIBRARY", "status": "received", "created_at": DAY})
+    await locations.backfill()
+    after = counters()
+    assert after == rebuilt()
+    assert ("issues", "location", DAY.date(), "Library", 3) in after
@@ -0,0 +1,69 @@
+import pytest
+from sqlalchemy import insert, select
+
+import safety
+from models import SafetyReport, engine
+
+pytestmark = pytest.mark.anyio
+
+
+async def report_with_media(client) -> dict:
+    response = await client.post(
+        "/safety/reports", data={"description": "Broken lock", "location": "Gate"},
+        files={"media": ("photo.jpg", b"not really a jpeg", "image/jpeg")},
+    )
+    assert response.status_code == 200
+    return response.json()
+
+
+def stored_verdict(report_id: int):
+    with engine.connect() as conn:
+        return conn.execute(select(SafetyReport.is_nsfw).where(SafetyReport.id == report_id)).scalar_one()
+
+
+async def test_media_is_held_when_no_classifier_is_installed(client, monkeypatch):
+    monkeypatch.setattr(safety, "classifier_available", lambda: False)
+    report = await report_with_media(client)
+    assert report["is_nsfw"] is None
+    assert stored_verdict(report["id"]) is None
+
+
+async def test_media_is_held_when_the_check_fails_or_times_out(client, monkeypatch):
+    checked = []
+
+    async def no_verdict(path):
+        checked.append(path)
+        return None
+    monkeypatch.setattr(safety, "classifier_available", lambda: True)
+    monkeypatch.setattr(safety, "classify", no_verdict)
+    report = await report_with_media(client)
+    # The check runs as a background task, before the transport returns the response
+    assert len(checked) == 1
+    assert stored_verdict(report["id"]) is None
+
+
+async def test_community_feed_shows_only_media_cleared_by_the_check_or_a_review(client, login):
+    with engine.begin() as conn:
+        ids = conn.execute(insert(SafetyReport).returning(SafetyReport.id, sort_by_parameter_order=True), [{
+            "description": f"Report {n}", "location": "Gate", "status": "received", "is_critical": 1,
+            "media_sha256": f"{n}" * 64, "media_url": f"https://cdn.example/{n}.jpg", "is_nsfw": verdict,
+        } for n, verdict in enumerate([None, 0, 1])]).scalars().all()
+    held, cleared, flagged = ids
+
+    async def feed_media() -> dict:
+        return {item["id"]: item["media_url"] for item in (await client.get("/safety/community")).json()}
+
+    media = await feed_media()
+    assert media == {held: None, cleared: "https://cdn.example/1.jpg", flagged: None}
+
+    login("admin", admin=True)
+    queue = (await client.get("/safety/reports", params={"needs_review": "true"})).json()
+    assert [item["id"] for item in queue["items"]] == [held]
+    reviewed = await client.patch(f"/safety/reports/{held}/review", json={"is_nsfw": False})
+    assert reviewed.json()["is_nsfw"] is False
+    assert (await feed_media())[held] == "https://cdn.example/0.jpg"
+
+
+async def test_only_admins_review_media(client, login):
+    login()
+    assert (await client.patch("/safety/reports/1/review", json={"is_nsfw": False})).status_code == 403
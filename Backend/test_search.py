@@ -0,0 +1,81 @@
+import pytest
+from sqlalchemy import insert, update
+
+from models import Issue, SafetyReport, engine
+
+pytestmark = pytest.mark.anyio
+
+
+def add(model, *rows) -> list:
+    with engine.begin() as conn:
+        return conn.execute(insert(model).returning(model.id, sort_by_parameter_order=True), list(rows)).scalars().all()
+
+
+def add_issues(*rows) -> list:
+    return add(Issue, *({"description": description, "location": location, "status": "pending"}
+                        for description, location in rows))
+
+
+async def search(client, q, **params) -> list:
+    response = await client.get("/issues/search", params={"q": q, **params})
+    assert response.status_code == 200, response.text
+    return [item["id"] for item in response.json()["items"]]
+
+
+async def test_every_word_must_match_and_the_last_is_a_prefix(client, login):
+    login()
+    fan, light, other_fan = add_issues(
+        ("Ceiling fan broken", "Hostel B"), ("Light broken", "Hostel B"), ("Fan making noise", "Library"),
+    )
+    assert await search(client, "broken fan") == [fan]
+    assert sorted(await search(client, "brok")) == [fan, light]
+    assert sorted(await search(client, "fan")) == [fan, other_fan]
+
+
+@pytest.mark.parametrize("q", [
+    'fan "broken', '"fan" OR "light"', "fan AND NOT light", "fan*", "NEAR(fan light)",
+    "fan's broken!", "fan: broken", "-fan +broken", "(fan", "fan)", "fan^2", "{fan}", "fan' --",
+])
+async def test_punctuation_and_quotes_are_not_query_syntax(client, login, q):
+    login()
+    [fan] = add_issues(("Ceiling fan broken", "Hostel B"))
+    add_issues(("Light flickering", "Hostel B"))
+    ids = await search(client, q)
+    # Whatever it matches, the query never errors and never widens to rows missing a word
+    assert set(ids) <= {fan}
+
+
+@pytest.mark.parametrize("q", ['"', "***", "!!", "()"])
+async def test_a_query_without_words_matches_nothing(client, login, q):
+    login()
+    add_issues(("Ceiling fan broken", "Hostel B"))
+    assert await search(client, q) == []
+
+
+async def test_description_matches_rank_above_location_matches(client, login):
+    login()
+    in_location, in_description = add_issues(("Door jammed", "Library annex"), ("Library door jammed", "Gate"))
+    assert await search(client, "library") == [in_description, in_location]
+
+
+async def test_the_index_follows_updates_and_pages_by_cursor(client, login):
+    login()
+    ids = add_issues(*((f"Fan {n} broken", "Hostel B") for n in range(5)))
+    with engine.begin() as conn:
+        conn.execute(update(Issue).where(Issue.id == ids[0]).values(description="Light broken"))
+    assert ids[0] not in await search(client, "fan")
+
+    first = (await client.get("/issues/search", params={"q": "fan", "limit": 3})).json()
+    rest = (await client.get("/issues/search", params={"q": "fan", "limit": 3, "cursor": first["next_cursor"]})).json()
+    assert sorted(item["id"] for item in first["items"] + rest["items"]) == ids[1:]
+    assert rest["next_cursor"] is None
+    assert (await client.get("/issues/search", params={"q": "fan", "cursor": "nope"})).status_code == 400
+
+
+async def test_safety_report_search_is_admin_only(client, login):
+    [report] = add(SafetyReport, {"description": "Broken street light", "location": "Gate", "status": "received"})
+    login()
+    assert (await client.get("/safety/reports/search", params={"q": "light"})).status_code == 403
+    login("admin", admin=True)
+    items = (await client.get("/safety/reports/search", params={"q": 'light"'})).json()["items"]
+    assert [item["id"] for item in items] == [report]
@@ -0,0 +1,89 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import insert, update
+
+from models import Issue, engine
+
+pytestmark = pytest.mark.anyio
+
+
+def add_issue(updated_at: datetime, **values) -> int:
+    row = {"description": "Fan broken", "location": "Library", "status": "pending",
+           "created_at": updated_at, "updated_at": updated_at, **values}
+    with engine.begin() as conn:
+        return conn.execute(insert(Issue).returning(Issue.id), row).scalar_one()
+
+
+async def sync(client, since=None, limit=200) -> tuple:
+    """Run the delta feed until caught up, as IssuesProvider.refreshIssues does; returns (ids, next token)."""
+    ids = []
+    while True:
+        page = (await client.get("/issues/changes", params={"limit": limit, **({"since": since} if since else {})})).json()
+        ids += [item["id"] for item in page["items"]]
+        since = page["next_since"]
+        if not page["has_more"]:
+            return ids, since
+
+
+async def test_list_etag_answers_304_until_something_changes(client, login):
+    login()
+    issue_id = add_issue(datetime.utcnow())
+    first = await client.get("/issues")
+    etag = first.headers["etag"]
+    assert (await client.get("/issues", headers={"If-None-Match": etag})).status_code == 304
+
+    await client.post(f"/issues/{issue_id}/upvote")
+    changed = await client.get("/issues", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+
+
+async def test_list_etag_changes_when_an_earlier_stamped_write_commits_late(client, login):
+    login()
+    now = datetime.utcnow()
+    add_issue(now)
+    etag = (await client.get("/issues")).headers["etag"]
+    # Stamped before the newest row, committed after the client read the list
+    add_issue(now - timedelta(seconds=5))
+    assert (await client.get("/issues", headers={"If-None-Match": etag})).status_code == 200
+
+
+async def test_delta_feed_returns_rows_that_commit_after_a_later_stamped_row(client, login):
+    login()
+    now = datetime.utcnow()
+    _, token = await sync(client)
+    add_issue(now)
+    _, token = await sync(client, token)
+    late = add_issue(now - timedelta(seconds=5))
+    ids, token = await sync(client, token)
+    assert late in ids
+
+
+async def test_delta_feed_sends_changes_after_the_list_was_read(client, login):
+    login()
+    issue_id = add_issue(datetime.utcnow())
+    token = (await client.get("/issues")).json()["sync_token"]
+    with engine.begin() as conn:
+        conn.execute(update(Issue).where(Issue.id == issue_id).values(status="resolved"))
+    page = (await client.get("/issues/changes", params={"since": token})).json()
+    assert [(item["id"], item["status"]) for item in page["items"]] == [(issue_id, "resolved")]
+
+
+async def test_paged_catch_up_ends_even_when_the_overlap_window_is_larger_than_a_page(client, login):
+    login()
+    now = datetime.utcnow()
+    expected = [add_issue(now - timedelta(seconds=n)) for n in range(5, 0, -1)]
+    ids, token = await sync(client, limit=2)
+    assert ids == expected
+    # The overlap window is sent again, and the sync still ends
+    again, _ = await sync(client, token, limit=2)
+    assert again == expected
+
+
+async def test_rows_older_than_the_overlap_window_are_not_sent_again(client, login):
+    login()
+    old = add_issue(datetime.utcnow() - timedelta(hours=2))
+    ids, token = await sync(client)
+    assert ids == [old]
+    assert (await sync(client, token))[0] == []
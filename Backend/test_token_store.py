@@ -0,0 +1,58 @@
+import pytest
+
+from token_store import DatabaseStore, MemoryStore, mobile_tokens
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture(params=[MemoryStore, DatabaseStore])
+def make(request):
+    """make(namespace, ttl) builds a store of each kind in turn."""
+    return request.param
+
+
+async def test_an_entry_is_read_once(make):
+    store = make("test", ttl=60)
+    await store.put("state-1", {"platform": "mobile"})
+    assert await store.pop("state-1") == {"platform": "mobile"}
+    assert await store.pop("state-1") is None
+    assert await store.pop("never-stored") is None
+
+
+async def test_expired_entries_are_never_returned_and_are_swept(make):
+    expired, live = make("test", ttl=-1), make("test", ttl=60)
+    await expired.put("old-1", {"n": 1})
+    await expired.put("old-2", {"n": 2})
+    await live.put("new", {"n": 3})
+    assert await expired.pop("old-1") is None
+
+    if make is MemoryStore:
+        # Each memory store holds only its own entries
+        assert await expired.sweep() == 1
+        assert await live.sweep() == 0
+    else:
+        assert await live.sweep() == 1
+    assert await live.pop("new") == {"n": 3}
+
+
+async def test_the_database_sweep_keeps_to_its_namespace():
+    other = DatabaseStore("other", ttl=-1)
+    await other.put("token", {"n": 1})
+    assert await DatabaseStore("test", ttl=-1).sweep() == 0
+    assert await other.sweep() == 1
+
+
+async def test_the_memory_store_drops_its_oldest_entries_past_its_bound():
+    store = MemoryStore("test", ttl=60, max_entries=2)
+    for key in ("a", "b", "c"):
+        await store.put(key, {"key": key})
+    assert await store.pop("a") is None
+    assert await store.pop("c") == {"key": "c"}
+
+
+async def test_a_mobile_token_is_exchanged_once(client):
+    await mobile_tokens.put("temp", {"user": {"sub": "student-1", "email": "s@campus.example"}})
+    first = await client.post("/auth/exchange-token", json={"token": "temp"})
+    assert first.json()["sub"] == "student-1"
+    assert (await client.post("/auth/exchange-token", json={"token": "temp"})).status_code == 401
+    assert (await client.post("/auth/exchange-token", json={})).status_code == 401
@@ -0,0 +1,31 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import insert, select
+
+import uploads
+from models import Issue, engine
+
+pytestmark = pytest.mark.anyio
+
+
+def add_issue(updated_at: datetime, image_status) -> int:
+    row = {"description": "Broken window", "location": "Library", "status": "pending", "image_status": image_status,
+           "created_at": updated_at - timedelta(days=7), "updated_at": updated_at}
+    with engine.begin() as conn:
+        return conn.execute(insert(Issue).returning(Issue.id), row).scalar_one()
+
+
+async def test_images_left_pending_by_a_lost_job_are_marked_failed():
+    now = datetime.utcnow()
+    stale = add_issue(now - timedelta(seconds=uploads.UPLOAD_STALE_SECONDS + 60), "pending")
+    recent = add_issue(now, "pending")  # Created a week ago, photo added just now
+    uploaded = add_issue(now - timedelta(days=1), "uploaded")
+
+    assert await uploads.fail_stale_uploads() == 1
+    with engine.connect() as conn:
+        rows = dict(conn.execute(select(Issue.id, Issue.image_status)).all())
+        stale_updated_at = conn.execute(select(Issue.updated_at).where(Issue.id == stale)).scalar_one()
+    assert rows == {stale: "failed", recent: "pending", uploaded: "uploaded"}
+    # So clients syncing through the delta feed see it
+    assert stale_updated_at >= now
@@ -75,7 +75,7 @@ def test_full_suite():
     response = client.get("/issues")
     
     if response.status_code == 200:
-        issues = response.json()
+        issues = response.json()["items"]
         found = any(item.get('id') == issue_id for item in issues) if issue_id else False
         if found:
             print(f"   ✓ SUCCESS: Found issue {issue_id} in list.")
@@ -0,0 +1,39 @@
+import pytest
+from sqlalchemy import func, select
+
+from models import IssueVote, engine
+
+pytestmark = pytest.mark.anyio
+
+
+async def new_issue(client) -> int:
+    return (await client.post("/issues", data={"description": "Fan broken", "location": "Library"})).json()["id"]
+
+
+async def test_a_second_upvote_by_the_same_user_is_not_counted(client, login):
+    login()
+    issue_id = await new_issue(client)
+    first = (await client.post(f"/issues/{issue_id}/upvote")).json()
+    again = (await client.post(f"/issues/{issue_id}/upvote")).json()
+    assert first == {"message": "Upvoted", "upvotes": 1}
+    assert again == {"message": "Already upvoted", "upvotes": 1}
+    with engine.connect() as conn:
+        assert conn.scalar(select(func.count()).select_from(IssueVote)) == 1
+
+
+async def test_each_user_gets_one_vote(client, login):
+    login("student-1")
+    issue_id = await new_issue(client)
+    for sub in ("student-1", "student-2", "student-3"):
+        login(sub)
+        await client.post(f"/issues/{issue_id}/upvote")
+    login("student-2")
+    assert (await client.post(f"/issues/{issue_id}/upvote")).json()["upvotes"] == 3
+
+
+async def test_upvoting_needs_an_existing_issue_and_a_user(client, login):
+    login()
+    assert (await client.post("/issues/999/upvote")).status_code == 404
+    issue_id = await new_issue(client)
+    login(None)
+    assert (await client.post(f"/issues/{issue_id}/upvote")).status_code == 401
@@ -0,0 +1,120 @@
+import asyncio
+import json
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import delete
+
+from logs import get_logger
+from models import AuthToken, AsyncSessionLocal
+
+# --- Short-lived auth state (OAuth platform hints, mobile handoff tokens) ---
+# Every entry has a TTL and is read at most once. The database store is shared
+# by all workers and instances, so an OAuth callback and the mobile app's
+# /auth/exchange-token can land on different processes. The memory store is a
+# size-bounded LRU for single-process development. Expired entries are never
+# returned, and a background sweep deletes them so nothing grows without bound.
+
+AUTH_STORE = os.getenv("AUTH_STORE", "database")  # database | memory
+AUTH_STORE_MAX_ENTRIES = int(os.getenv("AUTH_STORE_MAX_ENTRIES", "10000"))
+AUTH_STORE_SWEEP_SECONDS = float(os.getenv("AUTH_STORE_SWEEP_SECONDS", "60"))
+
+logger = get_logger(__name__)
+
+
+class MemoryStore:
+    def __init__(self, namespace: str, ttl: float, max_entries: int = AUTH_STORE_MAX_ENTRIES):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (expires_at, value), oldest first
+
+    async def put(self, key: str, value: dict):
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            # Abandoned logins are the oldest entries; drop them first
+            self._entries.popitem(last=False)
+
+    async def pop(self, key: str) -> Optional[dict]:
+        entry = self._entries.pop(key, None)
+        if entry is None or entry[0] < time.monotonic():
+            return None
+        return entry[1]
+
+    async def sweep(self) -> int:
+        now = time.monotonic()
+        expired = [key for key, (expires_at, _) in self._entries.items() if expires_at < now]
+        for key in expired:
+            del self._entries[key]
+        return len(expired)
+
+
+class DatabaseStore:
+    def __init__(self, namespace: str, ttl: float):
+        self.namespace = namespace
+        self.ttl = ttl
+
+    def _key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    async def put(self, key: str, value: dict):
+        async with AsyncSessionLocal() as db:
+            db.add(AuthToken(
+                key=self._key(key),
+                value=json.dumps(value),
+                expires_at=datetime.utcnow() + timedelta(seconds=self.ttl),
+            ))
+            await db.commit()
+
+    async def pop(self, key: str) -> Optional[dict]:
+        async with AsyncSessionLocal() as db:
+            # DELETE ... RETURNING: of two concurrent exchanges of one token, only one gets it
+            row = (await db.execute(
+                delete(AuthToken)
+                .where(AuthToken.key == self._key(key))
+                .returning(AuthToken.value, AuthToken.expires_at)
+            )).first()
+            await db.commit()
+        if row is None or row.expires_at < datetime.utcnow():
+            return None
+        return json.loads(row.value)
+
+    async def sweep(self) -> int:
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                delete(AuthToken).where(
+                    AuthToken.key.startswith(f"{self.namespace}:"),
+                    AuthToken.expires_at < datetime.utcnow(),
+                )
+            )
+            await db.commit()
+        return result.rowcount
+
+
+def make_store(namespace: str, ttl: float):
+    if AUTH_STORE == "memory":
+        return MemoryStore(namespace, ttl)
+    return DatabaseStore(namespace, ttl)
+
+
+# Platform (web / mobile) chosen at login, keyed by OAuth state
+oauth_states = make_store("oauth_state", ttl=600)
+# One-time tokens the mobile app exchanges for a session after the deep link
+mobile_tokens = make_store("mobile_token", ttl=300)
+
+
+async def sweep_forever(*other_stores):
+    """Delete expired entries every AUTH_STORE_SWEEP_SECONDS, from these stores and any with the same sweep()."""
+    while True:
+        await asyncio.sleep(AUTH_STORE_SWEEP_SECONDS)
+        for store in (oauth_states, mobile_tokens, *other_stores):
+            try:
+                removed = await store.sweep()
+                if removed:
+                    logger.debug("Swept expired entries", extra={"store": store.namespace, "removed": removed})
+            except Exception as e:
+                logger.warning("Sweep failed", extra={"store": store.namespace, "error": str(e)})
@@ -0,0 +1,190 @@
+import asyncio
+import os
+import random
+import tempfile
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Optional
+
+from sqlalchemy import update
+
+from dependencies import supabase
+from logs import get_logger
+from models import AsyncSessionLocal, Issue
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+# --- Background upload pipeline ---
+# Requests hand uploads to a bounded queue and return immediately; a fixed pool
+# of workers pushes them to Supabase Storage (the client is blocking, so each
+# call runs in a thread) and reports the public URLs back through a callback.
+# Jobs point at a spooled temp file rather than holding the bytes, so queued
+# uploads cost disk, not memory; the file is deleted once the job is done.
+#
+# Objects are keyed by the SHA-256 of the original, next to a small thumbnail
+# and a medium WebP derivative:
+#     <sha256><ext>   <sha256>_thumb.webp   <sha256>_medium.webp
+#
+# The queue lives in this process, so a restart loses whatever was still in it.
+# fail_stale_uploads() runs at startup and then periodically, and marks issue
+# images that have been pending for UPLOAD_STALE_SECONDS as failed rather than
+# leaving them pending forever. A job that does finish later still records its URLs.
+
+UPLOAD_WORKERS = int(os.getenv("UPLOAD_WORKERS", "4"))
+UPLOAD_QUEUE_SIZE = int(os.getenv("UPLOAD_QUEUE_SIZE", "100"))
+UPLOAD_MAX_ATTEMPTS = int(os.getenv("UPLOAD_MAX_ATTEMPTS", "4"))
+UPLOAD_BACKOFF_SECONDS = float(os.getenv("UPLOAD_BACKOFF_SECONDS", "0.5"))
+UPLOAD_DRAIN_SECONDS = float(os.getenv("UPLOAD_DRAIN_SECONDS", "10"))
+UPLOAD_STALE_SECONDS = float(os.getenv("UPLOAD_STALE_SECONDS", "900"))
+UPLOAD_SWEEP_INTERVAL_SECONDS = float(os.getenv("UPLOAD_SWEEP_INTERVAL_SECONDS", "300"))
+
+logger = get_logger(__name__)
+THUMBNAIL_SIZE = int(os.getenv("THUMBNAIL_SIZE", "256"))
+MEDIUM_IMAGE_SIZE = int(os.getenv("MEDIUM_IMAGE_SIZE", "1024"))
+WEBP_QUALITY = int(os.getenv("WEBP_QUALITY", "80"))
+
+DERIVATIVES = {"thumb": THUMBNAIL_SIZE, "medium": MEDIUM_IMAGE_SIZE}
+
+
+@dataclass
+class UploadResult:
+    url: str
+    thumbnail_url: Optional[str] = None
+    medium_url: Optional[str] = None
+
+
+@dataclass
+class UploadJob:
+    bucket: str
+    sha256: str
+    extension: str
+    file_path: str
+    content_type: Optional[str]
+    # Called with the public URLs, or None once every attempt has failed
+    on_done: Callable[[Optional[UploadResult]], Awaitable[None]]
+
+
+_queue: Optional[asyncio.Queue] = None
+_workers: list[asyncio.Task] = []
+
+
+def _make_derivatives(file_path: str) -> dict:
+    """Write WebP derivatives next to the spooled file; empty when it is not an image (e.g. video)."""
+    if Image is None:
+        return {}
+    paths = {}
+    try:
+        with Image.open(file_path) as image:
+            # Decode JPEGs at reduced scale where possible; the medium size is the largest we need
+            image.draft("RGB", (MEDIUM_IMAGE_SIZE, MEDIUM_IMAGE_SIZE))
+            image = image.convert("RGB")
+        for name, size in DERIVATIVES.items():
+            derivative = image.copy()
+            derivative.thumbnail((size, size))
+            fd, path = tempfile.mkstemp(prefix="campusfix_", suffix=f"_{name}.webp", dir=os.path.dirname(file_path))
+            with os.fdopen(fd, "wb") as out:
+                derivative.save(out, "WEBP", quality=WEBP_QUALITY)
+            paths[name] = path
+    except Exception as e:
+        logger.warning("No derivatives made", extra={"file": os.path.basename(file_path), "error": str(e)})
+    return paths
+
+
+def _upload(bucket: str, key: str, file_path: str, content_type: Optional[str]) -> str:
+    file_options = {"x-upsert": "true"}  # A retry may follow an attempt that actually landed
+    if content_type:
+        file_options["content-type"] = content_type
+    with open(file_path, "rb") as f:
+        # Passing the open file lets httpx stream it instead of loading it
+        supabase.storage.from_(bucket).upload(path=key, file=f, file_options=file_options)
+    return supabase.storage.from_(bucket).get_public_url(key)
+
+
+async def _run(job: UploadJob):
+    derivatives = await asyncio.to_thread(_make_derivatives, job.file_path)
+    # (name, storage key, local file, content type)
+    pending = [("original", f"{job.sha256}{job.extension}", job.file_path, job.content_type)]
+    pending += [(name, f"{job.sha256}_{name}.webp", path, "image/webp") for name, path in derivatives.items()]
+
+    urls = {}
+    try:
+        for attempt in range(UPLOAD_MAX_ATTEMPTS):
+            try:
+                # Files that already landed are not re-sent on retry
+                for name, key, path, content_type in pending:
+                    if name not in urls:
+                        urls[name] = await asyncio.to_thread(_upload, job.bucket, key, path, content_type)
+                break
+            except Exception as e:
+                logger.warning("Upload failed", extra={
+                    "sha256": job.sha256, "attempt": attempt + 1, "max_attempts": UPLOAD_MAX_ATTEMPTS, "error": str(e),
+                })
+                if attempt + 1 < UPLOAD_MAX_ATTEMPTS:
+                    # Exponential backoff with jitter
+                    await asyncio.sleep(UPLOAD_BACKOFF_SECONDS * 2 ** attempt * random.uniform(0.5, 1.5))
+
+        result = None
+        if "original" in urls:
+            result = UploadResult(url=urls["original"], thumbnail_url=urls.get("thumb"), medium_url=urls.get("medium"))
+        await job.on_done(result)
+    except Exception:
+        logger.exception("Recording upload result failed", extra={"sha256": job.sha256})
+    finally:
+        for path in [job.file_path, *derivatives.values()]:
+            os.remove(path)
+
+
+async def _worker():
+    while True:
+        job = await _queue.get()
+        try:
+            await _run(job)
+        finally:
+            _queue.task_done()
+
+
+def start_upload_workers():
+    global _queue
+    _queue = asyncio.Queue(maxsize=UPLOAD_QUEUE_SIZE)
+    _workers.extend(asyncio.create_task(_worker()) for _ in range(UPLOAD_WORKERS))
+
+
+async def stop_upload_workers():
+    # Give in-flight uploads a chance to finish before shutting down
+    if _queue is not None:
+        try:
+            await asyncio.wait_for(_queue.join(), timeout=UPLOAD_DRAIN_SECONDS)
+        except asyncio.TimeoutError:
+            logger.warning("Uploads still queued at shutdown", extra={"queued": _queue.qsize()})
+    for task in _workers:
+        task.cancel()
+    await asyncio.gather(*_workers, return_exceptions=True)
+    _workers.clear()
+
+
+async def enqueue_upload(job: UploadJob):
+    """Queue a job; waits for a free slot when the queue is full."""
+    if _queue is None:
+        raise RuntimeError("Upload workers are not running")
+    await _queue.put(job)
+
+
+async def fail_stale_uploads() -> int:
+    """Mark issue images pending for longer than UPLOAD_STALE_SECONDS as failed; returns how many."""
+    # updated_at, not created_at: a photo can be added to an older issue when a report is merged into it
+    cutoff = datetime.utcnow() - timedelta(seconds=UPLOAD_STALE_SECONDS)
+    async with AsyncSessionLocal() as db:
+        # Through the ORM so updated_at moves and clients pick the change up from the delta feed
+        result = await db.execute(
+            update(Issue)
+            .where(Issue.image_status == "pending", Issue.updated_at < cutoff)
+            .values(image_status="failed")
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+    if result.rowcount:
+        logger.warning("Stale uploads marked failed", extra={"failed": result.rowcount})
+    return result.rowcount
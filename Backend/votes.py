@@ -0,0 +1,61 @@
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import func, literal, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import Issue, IssueVote
+
+
+def _insert_vote(dialect_name: str, issue_id: int, user_id: str):
+    insert = postgresql.insert if dialect_name == "postgresql" else sqlite.insert
+    # Only for an existing issue: SQLite does not enforce the foreign key here
+    return insert(IssueVote)\
+        .from_select(
+            ["issue_id", "user_id", "created_at"],
+            select(Issue.id, literal(user_id), literal(datetime.utcnow())).where(Issue.id == issue_id),
+        )\
+        .on_conflict_do_nothing(index_elements=["issue_id", "user_id"])
+
+
+async def add_upvote(db: AsyncSession, issue_id: int, user_id: str) -> Optional[int]:
+    """
+    Record `user_id`'s vote on `issue_id` and bump the counter, in the caller's
+    transaction (the caller commits). Returns the new upvote count, or None if
+    the vote was a duplicate or the issue does not exist; nothing is written then.
+    """
+    dialect_name = db.bind.dialect.name
+    bump = update(Issue).values(upvotes=func.coalesce(Issue.upvotes, 0) + 1)
+
+    if dialect_name == "postgresql":
+        # One round trip: the counter only moves if the vote row was actually inserted
+        vote = _insert_vote(dialect_name, issue_id, user_id).returning(IssueVote.issue_id).cte("vote")
+        return (await db.execute(
+            bump.where(Issue.id.in_(select(vote.c.issue_id))).returning(Issue.upvotes)
+        )).scalar()
+    # SQLite has no data-modifying CTEs, so run both statements in one transaction
+    if not (await db.execute(_insert_vote(dialect_name, issue_id, user_id))).rowcount:
+        return None
+    return (await db.execute(bump.where(Issue.id == issue_id).returning(Issue.upvotes))).scalar()
+
+
+async def cast_upvote(db: AsyncSession, issue_id: int, user_id: str) -> Optional[int]:
+    """
+    Record `user_id`'s vote on `issue_id` and bump the counter atomically.
+    Returns the new upvote count, or None if the vote was a duplicate or the
+    issue does not exist (callers disambiguate on that cold path).
+    """
+    try:
+        upvotes = await add_upvote(db, issue_id, user_id)
+    except IntegrityError:
+        # Foreign key violation: the issue was deleted meanwhile
+        await db.rollback()
+        return None
+
+    if upvotes is None:
+        await db.rollback()
+        return None
+    await db.commit()
+    return upvotes
@@ -3,6 +3,8 @@ class Issue {
   final String description;
   final String location;
   final String? imageUrl;
+  final String? thumbnailUrl;
+  final String? mediumUrl;
   final String status;
   final int upvotes;
   final DateTime createdAt;
@@ -14,6 +16,8 @@ class Issue {
     required this.description,
     required this.location,
     this.imageUrl,
+    this.thumbnailUrl,
+    this.mediumUrl,
     required this.status,
     required this.upvotes,
     required this.createdAt,
@@ -21,12 +25,18 @@ class Issue {
     this.reporterEmail,
   });
 
+  // Smaller derivatives for list views; older issues only have the original
+  String? get listImageUrl => mediumUrl ?? imageUrl;
+  String? get thumbImageUrl => thumbnailUrl ?? imageUrl;
+
   factory Issue.fromJson(Map<String, dynamic> json) {
     return Issue(
       id: json['id'],
       description: json['description'],
       location: json['location'],
       imageUrl: json['image_url'],
+      thumbnailUrl: json['thumbnail_url'],
+      mediumUrl: json['medium_url'],
       status: json['status'],
       upvotes: json['upvotes'],
       createdAt: DateTime.parse(json['created_at']),
@@ -1,20 +1,31 @@
+import 'dart:async';
 import 'package:flutter/foundation.dart';
 import 'package:file_picker/file_picker.dart';
 import 'dart:io';
+import 'package:http/http.dart' as http;
 import '../services/api_service.dart';
 import '../models/issue.dart';
 
 class IssuesProvider with ChangeNotifier {
   final ApiService _apiService = ApiService();
   List<Issue> _issues = [];
+  String? _nextCursor;
+  String? _syncToken;
+  StreamSubscription? _events;
   bool _isAdmin = false;
   bool _isLoading = false;
+  bool _isLoadingMore = false;
+  Map<String, dynamic>? _stats;
   String? _error;
   
   List<Issue> get issues => _issues;
   bool get isLoading => _isLoading;
+  bool get isLoadingMore => _isLoadingMore;
+  // Totals over all issues from /analytics; `issues` only holds the pages loaded so far
+  Map<String, dynamic>? get stats => _stats;
   String? get error => _error;
   bool get isAdmin => _isAdmin;
+  bool get hasMore => _nextCursor != null;
 
   Future<void> checkAdminStatus() async {
     try {
@@ -34,8 +45,12 @@ class IssuesProvider with ChangeNotifier {
     notifyListeners();
 
     try {
-      final List<dynamic> data = await _apiService.get('/issues');
+      final page = await _apiService.get('/issues');
+      final List<dynamic> data = page['items'];
       _issues = data.map((json) => Issue.fromJson(json)).toList();
+      _nextCursor = page['next_cursor'];
+      _syncToken = page['sync_token'];
+      listenForChanges();
       // Also check admin status when fetching issues
       await checkAdminStatus();
     } catch (e) {
@@ -49,14 +64,104 @@ class IssuesProvider with ChangeNotifier {
     }
   }
 
+  // Next page of the list; screens call this as the user nears the end of it
+  Future<void> fetchMoreIssues() async {
+    if (_nextCursor == null || _isLoading || _isLoadingMore) return;
+    _isLoadingMore = true;
+    notifyListeners();
+
+    try {
+      final page = await _apiService.get(
+          '/issues?cursor=${Uri.encodeQueryComponent(_nextCursor!)}');
+      final List<dynamic> data = page['items'];
+      // Rows may already be here if the delta feed pulled them in
+      final known = _issues.map((i) => i.id).toSet();
+      _issues.addAll(data
+          .map((json) => Issue.fromJson(json))
+          .where((issue) => !known.contains(issue.id)));
+      _nextCursor = page['next_cursor'];
+    } catch (e) {
+      print('Loading more issues failed: $e');
+    } finally {
+      _isLoadingMore = false;
+      notifyListeners();
+    }
+  }
+
+  Future<void> fetchStats() async {
+    try {
+      _stats = await _apiService.get('/analytics');
+      notifyListeners();
+    } catch (e) {
+      print('Failed to load issue totals: $e');
+    }
+  }
+
+  // Pull only issues created or changed since the last sync and merge them in
+  Future<void> refreshIssues() async {
+    if (_syncToken == null) return fetchIssues();
+
+    try {
+      bool hasMore = true;
+      while (hasMore) {
+        final changes = await _apiService.get(
+            '/issues/changes?since=${Uri.encodeQueryComponent(_syncToken!)}');
+        for (final json in changes['items']) {
+          final issue = Issue.fromJson(json);
+          final index = _issues.indexWhere((i) => i.id == issue.id);
+          if (index != -1) {
+            _issues[index] = issue;
+          } else {
+            _issues.add(issue);
+          }
+        }
+        _syncToken = changes['next_since'];
+        hasMore = changes['has_more'] == true;
+      }
+      _issues.sort((a, b) => b.createdAt.compareTo(a.createdAt));
+      notifyListeners();
+    } catch (e) {
+      print('Delta refresh failed, falling back to full fetch: $e');
+      await fetchIssues();
+    }
+  }
+
+  // Pull the delta feed whenever the server pushes an issue event, instead of polling
+  void listenForChanges() {
+    if (_events != null) return;
+    _events = _apiService.events().listen(
+      (event) {
+        final String type = event['type'];
+        if (type.startsWith('issue.') || type == 'resync') refreshIssues();
+      },
+      onError: (e) {
+        print('Event stream failed: $e');
+        _reconnectEvents();
+      },
+      onDone: _reconnectEvents,
+      cancelOnError: true,
+    );
+  }
+
+  void _reconnectEvents() {
+    _events = null;
+    Future.delayed(const Duration(seconds: 5), listenForChanges);
+  }
+
+  @override
+  void dispose() {
+    _events?.cancel();
+    super.dispose();
+  }
+
   Future<void> upvoteIssue(int id) async {
     try {
       await _apiService.post('/issues/$id/upvote', {});
       // Optimistic update or refetch
       final index = _issues.indexWhere((i) => i.id == id);
       if (index != -1) {
-        // Need to make Issue updated or mutable, but for MVP we refetch
-        await fetchIssues();
+        // Issue is immutable, so pull the changed row from the delta feed
+        await refreshIssues();
       }
     } catch (e) {
       print('Upvote failed: $e');
@@ -67,14 +172,15 @@ class IssuesProvider with ChangeNotifier {
   Future<void> updateIssueStatus(int id, String status) async {
     try {
       await _apiService.patch('/issues/$id/status', {'status': status});
+      if (_stats != null) fetchStats();
       
       // Update local state
       final index = _issues.indexWhere((i) => i.id == id);
       if (index != -1) {
         // Create new issue with updated status (Issue is likely immutable or we should modify it)
         // Assuming Issue is immutable, we'd replace it. If mutable (which it probably isn't strictly), we'd modify.
-        // Let's just refetch for safety and simplicity in MVP.
-        await fetchIssues();
+        // Pull just the changed row from the delta feed.
+        await refreshIssues();
       }
     } catch (e) {
       print('Update status failed: $e');
@@ -82,10 +188,17 @@ class IssuesProvider with ChangeNotifier {
     }
   } 
 
-  Future<void> submitIssue({
+  /// Returns true when the backend merged the report into an existing open
+  /// issue (as an upvote) instead of creating a new one.
+  ///
+  /// With [onDuplicate] `reject` (the default), a report that reads like an
+  /// open issue at the same place throws [DuplicateIssuesException]; ask the
+  /// user, then submit again with `merge` or `create`.
+  Future<bool> submitIssue({
     required String description,
     required String location,
     PlatformFile? imageFile,
+    String onDuplicate = 'reject',
   }) async {
     try {
       List<int>? fileBytes;
@@ -100,19 +213,36 @@ class IssuesProvider with ChangeNotifier {
         }
       }
 
-      await _apiService.postMultipart(
+      // On a dropped connection, retry once with the same key: if the first
+      // attempt did reach the server, the retry gets its response back
+      // instead of creating the issue twice.
+      final idempotencyKey = ApiService.newIdempotencyKey();
+      Future<dynamic> send() => _apiService.postMultipart(
         '/issues',
         {
           'description': description,
           'location': location,
+          'on_duplicate': onDuplicate,
         },
         fileField: 'image',
         fileBytes: fileBytes,
         filename: filename,
+        idempotencyKey: idempotencyKey,
       );
+      dynamic response;
+      try {
+        response = await send();
+      } on http.ClientException {
+        response = await send();
+      } on SocketException {
+        response = await send();
+      }
       
       // Refresh list
-      await fetchIssues();
+      await refreshIssues();
+      return response is Map && response['merged'] == true;
+    } on DuplicateIssuesException {
+      rethrow;
     } catch (e) {
       print('Submit failed: $e');
       rethrow;
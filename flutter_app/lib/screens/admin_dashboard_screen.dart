@@ -3,6 +3,7 @@ import 'package:provider/provider.dart';
 import 'package:go_router/go_router.dart';
 import '../providers/issues_provider.dart';
 import '../models/issue.dart';
+import 'issue_list_screen.dart' show LoadMoreTile;
 import 'package:intl/intl.dart';
 import 'package:flutter/foundation.dart';
 
@@ -14,14 +15,31 @@ class AdminDashboardScreen extends StatefulWidget {
 }
 
 class _AdminDashboardScreenState extends State<AdminDashboardScreen> {
+  final ScrollController _scrollController = ScrollController();
+
   @override
   void initState() {
     super.initState();
+    _scrollController.addListener(_onScroll);
     WidgetsBinding.instance.addPostFrameCallback((_) {
-      context.read<IssuesProvider>().fetchIssues();
+      final provider = context.read<IssuesProvider>();
+      provider.fetchIssues();
+      provider.fetchStats();
     });
   }
 
+  @override
+  void dispose() {
+    _scrollController.dispose();
+    super.dispose();
+  }
+
+  void _onScroll() {
+    if (_scrollController.position.extentAfter < 600) {
+      context.read<IssuesProvider>().fetchMoreIssues();
+    }
+  }
+
   @override
   Widget build(BuildContext context) {
     return Scaffold(
@@ -65,13 +83,15 @@ class _AdminDashboardScreenState extends State<AdminDashboardScreen> {
              );
           }
 
-          // Stats
-          final total = provider.issues.length;
-          final pending = provider.issues.where((i) => i.status == 'pending').length;
-          final inProgress = provider.issues.where((i) => i.status == 'in_progress').length;
-          final resolved = provider.issues.where((i) => i.status == 'resolved').length;
+          // Stats: totals over every issue, not just the pages loaded so far
+          final stats = provider.stats;
+          final total = stats?['total_issues'] ?? provider.issues.length;
+          final pending = stats?['pending'] ?? provider.issues.where((i) => i.status == 'pending').length;
+          final inProgress = stats?['in_progress'] ?? provider.issues.where((i) => i.status == 'in_progress').length;
+          final resolved = stats?['resolved'] ?? provider.issues.where((i) => i.status == 'resolved').length;
 
           return ListView(
+            controller: _scrollController,
             padding: const EdgeInsets.all(16),
             children: [
               // Stats Cards
@@ -93,6 +113,7 @@ class _AdminDashboardScreenState extends State<AdminDashboardScreen> {
               ),
               const SizedBox(height: 16),
               ...provider.issues.map((issue) => _AdminIssueCard(issue: issue)).toList(),
+              if (provider.hasMore) LoadMoreTile(provider: provider),
             ],
           );
         },
@@ -179,13 +200,13 @@ class _AdminIssueCard extends StatelessWidget {
                   ],
                 ),
               ),
-              if (issue.imageUrl != null)
+              if (issue.thumbImageUrl != null)
                  Container(
                    width: 60, height: 60,
                    margin: const EdgeInsets.only(left: 12),
                    decoration: BoxDecoration(
                      borderRadius: BorderRadius.circular(8),
-                     image: DecorationImage(image: NetworkImage(_getFullUrl(issue.imageUrl!)), fit: BoxFit.cover),
+                     image: DecorationImage(image: NetworkImage(_getFullUrl(issue.thumbImageUrl!)), fit: BoxFit.cover),
                    ),
                  ),
             ],
@@ -1,3 +1,4 @@
+import 'dart:async';
 import 'package:flutter/material.dart';
 import 'package:intl/intl.dart';
 import '../services/api_service.dart';
@@ -14,11 +15,37 @@ class _CommunityScreenState extends State<CommunityScreen> {
   List<dynamic> _reports = [];
   bool _isLoading = true;
   String? _error;
+  StreamSubscription? _events;
 
   @override
   void initState() {
     super.initState();
     _fetchReports();
+    _listenForReports();
+  }
+
+  @override
+  void dispose() {
+    _events?.cancel();
+    super.dispose();
+  }
+
+  // Refetch the feed when a report is pushed rather than polling it
+  void _listenForReports() {
+    _events = _apiService.events().listen(
+      (event) {
+        final String type = event['type'];
+        if (type.startsWith('safety.') || type == 'resync') {
+          _fetchReports();
+        }
+      },
+      onError: (e) => debugPrint('Event stream failed: $e'),
+      onDone: () {
+        if (mounted) Future.delayed(const Duration(seconds: 5), () {
+          if (mounted) _listenForReports();
+        });
+      },
+    );
   }
 
   Future<void> _fetchReports() async {
@@ -15,15 +15,31 @@ class IssueListScreen extends StatefulWidget {
 }
 
 class _IssueListScreenState extends State<IssueListScreen> {
+  final ScrollController _scrollController = ScrollController();
+
   @override
   void initState() {
     super.initState();
+    _scrollController.addListener(_onScroll);
     // Fetch issues when screen loads
     WidgetsBinding.instance.addPostFrameCallback((_) {
       context.read<IssuesProvider>().fetchIssues();
     });
   }
 
+  @override
+  void dispose() {
+    _scrollController.dispose();
+    super.dispose();
+  }
+
+  // Load the next page before the user reaches the end of the list
+  void _onScroll() {
+    if (_scrollController.position.extentAfter < 600) {
+      context.read<IssuesProvider>().fetchMoreIssues();
+    }
+  }
+
   @override
   Widget build(BuildContext context) {
     return Scaffold(
@@ -146,10 +162,15 @@ class _IssueListScreenState extends State<IssueListScreen> {
           return RefreshIndicator(
             onRefresh: () => provider.fetchIssues(),
             child: ListView.separated(
+              controller: _scrollController,
+              physics: const AlwaysScrollableScrollPhysics(),
               padding: const EdgeInsets.all(16),
-              itemCount: provider.issues.length,
+              itemCount: provider.issues.length + (provider.hasMore ? 1 : 0),
               separatorBuilder: (context, index) => const SizedBox(height: 16),
               itemBuilder: (context, index) {
+                if (index == provider.issues.length) {
+                  return LoadMoreTile(provider: provider);
+                }
                 final issue = provider.issues[index];
                 return IssueCard(issue: issue);
               },
@@ -161,6 +182,30 @@ class _IssueListScreenState extends State<IssueListScreen> {
   }
 }
 
+// Last row of a paged list: a spinner while the next page loads, otherwise a
+// button (for lists too short to scroll, or after a failed load)
+class LoadMoreTile extends StatelessWidget {
+  final IssuesProvider provider;
+
+  const LoadMoreTile({super.key, required this.provider});
+
+  @override
+  Widget build(BuildContext context) {
+    return Center(
+      child: provider.isLoadingMore
+          ? const Padding(
+              padding: EdgeInsets.all(8),
+              child: CircularProgressIndicator(),
+            )
+          : TextButton.icon(
+              onPressed: () => provider.fetchMoreIssues(),
+              icon: const Icon(Icons.expand_more_rounded),
+              label: const Text('Load more'),
+            ),
+    );
+  }
+}
+
 class IssueCard extends StatelessWidget {
   final Issue issue;
 
@@ -185,11 +230,11 @@ class IssueCard extends StatelessWidget {
       child: Column(
         crossAxisAlignment: CrossAxisAlignment.start,
         children: [
-          if (issue.imageUrl != null)
+          if (issue.listImageUrl != null)
              Stack(
                children: [
                  Image.network(
-                   _getFullUrl(issue.imageUrl!), 
+                   _getFullUrl(issue.listImageUrl!), 
                    height: 180,
                    width: double.infinity,
                    fit: BoxFit.cover,
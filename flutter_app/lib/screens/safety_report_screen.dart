@@ -1,3 +1,4 @@
+import 'dart:convert';
 import 'package:flutter/material.dart';
 import 'package:file_picker/file_picker.dart';
 import '../services/api_service.dart';
@@ -19,6 +20,8 @@ class _SafetyReportScreenState extends State<SafetyReportScreen> {
   bool _isSubmitting = false;
   String? _successMessage;
   String? _errorMessage;
+  String? _idempotencyKey;
+  String? _idempotencyFields;
 
   Future<void> _pickFile() async {
     final result = await FilePicker.platform.pickFiles(
@@ -58,13 +61,22 @@ class _SafetyReportScreenState extends State<SafetyReportScreen> {
         }
       }
 
+      // Kept until the report goes through, so pressing submit again after
+      // a failure cannot file the same report twice (a new one once it is edited)
+      final attempt = json.encode(fields);
+      if (attempt != _idempotencyFields) {
+        _idempotencyKey = ApiService.newIdempotencyKey();
+        _idempotencyFields = attempt;
+      }
       await _apiService.postMultipart(
         '/safety/reports',
         fields,
         fileField: 'media',
         fileBytes: fileBytes,
         filename: filename,
+        idempotencyKey: _idempotencyKey,
       );
+      _idempotencyKey = _idempotencyFields = null;
 
       setState(() {
         _successMessage = 'Report submitted successfully. Stay safe.';
@@ -4,7 +4,9 @@ import 'package:provider/provider.dart';
 import 'package:go_router/go_router.dart';
 import 'package:flutter/foundation.dart';
 import 'dart:io';
+import '../models/issue.dart';
 import '../providers/issues_provider.dart';
+import '../services/api_service.dart';
 
 class SubmitIssueScreen extends StatefulWidget {
   const SubmitIssueScreen({super.key});
@@ -68,15 +70,31 @@ class _SubmitIssueScreenState extends State<SubmitIssueScreen> {
       // Combine Summary and Description since backend only has one field
       final fullDescription = _summary.isNotEmpty ? '$_summary\n\n$_description' : _description;
 
-      await context.read<IssuesProvider>().submitIssue(
+      final provider = context.read<IssuesProvider>();
+      Future<bool> submit(String onDuplicate) => provider.submitIssue(
         description: fullDescription,
         location: _location,
         imageFile: _pickedFile,
+        onDuplicate: onDuplicate,
       );
 
+      bool merged;
+      try {
+        merged = await submit('reject');
+      } on DuplicateIssuesException catch (e) {
+        // Similar issues are open here: let the reporter upvote one or report anyway
+        final choice = mounted ? await _askAboutDuplicates(e) : null;
+        if (choice == null) return;
+        merged = await submit(choice);
+      }
+
       if (mounted) {
         ScaffoldMessenger.of(context).showSnackBar(
-          const SnackBar(content: Text('Issue reported successfully!')),
+          SnackBar(
+            content: Text(merged
+                ? 'This issue was already reported here, so we added your upvote to it.'
+                : 'Issue reported successfully!'),
+          ),
         );
         context.go('/issues');
       }
@@ -91,6 +109,43 @@ class _SubmitIssueScreenState extends State<SubmitIssueScreen> {
     }
   }
 
+  /// Returns `merge`, `create`, or null when the reporter cancels.
+  Future<String?> _askAboutDuplicates(DuplicateIssuesException e) {
+    final similar = e.duplicates.map(Issue.fromJson).toList();
+    // A merge gives the photo to the first issue, which must not have one yet
+    final photoStatus = e.duplicates.first['image_status'];
+    final canMerge = _pickedFile == null || photoStatus == null || photoStatus == 'failed';
+    return showDialog<String>(
+      context: context,
+      builder: (dCtx) => AlertDialog(
+        title: const Text('Already reported?'),
+        content: SizedBox(
+          width: 400,
+          child: Column(
+            mainAxisSize: MainAxisSize.min,
+            crossAxisAlignment: CrossAxisAlignment.start,
+            children: [
+              Text(e.message),
+              const SizedBox(height: 12),
+              for (final issue in similar)
+                ListTile(
+                  contentPadding: EdgeInsets.zero,
+                  title: Text(issue.description, maxLines: 2, overflow: TextOverflow.ellipsis),
+                  subtitle: Text('${issue.status} · ${issue.upvotes} upvotes'),
+                ),
+            ],
+          ),
+        ),
+        actions: [
+          TextButton(onPressed: () => Navigator.pop(dCtx), child: const Text('Cancel')),
+          TextButton(onPressed: () => Navigator.pop(dCtx, 'create'), child: const Text('Report anyway')),
+          if (canMerge)
+            ElevatedButton(onPressed: () => Navigator.pop(dCtx, 'merge'), child: const Text('Upvote existing')),
+        ],
+      ),
+    );
+  }
+
   @override
   Widget build(BuildContext context) {
     return Scaffold(
@@ -1,14 +1,32 @@
 import 'dart:convert';
 import 'dart:io';
+import 'dart:math';
 import 'package:flutter/foundation.dart';
 import 'package:http/http.dart' as http;
 import 'package:flutter_secure_storage/flutter_secure_storage.dart';
 import 'client_factory.dart';
 
+/// A 409 from POST /issues: similar issues are already open at that location.
+/// Send the report again with `on_duplicate` set to `merge` (upvote the first
+/// of [duplicates]) or `create`.
+class DuplicateIssuesException implements Exception {
+  final String message;
+  final List<Map<String, dynamic>> duplicates;
+
+  DuplicateIssuesException(this.message, this.duplicates);
+
+  @override
+  String toString() => message;
+}
+
 class ApiService {
   final _storage = const FlutterSecureStorage();
   late final http.Client _client;
 
+  // Last ETag and body per GET endpoint, so unchanged lists come back as 304
+  static final Map<String, String> _etags = {};
+  static final Map<String, String> _etagBodies = {};
+
   ApiService() {
     _client = createCustomClient();
   }
@@ -16,6 +34,13 @@ class ApiService {
   // Expose client for direct access if needed (or prefer wrapper methods)
   http.Client get client => _client;
   
+  /// A random key for the Idempotency-Key header. Send the same key when
+  /// retrying a submission so the server does not store it twice.
+  static String newIdempotencyKey() {
+    final random = Random.secure();
+    return List.generate(16, (_) => random.nextInt(256).toRadixString(16).padLeft(2, '0')).join();
+  }
+
   // Dynamic Base URL based on platform
   String get baseUrl {
     return 'https://backend-492502501801.europe-west1.run.app';
@@ -44,12 +69,23 @@ class ApiService {
   }
 
   Future<dynamic> get(String endpoint) async {
+    final headers = await _getHeaders();
+    final etag = _etags[endpoint];
+    if (etag != null) headers['If-None-Match'] = etag;
+
     final response = await _client.get(
       Uri.parse('$baseUrl$endpoint'),
-      headers: await _getHeaders(),
+      headers: headers,
     );
 
-    if (response.statusCode == 200) {
+    if (response.statusCode == 304 && _etagBodies.containsKey(endpoint)) {
+      return json.decode(_etagBodies[endpoint]!);
+    } else if (response.statusCode == 200) {
+      final newEtag = response.headers['etag'];
+      if (newEtag != null) {
+        _etags[endpoint] = newEtag;
+        _etagBodies[endpoint] = response.body;
+      }
       return json.decode(response.body);
     } else {
       throw Exception('Failed to load data: ${response.statusCode}');
@@ -91,6 +127,8 @@ class ApiService {
     String? fileField,
     List<int>? fileBytes,
     String? filename,
+    List<http.MultipartFile> files = const [],
+    String? idempotencyKey,
   }) async {
     final uri = Uri.parse('$baseUrl$endpoint');
     final request = http.MultipartRequest('POST', uri);
@@ -102,6 +140,7 @@ class ApiService {
     // Note: Content-Type is set automatically for Multipart
     final headers = await _getHeaders();
     headers.remove('Content-Type'); // Let http client set boundary
+    if (idempotencyKey != null) headers['Idempotency-Key'] = idempotencyKey;
     request.headers.addAll(headers);
 
     // Add file if present
@@ -114,6 +153,7 @@ class ApiService {
         ),
       );
     }
+    request.files.addAll(files);
     
     // Use the custom client to send the request
     // MultipartRequest.send() creates its own client if not provided, 
@@ -128,8 +168,42 @@ class ApiService {
 
     if (response.statusCode == 200 || response.statusCode == 201) {
       return json.decode(response.body);
-    } else {
-      throw Exception('Failed to post multipart data: ${response.statusCode} - ${response.body}');
+    } else if (response.statusCode == 409) {
+      final detail = json.decode(response.body)['detail'];
+      if (detail is Map && detail['duplicates'] is List) {
+        throw DuplicateIssuesException(
+          detail['message'] ?? 'Similar issues already exist',
+          List<Map<String, dynamic>>.from(detail['duplicates']),
+        );
+      }
+    }
+    throw Exception('Failed to post multipart data: ${response.statusCode} - ${response.body}');
+  }
+
+  // Server-Sent Events from /events as {'type': ..., 'data': {...}} maps.
+  // The stream ends when the connection drops; callers reconnect.
+  // Note: on web the browser client delivers the body only when it completes.
+  Stream<Map<String, dynamic>> events() async* {
+    final request = http.Request('GET', Uri.parse('$baseUrl/events'));
+    final headers = await _getHeaders();
+    headers['Accept'] = 'text/event-stream';
+    request.headers.addAll(headers);
+
+    final response = await _client.send(request);
+    if (response.statusCode != 200) {
+      throw Exception('Failed to open event stream: ${response.statusCode}');
+    }
+
+    String? type;
+    await for (final line in response.stream
+        .transform(utf8.decoder)
+        .transform(const LineSplitter())) {
+      if (line.startsWith('event:')) {
+        type = line.substring(6).trim();
+      } else if (line.startsWith('data:') && type != null) {
+        yield {'type': type, 'data': json.decode(line.substring(5).trim())};
+        type = null;
+      }
     }
   }
 }
@@ -1,4 +1,5 @@
 import 'dart:convert';
+import 'dart:io';
 import 'package:flutter_secure_storage/flutter_secure_storage.dart';
 import 'package:connectivity_plus/connectivity_plus.dart';
 import 'package:http/http.dart' as http;
@@ -9,6 +10,7 @@ class OfflineService {
   final ApiService _apiService = ApiService();
   
   static const String _keyOfflineReports = 'offline_reports_queue';
+  static const int _maxBatchItems = 50; // MAX_BATCH_ITEMS on the server
 
   // Save report locally
   Future<void> saveReportLocally(Map<String, String> fields, String? filePath) async {
@@ -17,6 +19,9 @@ class OfflineService {
     queue.add({
       'fields': fields, // description, location
       'filePath': filePath, // path to media file
+      // Sent with the item on every sync attempt, so a batch whose response
+      // was lost is not stored twice when it is re-sent
+      'idempotencyKey': ApiService.newIdempotencyKey(),
       'timestamp': DateTime.now().toIso8601String(),
     });
 
@@ -39,51 +44,44 @@ class OfflineService {
     final queue = await _getQueue();
     if (queue.isEmpty) return 0;
 
-    int syncedCount = 0;
-    final List<Map<String, dynamic>> remaining = [];
+    // One request for the whole queue: the server stores every valid report in
+    // one transaction and answers per item, so only the failed ones stay queued.
+    final batch = queue.take(_maxBatchItems).toList();
+    final List<Map<String, dynamic>> items = [];
+    final List<http.MultipartFile> files = [];
+    for (final item in batch) {
+      final batchItem = Map<String, dynamic>.from(item['fields']);
+      if (item['idempotencyKey'] != null) batchItem['idempotency_key'] = item['idempotencyKey'];
+      final filePath = item['filePath'] as String?;
+      // Media that has since been deleted is dropped; the report itself still goes through
+      if (filePath != null && await File(filePath).exists()) {
+        final part = 'media${files.length}';
+        files.add(await http.MultipartFile.fromPath(part, filePath));
+        batchItem['media'] = part;
+      }
+      items.add(batchItem);
+    }
 
-    for (final item in queue) {
-      try {
-        final fields = Map<String, String>.from(item['fields']);
-        final filePath = item['filePath'] as String?;
-        
-        // Read file bytes if path exists
-        List<int>? fileBytes;
-        String? filename;
-        
-        if (filePath != null) {
-           // Basic check if file exists (might have been deleted)
-           // For MVP, if file missing, we send without it or fail? 
-           // Let's try to send simple report if file missing
-           // Note: In real app, we'd cache file content or use persistent path
+    int syncedCount = 0;
+    // Anything past the server's batch limit waits for the next sync
+    final List<Map<String, dynamic>> remaining = queue.skip(_maxBatchItems).toList();
+    try {
+      final response = await _apiService.postMultipart(
+        '/safety/reports/batch',
+        {'items': json.encode(items)},
+        files: files,
+      );
+      for (final result in response['results']) {
+        if (result['status'] == 'error') {
+          print("Sync failed for item ${result['index']}: ${result['detail']}");
+          remaining.add(batch[result['index']]);
+        } else {
+          syncedCount++;
         }
-
-        // We need to modify ApiService or handle upload manually here 
-        // Re-using ApiService logic but adapting for background sync
-        
-        // For simplicity, let's call the actual API
-        // But uploading files from background queue needs careful file handling
-        // Skipping file upload for "offline sync" MVP if strictly complex
-        // BUT user asked for all features.
-        
-        // Assuming ApiService handles multipart
-        // We'll skip file re-reading for this exact snippet simplicity and assume
-        // we can just re-queue if fail.
-        
-        // Real implementation:
-        await _apiService.postMultipart(
-          '/safety/reports',
-          fields,
-           // We'd need to re-read file bytes here if we support offline media sync
-           // fileField: 'media', 
-           // ...
-        );
-        
-        syncedCount++;
-      } catch (e) {
-        print("Sync failed for item: $e");
-        remaining.add(item); // Keep in queue
       }
+    } catch (e) {
+      print("Sync failed: $e");
+      return 0; // Keep the whole queue for the next attempt
     }
 
     // Update queue